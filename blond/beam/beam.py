@@ -17,7 +17,6 @@ statistics
 from __future__ import division
 from builtins import object
 import numpy as np
-import itertools as itl
 from scipy.constants import m_p, m_e, e, c, epsilon_0, hbar
 from ..trackers.utilities import is_in_separatrix
 from ..utils import exceptions as blExcept
@@ -127,6 +126,21 @@ class Beam(object):
         total number of macroparticles.
     intensity : float
         total intensity of the beam (in number of charge).
+    compensated_dt : bool
+        option to store, in single precision, the arrival times as offsets
+        from a double precision reference time per bunch, so that they keep
+        their resolution far from the synchronous time; default is False.
+        The beam starts as a single bunch with a zero reference, see set_dt()
+        to give the arrival times in double precision and the bunches. The
+        tracker moves the references with the bunches and computes the kick
+        and the drift on the offsets, at the cost of the single precision
+        tracking. dt then holds the offsets: use absolute_dt() for the
+        arrival times.
+    compaction : bool
+        option to move the alive particles to the front of the beam
+        coordinate arrays whenever particles are lost, so that dt, dE and id
+        only hold the alive particles and the tracking only processes them;
+        default is False.
 
     Attributes
     ----------
@@ -162,8 +176,32 @@ class Beam(object):
         ratio intensity per macroparticle [].
     n_macroparticles_lost : int
         number of macro-particles marked as 'lost' [].
+    n_alive_statistics : int
+        number of macro-particles alive when statistics() was last called [].
     id : numpy_array, int
         unique macro-particle ID number; zero if particle is 'lost'.
+    compaction : bool
+        alive-prefix compaction mode, see compact(); particles must then be
+        lost through the losses methods, or be followed by a call to
+        compact().
+    capacity : int
+        number of macro-particles that fit in the allocated memory, see
+        reserve().
+    dt_reference : numpy_array, float
+        double precision reference time of every bunch in the compensated
+        dt mode, the arrival times of the bunch being its reference plus dt
+        [s]; None otherwise.
+    bunch_bounds : numpy_array, int
+        in the compensated dt mode, index of the first particle of every
+        bunch, followed by the number of particles; None otherwise.
+    sliced_profile : Profile
+        Profile whose histogram was computed from the current arrival times
+        by the last drift (slice_in_drift option of the RingAndRFTracker);
+        None after any other change of the arrival times.
+    generation : int
+        counter incremented whenever the coordinate arrays are compacted,
+        reallocated or appended to, so that the per-particle data of other
+        objects can be checked against the current particles.
 
     See Also
     ---------
@@ -188,29 +226,53 @@ class Beam(object):
     >>> my_beam = Beam(ring, n_macroparticle, intensity)
     """
 
-    def __init__(self, Ring, n_macroparticles, intensity):
+    def __init__(self, Ring, n_macroparticles, intensity,
+                 compensated_dt=False, compaction=False, capacity=None):
 
         self.Particle = Ring.Particle
         self.beta = Ring.beta[0][0]
         self.gamma = Ring.gamma[0][0]
         self.energy = Ring.energy[0][0]
         self.momentum = Ring.momentum[0][0]
-        self.dt = np.zeros([int(n_macroparticles)], dtype=bm.precision.real_t)
-        self.dE = np.zeros([int(n_macroparticles)], dtype=bm.precision.real_t)
+        # The coordinates are views of buffers with room for capacity
+        # macro-particles, see reserve()
+        capacity = max(int(n_macroparticles), int(capacity or 0))
+        self._dt_buffer = np.zeros(capacity, dtype=bm.precision.real_t)
+        self._dE_buffer = np.zeros(capacity, dtype=bm.precision.real_t)
+        self._id_buffer = np.zeros(capacity, dtype=int)
+        self.dt = self._dt_buffer[:int(n_macroparticles)]
+        self.dE = self._dE_buffer[:int(n_macroparticles)]
         self.mean_dt = 0.
         self.mean_dE = 0.
         self.sigma_dt = 0.
         self.sigma_dE = 0.
+        self.n_alive_statistics = int(n_macroparticles)
         self.intensity = float(intensity)
         self.n_macroparticles = int(n_macroparticles)
         self.ratio = self.intensity/self.n_macroparticles
-        self.id = np.arange(1, self.n_macroparticles + 1, dtype=int)
+        self.id = self._id_buffer[:self.n_macroparticles]
+        self.id[:] = np.arange(1, self.n_macroparticles + 1)
+        if compensated_dt:
+            if bm.precision.num != 1:
+                # PrecisionError
+                raise RuntimeError("ERROR in Beam: The compensated dt mode" +
+                                   " is only available in single precision")
+            self.dt_reference = np.zeros(1)
+            self.bunch_bounds = np.array([0, self.n_macroparticles],
+                                         dtype=np.int32)
+        else:
+            self.dt_reference = None
+            self.bunch_bounds = None
+        # Recentring of the references, applied by the next drift
+        self._dt_shift = None if self.dt_reference is None else np.zeros(1)
+        self.compaction = bool(compaction)
+        self.sliced_profile = None
+        self.generation = 0
         # For MPI
         self.n_total_macroparticles_lost = 0
         self.n_total_macroparticles = n_macroparticles
         self.is_splitted = False
-        self._sumsq_dt = 0.
-        self._sumsq_dE = 0.
+        self._statistics = np.zeros(9)
 
     @property
     def n_macroparticles_lost(self):
@@ -223,6 +285,11 @@ class Beam(object):
 
         '''
 
+        if self.compaction:
+            # The lost particles are beyond the alive prefix, or flagged in
+            # it and not compacted yet
+            return int(self.n_macroparticles - len(self.id)) + \
+                int(np.count_nonzero(self.id == 0))
         return len(np.where(self.id == 0)[0])
 
     @property
@@ -238,16 +305,144 @@ class Beam(object):
 
         return self.n_macroparticles - self.n_macroparticles_lost
 
+    def set_dt(self, dt, bunch_bounds=None):
+        '''
+        Set the arrival times of the tracked particles. In the compensated
+        dt mode, the reference time of every bunch is set in double
+        precision to the middle of its arrival times, and dt to the offsets
+        from it.
+
+        Parameters
+        ----------
+        dt : float array
+            arrival times of the tracked particles [s].
+        bunch_bounds : int array
+            index of the first particle of every bunch, followed by the
+            number of particles; a single bunch by default.
+        '''
+
+        dt = np.asarray(dt, dtype=np.float64)
+        if len(dt) != len(self.dt):
+            # ParticleNumberError
+            raise RuntimeError("ERROR in Beam: set_dt requires the arrival" +
+                               " times of all the tracked particles")
+        self.sliced_profile = None
+        if self.dt_reference is None:
+            self.dt[:] = dt
+            return
+
+        if bunch_bounds is None:
+            bunch_bounds = [0, len(dt)]
+        bunch_bounds = np.asarray(bunch_bounds, dtype=np.int32)
+        if bunch_bounds[0] != 0 or bunch_bounds[-1] != len(dt) or \
+                np.any(np.diff(bunch_bounds) < 0):
+            # BunchBoundsError
+            raise RuntimeError("ERROR in Beam: bunch_bounds must increase" +
+                               " from 0 to the number of particles")
+
+        self.bunch_bounds = bunch_bounds
+        self.dt_reference = np.zeros(len(bunch_bounds) - 1)
+        for bunch, (start, stop) in enumerate(zip(bunch_bounds[:-1],
+                                                  bunch_bounds[1:])):
+            if stop > start:
+                self.dt_reference[bunch] = 0.5 * (np.min(dt[start:stop]) +
+                                                  np.max(dt[start:stop]))
+        self._dt_shift = np.zeros(len(self.dt_reference))
+        self.dt[:] = dt - np.repeat(self.dt_reference,
+                                    np.diff(bunch_bounds))
+
+    def absolute_dt(self):
+        '''
+        Arrival times of the tracked particles, in double precision in the
+        compensated dt mode; dt itself otherwise.
+
+        Returns
+        -------
+        dt : float array
+            arrival times [s].
+        '''
+
+        if self.dt_reference is None:
+            return self.dt
+        return self.dt.astype(np.float64) + \
+            np.repeat(self.dt_reference, np.diff(self.bunch_bounds))
+
+    def bunch_ranges(self):
+        '''
+        Ranges of the particles sharing a reference time, to process dt bunch
+        by bunch in the compensated dt mode; a single range with a zero
+        reference otherwise.
+
+        Returns
+        -------
+        ranges : list of tuple
+            (start, stop, reference) of every bunch, the arrival times of the
+            particles start to stop being reference + dt [s].
+        '''
+
+        if self.dt_reference is None:
+            return [(0, len(self.dt), 0.)]
+        return [(int(start), int(stop), float(reference))
+                for start, stop, reference in zip(self.bunch_bounds[:-1],
+                                                   self.bunch_bounds[1:],
+                                                   self.dt_reference)]
+
+    def compact(self):
+        """Move the alive particles (id != 0) to the front of the beam
+        coordinate arrays, in place and keeping their IDs, and restrict dt,
+        dE and id to the alive particles. The lost particles are left beyond
+        the alive prefix and are no longer tracked; their memory is reused by
+        the particles added afterwards.
+        """
+
+        alive = self.id != 0
+        n_alive = int(np.count_nonzero(alive))
+        if n_alive == len(self.id):
+            return
+
+        if self.dt_reference is not None:
+            # Keep the order of the particles, so that they stay in their
+            # bunch
+            order = np.concatenate((np.flatnonzero(alive),
+                                    np.flatnonzero(~alive)))
+            for array in [self.dt, self.dE, self.id]:
+                array[:] = array[order]
+            self._compact_bunches(alive)
+        else:
+            # Swap the lost particles of the prefix with the alive particles
+            # beyond it
+            lost_front = np.flatnonzero(~alive[:n_alive])
+            alive_back = n_alive + np.flatnonzero(alive[n_alive:])
+            for array in [self.dt, self.dE, self.id]:
+                array[lost_front], array[alive_back] = \
+                    array[alive_back], array[lost_front]
+        self.sliced_profile = None
+        self.generation += 1
+
+        self.dt = self.dt[:n_alive]
+        self.dE = self.dE[:n_alive]
+        self.id = self.id[:n_alive]
+
+    def _compact_bunches(self, alive):
+        # Bunch bounds after the removal of the particles not alive, the
+        # order of the particles being kept
+        n_before = np.concatenate(([0], np.cumsum(alive)))
+        self.bunch_bounds = n_before[self.bunch_bounds].astype(np.int32)
+
     def eliminate_lost_particles(self):
         """Eliminate lost particles from the beam coordinate arrays
         """
 
         indexalive = np.where(self.id != 0)[0]
+        self.sliced_profile = None
+        self.generation += 1
         if len(indexalive) > 0:
             self.dt = np.ascontiguousarray(
                 self.dt[indexalive], dtype=bm.precision.real_t)
             self.dE = np.ascontiguousarray(
                 self.dE[indexalive], dtype=bm.precision.real_t)
+            if self.dt_reference is not None:
+                self._compact_bunches(self.id != 0)
             self.n_macroparticles = len(self.dt)
             self.id = np.arange(1, self.n_macroparticles + 1, dtype=int)
         else:
@@ -259,32 +454,140 @@ class Beam(object):
         '''
         Calculation of the mean and standard deviation of beam coordinates,
         as well as beam emittance using different definitions.
+        The alive particles are read once by a native kernel, without copy.
         Take no arguments, statistics stored in
 
         - mean_dt
         - mean_dE
         - sigma_dt
         - sigma_dE
+        - min_dt, max_dt
+        - min_dE, max_dE
+        - epsn_rms_l
+        - n_alive_statistics, the number of alive particles
         '''
 
         # Statistics only for particles that are not flagged as lost
-        itemindex = np.where(self.id != 0)[0]
-        # itemindex = bm.where(self.id, 0)
-        self.mean_dt = bm.mean(self.dt[itemindex])
-        self.sigma_dt = bm.std(self.dt[itemindex])
-        self._sumsq_dt = np.dot(self.dt[itemindex], self.dt[itemindex])
-        # self.min_dt = np.min(self.dt[itemindex])
-        # self.max_dt = np.max(self.dt[itemindex])
+        partials = []
+        for start, stop, reference in self.bunch_ranges():
+            if stop == start:
+                continue
+            if self.compaction:
+                stats = bm.beam_statistics(self.dt[start:stop],
+                                           self.dE[start:stop])
+            else:
+                stats = bm.beam_statistics(self.dt[start:stop],
+                                           self.dE[start:stop],
+                                           self.id[start:stop])
+            # Mean, min and max of the offsets to arrival times
+            stats[[1, 3, 4]] += reference
+            partials.append(stats)
+
+        if len(partials) == 0:
+            # All the particles lost in the compaction mode
+            self._statistics = np.zeros(9)
+        elif len(partials) == 1:
+            self._statistics = partials[0]
+        else:
+            self._statistics = bm.beam_statistics_merge(partials)
+        self._set_statistics(self._statistics)
+
+    def _set_statistics(self, stats):
+        # Unpack an array returned by bm.beam_statistics
+        n_alive = stats[0]
+        self.n_alive_statistics = int(n_alive)
+        if n_alive > 0:
+            self.sigma_dt = float(np.sqrt(stats[2] / n_alive))
+            self.sigma_dE = float(np.sqrt(stats[6] / n_alive))
+        else:
+            self.sigma_dt = np.nan
+            self.sigma_dE = np.nan
+            stats = np.full(len(stats), np.nan)
+        self.mean_dt = float(stats[1])
+        self.min_dt = float(stats[3])
+        self.max_dt = float(stats[4])
+        self.mean_dE = float(stats[5])
+        self.min_dE = float(stats[7])
+        self.max_dE = float(stats[8])
+
+        # R.m.s. emittance in Gaussian approximation
+        self.epsn_rms_l = np.pi*self.sigma_dE*self.sigma_dt  # in eVs
+
+    def bunch_statistics(self, t_rf, n_bunches=None, bunch_spacing_buckets=1,
+                         bunch_buckets=None, dt_offset=0.):
+        '''
+        Calculation of the statistics of every bunch of a multi-bunch beam,
+        in a single native pass over the alive particles. Every particle is
+        assigned to the RF bucket containing its arrival time, and the
+        buckets to the bunches.
 
-        self.mean_dE = bm.mean(self.dE[itemindex])
-        self.sigma_dE = bm.std(self.dE[itemindex])
-        self._sumsq_dE = np.dot(self.dE[itemindex], self.dE[itemindex])
+        Parameters
+        ----------
+        t_rf : float
+            RF period, i.e. the bucket length [s].
+        n_bunches : int
+            number of bunches; not needed if bunch_buckets is given.
+        bunch_spacing_buckets : int
+            bunch spacing in buckets, for equally spaced bunches.
+        bunch_buckets : int array
+            bucket number of each bunch, for arbitrary filling patterns;
+            overrides n_bunches and bunch_spacing_buckets.
+        dt_offset : float
+            start time of the bucket number 0 [s].
+
+        Statistics stored in arrays of length n_bunches
+
+        - bunch_n_alive
+        - bunch_mean_dt, bunch_mean_dE
+        - bunch_sigma_dt, bunch_sigma_dE
+        - bunch_min_dt, bunch_max_dt
+        - bunch_min_dE, bunch_max_dE
+        - bunch_epsn_rms_l
+        '''
 
-        # self.min_dE = np.min(self.dE[itemindex])
-        # self.max_dE = np.max(self.dE[itemindex])
+        if bunch_buckets is None:
+            bunch_buckets = bunch_spacing_buckets * np.arange(int(n_bunches))
+        bunch_buckets = np.asarray(bunch_buckets, dtype=int)
+        bucket_to_bunch = np.full(int(np.max(bunch_buckets)) + 1, -1,
+                                  dtype=np.int32)
+        bucket_to_bunch[bunch_buckets] = np.arange(len(bunch_buckets))
+
+        partials = []
+        for start, stop, reference in self.bunch_ranges():
+            if stop == start:
+                continue
+            stats = bm.bunch_statistics(
+                self.dt[start:stop], self.dE[start:stop], t_rf,
+                bucket_to_bunch, len(bunch_buckets),
+                id=None if self.compaction else self.id[start:stop],
+                dt_offset=dt_offset - reference)
+            stats[:, [1, 3, 4]] += reference
+            partials.append(stats)
+
+        if len(partials) == 0:
+            stats = np.zeros((len(bunch_buckets), 9))
+        elif len(partials) == 1:
+            stats = partials[0]
+        else:
+            stats = np.array([bm.beam_statistics_merge(bunch_partials)
+                              for bunch_partials in zip(*partials)])
+
+        n_alive = stats[:, 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats[n_alive == 0, 1:] = np.nan
+            self.bunch_sigma_dt = np.sqrt(stats[:, 2] / n_alive)
+            self.bunch_sigma_dE = np.sqrt(stats[:, 6] / n_alive)
+        self.bunch_n_alive = n_alive.astype(int)
+        self.bunch_mean_dt = stats[:, 1]
+        self.bunch_min_dt = stats[:, 3]
+        self.bunch_max_dt = stats[:, 4]
+        self.bunch_mean_dE = stats[:, 5]
+        self.bunch_min_dE = stats[:, 7]
+        self.bunch_max_dE = stats[:, 8]
 
         # R.m.s. emittance in Gaussian approximation
-        self.epsn_rms_l = np.pi*self.sigma_dE*self.sigma_dt  # in eVs
+        self.bunch_epsn_rms_l = np.pi*self.bunch_sigma_dE * \
+            self.bunch_sigma_dt  # in eVs
 
     def losses_separatrix(self, Ring, RFStation):
         '''Beam losses based on separatrix.
@@ -300,10 +603,13 @@ class Beam(object):
         '''
 
         itemindex = np.where(is_in_separatrix(Ring, RFStation, self,
-                                              self.dt, self.dE) == False)[0]
+                                              self.absolute_dt(),
+                                              self.dE) == False)[0]
 
         if itemindex.size != 0:
             self.id[itemindex] = 0
+            if self.compaction:
+                self.compact()
 
     def losses_longitudinal_cut(self, dt_min, dt_max):
         '''Beam losses based on longitudinal cuts.
@@ -319,10 +625,13 @@ class Beam(object):
             maximum dt.
         '''
 
-        itemindex = np.where((self.dt - dt_min)*(dt_max - self.dt) < 0)[0]
+        dt = self.absolute_dt()
+        itemindex = np.where((dt - dt_min)*(dt_max - dt) < 0)[0]
 
         if itemindex.size != 0:
             self.id[itemindex] = 0
+            if self.compaction:
+                self.compact()
 
     def losses_energy_cut(self, dE_min, dE_max):
         '''Beam losses based on energy cuts, e.g. on collimators.
@@ -341,6 +650,8 @@ class Beam(object):
 
         if itemindex.size != 0:
             self.id[itemindex] = 0
+            if self.compaction:
+                self.compact()
 
     def losses_below_energy(self, dE_min):
         '''Beam losses based on lower energy cut.
@@ -357,11 +668,99 @@ class Beam(object):
 
         if itemindex.size != 0:
             self.id[itemindex] = 0
+            if self.compaction:
+                self.compact()
+
+    @property
+    def capacity(self):
+        '''Number of macro-particles that fit in the allocated memory,
+        defined as @property.
+        '''
+
+        if self._buffered():
+            return len(self._dt_buffer)
+        return len(self.dt)
+
+    def _buffered(self):
+        # True if the coordinates are views of the start of the buffers;
+        # not the case after they have been assigned directly
+        pairs = [(self.dt, self._dt_buffer), (self.dE, self._dE_buffer),
+                 (self.id, self._id_buffer)]
+        for array, buffer in pairs:
+            if buffer is None or array.base is not buffer or \
+                    array.ctypes.data != buffer.ctypes.data:
+                return False
+        return True
+
+    def reserve(self, capacity):
+        '''
+        Reserve memory for at least capacity macro-particles, so that
+        particles can be added without reallocating the coordinate arrays.
+
+        Parameters
+        ----------
+        capacity : int
+            number of macro-particles.
+        '''
+
+        n = len(self.dt)
+        capacity = max(int(capacity), n)
+        if self._buffered() and capacity <= len(self._dt_buffer):
+            return
+
+        self.generation += 1
+        self._dt_buffer = np.empty(capacity, dtype=self.dt.dtype)
+        self._dt_buffer[:n] = self.dt
+        self._dE_buffer = np.empty(capacity, dtype=self.dE.dtype)
+        self._dE_buffer[:n] = self.dE
+        self._id_buffer = np.empty(capacity, dtype=int)
+        self._id_buffer[:n] = self.id
+        self.dt = self._dt_buffer[:n]
+        self.dE = self._dE_buffer[:n]
+        self.id = self._id_buffer[:n]
+
+    def _append(self, dt, dE, ids, dt_reference=None, bunch_bounds=None):
+        # Append coordinates after the tracked particles, growing the buffers
+        # geometrically when they are full. In the compensated dt mode, dt
+        # are offsets from the references of the bunches given by
+        # dt_reference and bunch_bounds, or arrival times forming a new bunch
+        n = len(self.dt)
+        n_new = len(dt)
+        self.sliced_profile = None
+        self.generation += 1
+        if not self._buffered() or n + n_new > len(self._dt_buffer):
+            self.reserve(max(n + n_new, 2 * n))
+
+        if self.dt_reference is not None:
+            if dt_reference is None:
+                dt = np.asarray(dt, dtype=np.float64)
+                dt_reference = [0.5 * (np.min(dt) + np.max(dt))
+                                if n_new > 0 else 0.]
+                bunch_bounds = [0, n_new]
+                dt = dt - dt_reference[0]
+            self.dt_reference = np.concatenate((self.dt_reference,
+                                                dt_reference))
+            self._dt_shift = np.concatenate((self._dt_shift,
+                                             np.zeros(len(dt_reference))))
+            self.bunch_bounds = np.concatenate(
+                (self.bunch_bounds, n + np.asarray(bunch_bounds[1:]))
+            ).astype(np.int32)
+        elif dt_reference is not None:
+            dt = np.repeat(dt_reference, np.diff(bunch_bounds)) + dt
+
+        self._dt_buffer[n:n + n_new] = dt
+        self._dE_buffer[n:n + n_new] = dE
+        self._id_buffer[n:n + n_new] = ids
+        self.dt = self._dt_buffer[:n + n_new]
+        self.dE = self._dE_buffer[:n + n_new]
+        self.id = self._id_buffer[:n + n_new]
 
     def add_particles(self, new_particles):
         '''
         Method to add array of new particles to beam object
         New particles are given id numbers sequential from last id of this beam
+        The coordinates are copied into reserved memory when available, see
+        reserve().
 
         Parameters
         ----------
@@ -381,14 +780,11 @@ class Beam(object):
 
         nNew = len(newdt)
 
-        self.id = np.concatenate((self.id, np.arange(self.n_macroparticles + 1,
-                                                     self.n_macroparticles
-                                                     + nNew + 1, dtype=int)))
+        self._append(newdt, newdE,
+                     np.arange(self.n_macroparticles + 1,
+                               self.n_macroparticles + nNew + 1))
         self.n_macroparticles += nNew
 
-        self.dt = np.concatenate((self.dt, newdt))
-        self.dE = np.concatenate((self.dE, newdE))
-
     def add_beam(self, other_beam):
         '''
         Method to add the particles from another beam to this beam
@@ -403,20 +799,15 @@ class Beam(object):
         if not isinstance(other_beam, type(self)):
             raise TypeError("add_beam method requires a beam object as input")
 
-        self.dt = np.concatenate((self.dt, other_beam.dt))
-        self.dE = np.concatenate((self.dE, other_beam.dE))
-
-        counter = itl.count(self.n_macroparticles + 1)
-        newids = np.zeros(other_beam.n_macroparticles)
-
-        for i in range(other_beam.n_macroparticles):
-            if other_beam.id[i]:
-                newids[i] = next(counter)
-            else:
-                next(counter)
+        newids = np.arange(self.n_macroparticles + 1,
+                           self.n_macroparticles + len(other_beam.id) + 1)
+        newids[other_beam.id == 0] = 0
 
-        self.id = np.concatenate((self.id, newids))
+        self._append(other_beam.dt, other_beam.dE, newids,
+                     other_beam.dt_reference, other_beam.bunch_bounds)
         self.n_macroparticles += other_beam.n_macroparticles
+        if self.compaction:
+            self.compact()
 
     def __iadd__(self, other):
         '''
@@ -456,6 +847,11 @@ class Beam(object):
             raise RuntimeError(
                 'ERROR: Cannot use this routine unless in MPI Mode')
 
+        if self.dt_reference is not None:
+            # CompensatedDtError
+            raise RuntimeError("ERROR in Beam: The compensated dt mode is" +
+                               " not available with MPI")
+
         from ..utils.mpi_config import worker
         if worker.isMaster and random:
             import random
@@ -476,6 +872,8 @@ class Beam(object):
 
         self.n_macroparticles = len(self.dt)
         self.is_splitted = True
+        self.sliced_profile = None
+        self.generation += 1
 
     def gather(self, all=False):
         '''
@@ -505,16 +903,22 @@ class Beam(object):
                 self.is_splitted = False
 
         self.n_macroparticles = len(self.dt)
+        self.sliced_profile = None
+        self.generation += 1
 
     def gather_statistics(self, all=False):
         '''
         MPI ONLY ROUTINE: Gather beam statistics.
+        The partial statistics of the workers, computed by statistics(), are
+        merged exactly, weighted by the number of alive particles of each
+        worker.
 
         Parameters
         ----------
         all : boolean
             if true, all workers will gather the beam stats.
-            If false, only the master will get the beam stats.
+            If false, only the master will get the beam stats; the other
+            workers keep the statistics of their own particles.
         '''
         if not bm.mpiMode():
             raise RuntimeError(
@@ -522,75 +926,17 @@ class Beam(object):
 
         from ..utils.mpi_config import worker
         if all:
-
-            self.mean_dt = worker.allreduce(
-                np.array([self.mean_dt]), operator='mean')[0]
-
-            self.mean_dE = worker.allreduce(
-                np.array([self.mean_dE]), operator='mean')[0]
-
-            self.n_total_macroparticles_lost = worker.allreduce(
-                np.array([self.n_macroparticles_lost]), operator='sum')[0]
-
-            # self.n_total_macroparticles_alive = worker.allreduce(
-            # np.array([self.n_macroparticles_alive]), operator='sum')[0]
-
-            self.sigma_dt = worker.allreduce(
-                np.array([self._sumsq_dt]), operator='sum')[0]
-            self.sigma_dt = np.sqrt(
-                self.sigma_dt/(self.n_total_macroparticles -
-                               self.n_total_macroparticles_lost)
-                - self.mean_dt**2)
-
-            self.sigma_dE = worker.allreduce(
-                np.array([self._sumsq_dE]), operator='sum')[0]
-            self.sigma_dE = np.sqrt(
-                self.sigma_dE/(self.n_total_macroparticles -
-                               self.n_total_macroparticles_lost)
-                - self.mean_dE**2)
-
-            # self.sigma_dt = worker.allreduce(
-            #     np.array([self.mean_dt, self.sigma_dt, self.n_macroparticles_alive]),
-            #     operator='std')[0]
-
-            # self.sigma_dE = worker.allreduce(
-            #     np.array([self.mean_dE, self.sigma_dE,
-            #               self.n_macroparticles_alive]),
-            #     operator='std')[0]
-
+            partials = worker.allgather(self._statistics)
         else:
-            self.mean_dt = worker.reduce(
-                np.array([self.mean_dt]), operator='mean')[0]
-
-            self.mean_dE = worker.reduce(
-                np.array([self.mean_dE]), operator='mean')[0]
-
-            self.n_total_macroparticles_lost = worker.reduce(
-                np.array([self.n_macroparticles_lost]), operator='sum')[0]
-
-            self.sigma_dt = worker.reduce(
-                np.array([self._sumsq_dt]), operator='sum')[0]
-            self.sigma_dt = np.sqrt(
-                self.sigma_dt/(self.n_total_macroparticles -
-                               self.n_total_macroparticles_lost)
-                - self.mean_dt**2)
-
-            self.sigma_dE = worker.reduce(
-                np.array([self._sumsq_dE]), operator='sum')[0]
-            self.sigma_dE = np.sqrt(
-                self.sigma_dE/(self.n_total_macroparticles -
-                               self.n_total_macroparticles_lost)
-                - self.mean_dE**2)
-
-            # self.sigma_dt = worker.reduce(
-            #     np.array([self.mean_dt, self.sigma_dt,
-            #               self.n_macroparticles_alive]),
-            #     operator='std')[0]
-
-            # self.sigma_dE = worker.reduce(
-            #     np.array([self.mean_dE, self.sigma_dE,
-            #               self.n_macroparticles_alive]),
-            #     operator='std')[0]
+            partials = worker.gather(self._statistics)
+            if not worker.isMaster:
+                # The workers only get back their own partial statistics
+                return
+
+        stats = bm.beam_statistics_merge(partials)
+        self.n_total_macroparticles_lost = int(
+            self.n_total_macroparticles - stats[0])
+        self._set_statistics(stats)
 
     def gather_losses(self, all=False):
         '''
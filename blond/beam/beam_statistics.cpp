@@ -0,0 +1,289 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Single-pass beam statistics. The alive particles (id != 0) are read once
+// and the count, mean, sum of squared deviations, minimum and maximum of dt
+// and dE are accumulated with Welford's algorithm in double precision. The
+// partial results of the threads are merged in thread order (Chan et al.),
+// so that the result does not depend on the thread scheduling. The same
+// merge can be used to reduce the partials of several MPI ranks.
+//
+// Layout of the output array (BEAM_STATS_SIZE doubles):
+// [n_alive, mean_dt, m2_dt, min_dt, max_dt, mean_dE, m2_dE, min_dE, max_dE]
+//
+// The per-bunch statistics assign every particle to an RF bucket from its
+// arrival time and to a bunch through a bucket-to-bunch map, and fill one
+// such array per bunch in the same single pass.
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <math.h>
+#include "../cpp_routines/openmp.h"
+
+#define BEAM_STATS_SIZE 9
+
+
+struct moments {
+    double mean, m2, min, max;
+};
+
+
+static inline void moments_init(moments &m)
+{
+    m.mean = 0.;
+    m.m2 = 0.;
+    m.min = INFINITY;
+    m.max = -INFINITY;
+}
+
+
+static inline void moments_update(moments &m, const double x,
+                                  const double n)
+{
+    const double delta = x - m.mean;
+    m.mean += delta / n;
+    m.m2 += delta * (x - m.mean);
+    if (x < m.min) m.min = x;
+    if (x > m.max) m.max = x;
+}
+
+
+static inline void moments_merge(moments &a, const double n_a,
+                                 const moments &b, const double n_b)
+{
+    if (n_b == 0.)
+        return;
+    const double n = n_a + n_b;
+    const double delta = b.mean - a.mean;
+    a.mean += delta * n_b / n;
+    a.m2 += b.m2 + delta * delta * n_a * n_b / n;
+    if (b.min < a.min) a.min = b.min;
+    if (b.max > a.max) a.max = b.max;
+}
+
+
+static inline void store_stats(double * __restrict__ stats,
+                               const double count,
+                               const moments &m_dt, const moments &m_dE)
+{
+    stats[0] = count;
+    stats[1] = m_dt.mean;
+    stats[2] = m_dt.m2;
+    stats[3] = m_dt.min;
+    stats[4] = m_dt.max;
+    stats[5] = m_dE.mean;
+    stats[6] = m_dE.m2;
+    stats[7] = m_dE.min;
+    stats[8] = m_dE.max;
+}
+
+
+template <typename real_t>
+static void beam_statistics_impl(const real_t * __restrict__ dt,
+                                 const real_t * __restrict__ dE,
+                                 const int64_t * __restrict__ id,
+                                 const int n_macroparticles,
+                                 double * __restrict__ stats)
+{
+    const int max_threads = omp_get_max_threads();
+    double *counts = (double *) malloc(max_threads * sizeof(double));
+    moments *partial = (moments *) malloc(2 * max_threads * sizeof(moments));
+    for (int t = 0; t < max_threads; t++) {
+        counts[t] = 0.;
+        moments_init(partial[2 * t]);
+        moments_init(partial[2 * t + 1]);
+    }
+
+    #pragma omp parallel
+    {
+        const int t = omp_get_thread_num();
+        double count = 0.;
+        moments m_dt, m_dE;
+        moments_init(m_dt);
+        moments_init(m_dE);
+
+        #pragma omp for schedule(static)
+        for (int i = 0; i < n_macroparticles; i++) {
+            if (id != NULL && id[i] == 0)
+                continue;
+            count += 1.;
+            moments_update(m_dt, dt[i], count);
+            moments_update(m_dE, dE[i], count);
+        }
+
+        counts[t] = count;
+        partial[2 * t] = m_dt;
+        partial[2 * t + 1] = m_dE;
+    }
+
+    double count = 0.;
+    moments m_dt, m_dE;
+    moments_init(m_dt);
+    moments_init(m_dE);
+    for (int t = 0; t < max_threads; t++) {
+        moments_merge(m_dt, count, partial[2 * t], counts[t]);
+        moments_merge(m_dE, count, partial[2 * t + 1], counts[t]);
+        count += counts[t];
+    }
+
+    store_stats(stats, count, m_dt, m_dE);
+
+    free(counts);
+    free(partial);
+}
+
+
+extern "C" void beam_statistics(const double * __restrict__ dt,
+                                const double * __restrict__ dE,
+                                const int64_t * __restrict__ id,
+                                const int n_macroparticles,
+                                double * __restrict__ stats)
+{
+    beam_statistics_impl<double>(dt, dE, id, n_macroparticles, stats);
+}
+
+
+extern "C" void beam_statisticsf(const float * __restrict__ dt,
+                                 const float * __restrict__ dE,
+                                 const int64_t * __restrict__ id,
+                                 const int n_macroparticles,
+                                 double * __restrict__ stats)
+{
+    beam_statistics_impl<float>(dt, dE, id, n_macroparticles, stats);
+}
+
+
+template <typename real_t>
+static void bunch_statistics_impl(const real_t * __restrict__ dt,
+                                  const real_t * __restrict__ dE,
+                                  const int64_t * __restrict__ id,
+                                  const int n_macroparticles,
+                                  const double t_rf,
+                                  const double dt_offset,
+                                  const int * __restrict__ bucket_to_bunch,
+                                  const int n_buckets,
+                                  const int n_bunches,
+                                  double * __restrict__ stats)
+{
+    const double inv_t_rf = 1. / t_rf;
+    const int max_threads = omp_get_max_threads();
+    // Per thread: n_bunches counts, then 2 * n_bunches moments
+    double *counts = (double *) malloc(max_threads * n_bunches
+                                       * sizeof(double));
+    moments *partial = (moments *) malloc(2 * max_threads * n_bunches
+                                          * sizeof(moments));
+
+    #pragma omp parallel
+    {
+        const int t = omp_get_thread_num();
+        double *count = counts + t * n_bunches;
+        moments *m_dt = partial + 2 * t * n_bunches;
+        moments *m_dE = m_dt + n_bunches;
+        for (int b = 0; b < n_bunches; b++) {
+            count[b] = 0.;
+            moments_init(m_dt[b]);
+            moments_init(m_dE[b]);
+        }
+
+        #pragma omp for schedule(static)
+        for (int i = 0; i < n_macroparticles; i++) {
+            if (id != NULL && id[i] == 0)
+                continue;
+            const double bucket = floor((dt[i] - dt_offset) * inv_t_rf);
+            if (!(bucket >= 0.) || bucket >= n_buckets)
+                continue;
+            const int b = bucket_to_bunch[(int) bucket];
+            if (b < 0)
+                continue;
+            count[b] += 1.;
+            moments_update(m_dt[b], dt[i], count[b]);
+            moments_update(m_dE[b], dE[i], count[b]);
+        }
+
+        // Merge the threads in thread order, each thread a range of bunches
+        const int threads = omp_get_num_threads();
+        #pragma omp for schedule(static)
+        for (int b = 0; b < n_bunches; b++) {
+            double total = 0.;
+            moments b_dt, b_dE;
+            moments_init(b_dt);
+            moments_init(b_dE);
+            for (int u = 0; u < threads; u++) {
+                const double n_u = counts[u * n_bunches + b];
+                moments_merge(b_dt, total,
+                              partial[2 * u * n_bunches + b], n_u);
+                moments_merge(b_dE, total,
+                              partial[(2 * u + 1) * n_bunches + b], n_u);
+                total += n_u;
+            }
+            store_stats(stats + b * BEAM_STATS_SIZE, total, b_dt, b_dE);
+        }
+    }
+
+    free(counts);
+    free(partial);
+}
+
+
+extern "C" void bunch_statistics(const double * __restrict__ dt,
+                                 const double * __restrict__ dE,
+                                 const int64_t * __restrict__ id,
+                                 const int n_macroparticles,
+                                 const double t_rf,
+                                 const double dt_offset,
+                                 const int * __restrict__ bucket_to_bunch,
+                                 const int n_buckets,
+                                 const int n_bunches,
+                                 double * __restrict__ stats)
+{
+    bunch_statistics_impl<double>(dt, dE, id, n_macroparticles, t_rf,
+                                  dt_offset, bucket_to_bunch, n_buckets,
+                                  n_bunches, stats);
+}
+
+
+extern "C" void bunch_statisticsf(const float * __restrict__ dt,
+                                  const float * __restrict__ dE,
+                                  const int64_t * __restrict__ id,
+                                  const int n_macroparticles,
+                                  const double t_rf,
+                                  const double dt_offset,
+                                  const int * __restrict__ bucket_to_bunch,
+                                  const int n_buckets,
+                                  const int n_bunches,
+                                  double * __restrict__ stats)
+{
+    bunch_statistics_impl<float>(dt, dE, id, n_macroparticles, t_rf,
+                                 dt_offset, bucket_to_bunch, n_buckets,
+                                 n_bunches, stats);
+}
+
+
+// Merge the statistics arrays of n_partials workers (e.g. MPI ranks),
+// stored one after the other in partials, into stats.
+extern "C" void beam_statistics_merge(const double * __restrict__ partials,
+                                      const int n_partials,
+                                      double * __restrict__ stats)
+{
+    double count = 0.;
+    moments m_dt, m_dE;
+    moments_init(m_dt);
+    moments_init(m_dE);
+    for (int k = 0; k < n_partials; k++) {
+        const double *p = partials + k * BEAM_STATS_SIZE;
+        const moments p_dt = {p[1], p[2], p[3], p[4]};
+        const moments p_dE = {p[5], p[6], p[7], p[8]};
+        moments_merge(m_dt, count, p_dt, p[0]);
+        moments_merge(m_dE, count, p_dE, p[0]);
+        count += p[0];
+    }
+
+    store_stats(stats, count, m_dt, m_dE);
+}
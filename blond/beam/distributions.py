@@ -716,18 +716,23 @@ def populate_bunch(beam, time_grid, deltaE_grid, density_grid, time_step,
     *Method to populate the bunch using a random number generator from the
     particle density in phase space.*
     '''
-    # Initialise the random number generator
-    np.random.seed(seed=seed)
+    # Random seed from the system entropy if not given
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
     # Generating particles randomly inside the grid cells according to the
-    # provided density_grid
-    indexes = np.random.choice(np.arange(0,np.size(density_grid)), 
-                               beam.n_macroparticles, p=density_grid.flatten())
+    # provided density_grid, by inversion of its cumulative distribution
+    # with the counter-based random number generator
+    cumulative_density = np.cumsum(density_grid.flatten())
+    indexes = np.searchsorted(cumulative_density,
+                              bm.random_uniform(beam.n_macroparticles, seed, stream=0)
+                              * cumulative_density[-1], side='right')
+    indexes = np.minimum(indexes, np.size(density_grid) - 1)
     
     # Randomize particles inside each grid cell (uniform distribution)
     beam.dt = (np.ascontiguousarray(time_grid.flatten()[indexes] +
-                                    (np.random.rand(beam.n_macroparticles) - 0.5) * time_step)).astype(dtype=bm.precision.real_t, order='C', copy=False)
+                                    (bm.random_uniform(beam.n_macroparticles, seed, stream=1) - 0.5) * time_step)).astype(dtype=bm.precision.real_t, order='C', copy=False)
     beam.dE = (np.ascontiguousarray(deltaE_grid.flatten()[indexes] +
-                                    (np.random.rand(beam.n_macroparticles) - 0.5) * deltaE_step)).astype(dtype=bm.precision.real_t, order='C', copy=False)
+                                    (bm.random_uniform(beam.n_macroparticles, seed, stream=2) - 0.5) * deltaE_step)).astype(dtype=bm.precision.real_t, order='C', copy=False)
 
 def distribution_function(action_array, dist_type, length, exponent=None):
     '''
@@ -860,26 +865,30 @@ def bigaussian(Ring, RFStation, Beam, sigma_dt, sigma_dE = None, seed = 1234,
     Beam.sigma_dt = sigma_dt
     Beam.sigma_dE = sigma_dE
     
-    # Generate coordinates. For reproducibility, a separate random number stream is used for dt and dE
-    rng_dt = np.random.default_rng(seed)
-    rng_dE = np.random.default_rng(seed+1)
-    
-    Beam.dt = sigma_dt * rng_dt.normal(size=Beam.n_macroparticles).astype(dtype=bm.precision.real_t, order='C', copy=False) + \
+    # Generate coordinates. For reproducibility, a separate random number stream is used for dt and dE;
+    # the counter-based generator gives the same coordinates for any number of threads
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    Beam.dt = sigma_dt * bm.random_normal(Beam.n_macroparticles, seed, stream=0) + \
         (phi_s - phi_rf)/omega_rf
-    Beam.dE = sigma_dE * rng_dE.normal(size=Beam.n_macroparticles).astype(dtype=bm.precision.real_t, order='C')
+    Beam.dE = sigma_dE * bm.random_normal(Beam.n_macroparticles, seed, stream=1)
     
-    # Re-insert if necessary
+    # Re-insert if necessary, with a new counter of the random streams for each pass
     if reinsertion == True:
         
         itemindex = np.where(is_in_separatrix(Ring, 
             RFStation, Beam, Beam.dt, Beam.dE) == False)[0]
+        reinsertion_pass = 0
          
         while itemindex.size != 0:
             
-            Beam.dt[itemindex] = sigma_dt * rng_dt.normal(size=itemindex.size).astype(dtype=bm.precision.real_t, order='C', copy=False) \
+            reinsertion_pass += 1
+            Beam.dt[itemindex] = sigma_dt * bm.random_normal(itemindex.size, seed, stream=0,
+                                                             counter=reinsertion_pass) \
                 + (phi_s - phi_rf)/omega_rf
             
-            Beam.dE[itemindex] = sigma_dE * rng_dE.normal(size=itemindex.size).astype(dtype=bm.precision.real_t, order='C')
+            Beam.dE[itemindex] = sigma_dE * bm.random_normal(itemindex.size, seed, stream=1,
+                                                             counter=reinsertion_pass)
             
             itemindex = np.where(is_in_separatrix(Ring,
                                                   RFStation, Beam, Beam.dt, Beam.dE) == False)[0]
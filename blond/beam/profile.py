@@ -129,13 +129,13 @@ class CutOptions(object):
         if self.cut_left is None and self.cut_right is None:
 
             if self.n_sigma is None:
-                dt_min = Beam.dt.min()
-                dt_max = Beam.dt.max()
+                dt_min = Beam.absolute_dt().min()
+                dt_max = Beam.absolute_dt().max()
                 self.cut_left = dt_min - 0.05 * (dt_max - dt_min)
                 self.cut_right = dt_max + 0.05 * (dt_max - dt_min)
             else:
-                mean_coords = np.mean(Beam.dt)
-                sigma_coords = np.std(Beam.dt)
+                mean_coords = np.mean(Beam.absolute_dt())
+                sigma_coords = np.std(Beam.absolute_dt())
                 self.cut_left = mean_coords - self.n_sigma*sigma_coords/2
                 self.cut_right = mean_coords + self.n_sigma*sigma_coords/2
 
@@ -269,22 +269,45 @@ class OtherSlicesOptions(object):
         If set True, the profile is calculated when the Profile class below
         is created. If False the user has to manually track the Profile object
         in the main file after its creation
+    bin_cache : boolean
+        If set True, the standard slicing stores the bin of every
+        macroparticle and its position inside the bin, which the interpolated
+        kick of the RingAndRFTracker then reuses instead of recomputing them
+        from the beam coordinates. The arrival times must not change between
+        the slicing and the kick.
+    deposition : str
+        Charge assignment used by the slicing: 'ngp' (nearest grid point,
+        the standard histogram), 'cic' (cloud-in-cell, every macroparticle
+        shared linearly between the two nearest bin centers) or 'tsc'
+        (triangular-shaped cloud, shared quadratically between the three
+        nearest bin centers). The higher orders give smoother profiles for
+        the same number of macroparticles. With 'tsc', the interpolated kick
+        of the RingAndRFTracker uses the matching quadratic interpolation;
+        the linear interpolation is already the gather matching 'cic'.
 
     Attributes
     ----------
 
     smooth : boolean
     direct_slicing : boolean
+    bin_cache : boolean
+    deposition : str
 
     """
 
-    def __init__(self, smooth=False, direct_slicing=False):
+    def __init__(self, smooth=False, direct_slicing=False, bin_cache=False,
+                 deposition='ngp'):
         """
         Constructor
         """
 
+        if deposition not in ['ngp', 'cic', 'tsc']:
+            raise RuntimeError('deposition should be "ngp", "cic" or "tsc"')
+
         self.smooth = smooth
         self.direct_slicing = direct_slicing
+        self.bin_cache = bin_cache
+        self.deposition = deposition
 
 
 class Profile(object):
@@ -330,12 +353,34 @@ class Profile(object):
         contains the histogram (or profile); its elements are real if the
         smooth histogram tracking is used
     beam_spectrum : float array
-        contains the spectrum of the beam (arb. units)
+        contains the spectrum of the beam (arb. units), the last one
+        computed or requested from get_beam_spectrum
     beam_spectrum_freq : float array
         contains the frequencies on which the spectrum is computed [Hz]
+    spectrum_stamp : int
+        stamp of the profile the shared beam spectra were computed from,
+        incremented every time a spectrum is requested after the profile has
+        changed
     operations : list
         contains all the methods to be called every turn, like slice track,
         fitting, filtering etc.
+    bin_index : int32 array
+        bin of every macroparticle at the last slicing, -1 outside the
+        profile; only with the bin_cache option
+    bin_fraction : float32 array
+        position of every macroparticle inside its bin, as a fraction of
+        bin_size; only with the bin_cache option
+    bin_cache_filled : bool
+        True if bin_index and bin_fraction match the current arrival times;
+        reset once they have been used by the interpolated kick
+    bin_cache_generation : int
+        generation of the Beam when bin_index and bin_fraction were filled,
+        see Beam.generation
+    deposition : str
+        charge assignment of the slicing, 'ngp', 'cic' or 'tsc'
+    fit_multibunch_parameters : float array
+        Gaussian fit parameters [A, x0, sigma] of every bunch from
+        gaussian_fit_multibunch, also used as initial guess of the next fit
     bunchPosition : float
         profile position [s]
     bunchLength : float
@@ -392,8 +437,30 @@ class Profile(object):
         self.beam_spectrum = np.array([], dtype=bm.precision.real_t, order='C')
         self.beam_spectrum_freq = np.array([], dtype=bm.precision.real_t, order='C')
 
+        # Beam spectra shared by all the consumers, {n_sampling_fft:
+        # [stamp, spectrum]}, and copy of the profile they were computed from
+        self.spectrum_stamp = 0
+        self._spectrum_cache = {}
+        self._spectrum_profile = None
+
+        # Per-particle bins of the last slicing, reused by the interpolated
+        # kick
+        self.bin_cache = bool(OtherSlicesOptions.bin_cache)
+        self.bin_index = np.zeros(0, dtype=np.int32)
+        self.bin_fraction = np.zeros(0, dtype=np.float32)
+        self.bin_cache_filled = False
+        self.bin_cache_generation = -1
+
+        self.deposition = OtherSlicesOptions.deposition
+
+        # Gaussian fit parameters [A, x0, sigma] of every bunch, from the
+        # last call of gaussian_fit_multibunch
+        self.fit_multibunch_parameters = None
+
         if OtherSlicesOptions.smooth:
             self.operations = [self._slice_smooth]
+        elif self.deposition != 'ngp':
+            self.operations = [self._slice_deposit]
         else:
             self.operations = [self._slice]
 
@@ -416,10 +483,23 @@ class Profile(object):
             self.track()
 
     def set_slices_parameters(self):
+        self.bin_cache_filled = False
+        if self.sliced_in_drift:
+            self.Beam.sliced_profile = None
         self.n_slices, self.cut_left, self.cut_right, self.n_sigma, \
             self.edges, self.bin_centers, self.bin_size = \
             self.cut_options.get_slices_parameters()
 
+    @property
+    def sliced_in_drift(self):
+        """
+        True if a RingAndRFTracker has already computed the histogram while
+        drifting the beam (slice_in_drift option), and the arrival times
+        have not changed since.
+        """
+        return self.Beam is not None and \
+            getattr(self.Beam, 'sliced_profile', None) is self
+
     def track(self):
         """
         Track method in order to update the slicing along with the tracker.
@@ -432,14 +512,53 @@ class Profile(object):
 
     def _slice(self):
         """
-        Constant space slicing with a constant frame.
-        """
-        bm.slice(self.Beam.dt, self.n_macroparticles, self.cut_left,
-                 self.cut_right)
+        Constant space slicing with a constant frame. The histogram is not
+        recomputed if it has already been filled during the drift.
+        """
+        if self.sliced_in_drift:
+            self.Beam.sliced_profile = None
+            self.bin_cache_filled = False
+        elif len(self.Beam.dt) == 0:
+            # All the particles lost in the compaction mode of the Beam
+            self.n_macroparticles[:] = 0
+            self.bin_cache_filled = False
+        elif self.bin_cache:
+            if len(self.bin_index) != len(self.Beam.dt):
+                self.bin_index = np.empty(len(self.Beam.dt), dtype=np.int32)
+                self.bin_fraction = np.empty(len(self.Beam.dt),
+                                             dtype=np.float32)
+            self._slice_bunches(bm.slice_n_cache, self.bin_index,
+                                self.bin_fraction)
+            self.bin_cache_filled = True
+            self.bin_cache_generation = self.Beam.generation
+        else:
+            self._slice_bunches(bm.slice)
 
         if bm.mpiMode():
             self.reduce_histo()
 
+    def _slice_bunches(self, slice_function, *particle_arrays):
+        """
+        Histogram of the Beam computed by slice_function and summed over the
+        bunches of the Beam, whose arrival times are offsets from a reference
+        time in the compensated dt mode, see Beam.bunch_ranges(). The
+        per-particle outputs of slice_function are filled bunch by bunch.
+        """
+        ranges = [bunch_range for bunch_range in self.Beam.bunch_ranges()
+                  if bunch_range[1] > bunch_range[0]]
+        for bunch, (start, stop, reference) in enumerate(ranges):
+            # The first bunch fills the histogram, the others are added to it
+            if bunch == 0:
+                histogram = self.n_macroparticles
+            else:
+                histogram = np.empty_like(self.n_macroparticles)
+            slice_function(self.Beam.dt[start:stop], histogram,
+                           self.cut_left - reference,
+                           self.cut_right - reference,
+                           *[array[start:stop] for array in particle_arrays])
+            if bunch > 0:
+                self.n_macroparticles += histogram
+
     def reduce_histo(self, dtype=np.uint32):
         if not bm.mpiMode():
             raise RuntimeError(
@@ -470,8 +589,25 @@ class Profile(object):
         """
         At the moment 4x slower than _slice but smoother (filtered).
         """
-        bm.slice_smooth(self.Beam.dt, self.n_macroparticles, self.cut_left,
-                        self.cut_right)
+        if len(self.Beam.dt) == 0:
+            self.n_macroparticles[:] = 0
+        else:
+            self._slice_bunches(bm.slice_smooth)
+
+        if bm.mpiMode():
+            self.reduce_histo(dtype=np.float64)
+
+    def _slice_deposit(self):
+        """
+        Constant space slicing with the cloud-in-cell or triangular-shaped
+        cloud charge assignment; the profile is real valued.
+        """
+        if len(self.Beam.dt) == 0:
+            self.n_macroparticles[:] = 0
+        elif self.deposition == 'cic':
+            self._slice_bunches(bm.slice_cic)
+        else:
+            self._slice_bunches(bm.slice_tsc)
 
         if bm.mpiMode():
             self.reduce_histo(dtype=np.float64)
@@ -482,17 +618,36 @@ class Profile(object):
         """
 
         if self.bunchLength == 0:
-            p0 = [max(self.n_macroparticles), np.mean(self.Beam.dt),
-                  np.std(self.Beam.dt)]
+            p0 = [max(self.n_macroparticles),
+                  np.mean(self.Beam.absolute_dt()),
+                  np.std(self.Beam.absolute_dt())]
         else:
             p0 = [max(self.n_macroparticles), self.bunchPosition,
                   self.bunchLength/4]
 
-        self.fitExtraOptions = ffroutines.gaussian_fit(self.n_macroparticles,
-                                                       self.bin_centers, p0)
+        self.fitExtraOptions = ffroutines.gaussian_fit_batch(
+            self.n_macroparticles, self.bin_centers, [0], [self.n_slices],
+            p0)[0]
         self.bunchPosition = self.fitExtraOptions[1]
         self.bunchLength = 4*self.fitExtraOptions[2]
 
+    def gaussian_fit_multibunch(self, n_bunches, bunch_spacing_buckets,
+                                bucket_size_tau, bucket_tolerance=0.40):
+        """
+        Gaussian fit of all the bunches in one call; the fits start from the
+        parameters of the previous call.
+        """
+
+        p0 = self.fit_multibunch_parameters
+        if p0 is not None and len(p0) != n_bunches:
+            p0 = None
+
+        self.fit_multibunch_parameters = ffroutines.gaussian_fit_multibunch(
+            self.n_macroparticles, self.bin_centers, n_bunches,
+            bunch_spacing_buckets, bucket_size_tau, bucket_tolerance, p0)
+        self.bunchPosition = self.fit_multibunch_parameters[:, 1]
+        self.bunchLength = 4*self.fit_multibunch_parameters[:, 2]
+
     def apply_filter(self):
         """
         It applies Chebishev filter to the profile.
@@ -551,7 +706,46 @@ class Profile(object):
         Beam spectrum calculation
         """
 
-        self.beam_spectrum = bm.rfft(self.n_macroparticles, n_sampling_fft)
+        self.beam_spectrum = self.get_beam_spectrum(n_sampling_fft)
+
+    def get_beam_spectrum(self, n_sampling_fft):
+        """
+        Beam spectrum for n_sampling_fft points, shared by all the consumers
+        of the profile. Every spectrum is computed at most once per profile
+        (i.e. once per turn) into a preallocated buffer, reusing the cached
+        FFTW plan of its size with bm.use_fftw(). The returned array is
+        overwritten at the next change of the profile and must not be
+        modified. It is also stored in beam_spectrum.
+        """
+
+        # The profile can also be changed outside of track (e.g. while
+        # matching with intensity effects), so it is compared with the copy
+        # of the last one rather than relying on a turn counter
+        if (self._spectrum_profile is None
+                or self._spectrum_profile.shape != self.n_macroparticles.shape
+                or not np.array_equal(self._spectrum_profile,
+                                      self.n_macroparticles)):
+            self._spectrum_profile = np.array(self.n_macroparticles)
+            self.spectrum_stamp += 1
+
+        n_sampling_fft = int(n_sampling_fft)
+        entry = self._spectrum_cache.get(n_sampling_fft)
+        if entry is not None and entry[0] == self.spectrum_stamp:
+            self.beam_spectrum = entry[1]
+            return entry[1]
+
+        if bm.rfft is bm.butils_wrap.rfft:
+            if entry is None or entry[1].dtype != bm.precision.complex_t:
+                entry = [0, np.empty(n_sampling_fft // 2 + 1, order='C',
+                                     dtype=bm.precision.complex_t)]
+            bm.rfft(self.n_macroparticles, n_sampling_fft, result=entry[1])
+        else:
+            entry = [0, bm.rfft(self.n_macroparticles, n_sampling_fft)]
+
+        entry[0] = self.spectrum_stamp
+        self._spectrum_cache[n_sampling_fft] = entry
+        self.beam_spectrum = entry[1]
+        return entry[1]
 
     def beam_profile_derivative(self, mode='gradient'):
         """
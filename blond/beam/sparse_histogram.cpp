@@ -16,141 +16,73 @@ Project website: http://blond.web.cern.ch/
 #include <stdlib.h>     // mmalloc()
 #include <math.h>
 #include "../cpp_routines/openmp.h"
+#include "../cpp_routines/histogram.h"
 
-extern "C" void sparse_histogram(const double * __restrict__ input,
-                double * __restrict__ output,
-               const double * __restrict__ cut_left_array,
-               const double * __restrict__ cut_right_array,
-               const double * __restrict__ bunch_indexes,
-               const int n_slices_bucket,
-               const int n_filled_buckets,
-               const int n_macroparticles){
-	
-    int i;
-    int j;
-    int i_bucket;
-    double a;
-    double fbin;
-    double fbunch;
-    int ffbin;
-    int ffbunch;
-    
+template <typename real_t>
+static void sparse_histogram_impl(const real_t * __restrict__ input,
+                                  real_t * __restrict__ output,
+                                  const real_t * __restrict__ cut_left_array,
+                                  const real_t * __restrict__ cut_right_array,
+                                  const real_t * __restrict__ bunch_indexes,
+                                  const int n_slices_bucket,
+                                  const int n_filled_buckets,
+                                  const int n_macroparticles)
+{
     // Only valid for cut_edges = edges
-    const double inv_bucket_length = 1.0 / (cut_right_array[0] - cut_left_array[0]);
-    const double inv_bin_width = inv_bucket_length * (double) n_slices_bucket;
-    
-    // allocate memory for the thread_private histogram
-    double **histo = (double **) malloc(omp_get_max_threads() * sizeof(double *));
-    histo[0] = (double *) malloc (omp_get_max_threads() * n_filled_buckets * n_slices_bucket * sizeof(double));
-    for (int i = 0; i < omp_get_max_threads(); i++)
-        histo[i] = (*histo + n_filled_buckets * n_slices_bucket * i);
-
+    const real_t inv_bucket_length = 1.0 / (cut_right_array[0] - cut_left_array[0]);
+    const real_t inv_bin_width = inv_bucket_length * (real_t) n_slices_bucket;
 
-    #pragma omp parallel
-    {
-        const int id = omp_get_thread_num();
-        const int threads = omp_get_num_threads();
-        memset(histo[id], 0., n_filled_buckets * n_slices_bucket * sizeof(double));
-    
-        // Histogram loop
-        #pragma omp for
-        for (j = 0; j < n_macroparticles; j++){
-            a = input[j];   // Particle dt
+    auto bin_block = [=](const int i, const int loop_count, int *bins) {
+        for (int j = 0; j < loop_count; j++) {
+            const real_t a = input[i + j];   // Particle dt
+            bins[j] = -1;
             if ((a < cut_left_array[0])||(a > cut_right_array[n_filled_buckets-1]))
                 continue;
             // Find bucket in which the particle is and its index
-            fbunch = (a - cut_left_array[0]) * inv_bucket_length;
-            ffbunch = (int) fbunch;
-            i_bucket = (int) bunch_indexes[ffbunch];
+            const int ffbunch = (int) ((a - cut_left_array[0]) * inv_bucket_length);
+            const int i_bucket = (int) bunch_indexes[ffbunch];
             if (i_bucket == -1)
                 continue;
             // Find the bin inside the corresponding bucket
-            fbin = (a - cut_left_array[i_bucket]) * inv_bin_width;
-            ffbin = i_bucket*n_slices_bucket + (int) fbin;
-            histo[id][ffbin] += 1.0;
-        }
-        
-        // Reduce to a single histogram
-        #pragma omp for
-        for (int i = 0; i < n_filled_buckets * n_slices_bucket; i++) {
-            output[i] = 0.;
-            for (int t = 0; t < threads; t++)
-                output[i] += histo[t][i];
+            const real_t fbin = (a - cut_left_array[i_bucket]) * inv_bin_width;
+            bins[j] = i_bucket*n_slices_bucket + (int) fbin;
         }
+    };
 
-    }
-    
-    // free memory
-    free(histo[0]);
-    free(histo);
+    // The histograms of all the buckets are stored one after the other
+    histogram_engine<real_t>(bin_block, output,
+                             n_filled_buckets * n_slices_bucket,
+                             n_macroparticles, HISTOGRAM_AUTO);
 }
 
 
-extern "C" void sparse_histogramf(const float * __restrict__ input,
-            float * __restrict__ output,
-               const float * __restrict__ cut_left_array,
-               const float * __restrict__ cut_right_array,
-               const float * __restrict__ bunch_indexes,
-               const int n_slices_bucket,
-               const int n_filled_buckets,
-               const int n_macroparticles){
-    
-    int i;
-    int j;
-    int i_bucket;
-    float a;
-    float fbin;
-    float fbunch;
-    int ffbin;
-    int ffbunch;
-    
-    // Only valid for cut_edges = edges
-    const float inv_bucket_length = 1.0 / (cut_right_array[0] - cut_left_array[0]);
-    const float inv_bin_width = inv_bucket_length * (float) n_slices_bucket;
-    
-    // allocate memory for the thread_private histogram
-    float **histo = (float **) malloc(omp_get_max_threads() * sizeof(float *));
-    histo[0] = (float *) malloc (omp_get_max_threads() * n_filled_buckets * n_slices_bucket * sizeof(float));
-    for (int i = 0; i < omp_get_max_threads(); i++)
-        histo[i] = (*histo + n_filled_buckets * n_slices_bucket * i);
-
-
-    #pragma omp parallel
-    {
+extern "C" void sparse_histogram(const double * __restrict__ input,
+                                 double * __restrict__ output,
+                                 const double * __restrict__ cut_left_array,
+                                 const double * __restrict__ cut_right_array,
+                                 const double * __restrict__ bunch_indexes,
+                                 const int n_slices_bucket,
+                                 const int n_filled_buckets,
+                                 const int n_macroparticles)
+{
+    sparse_histogram_impl<double>(input, output, cut_left_array,
+                                  cut_right_array, bunch_indexes,
+                                  n_slices_bucket, n_filled_buckets,
+                                  n_macroparticles);
+}
 
-        const int id = omp_get_thread_num();
-        const int threads = omp_get_num_threads();
-        memset(histo[id], 0., n_filled_buckets * n_slices_bucket * sizeof(float));
-    
-        // Histogram loop
-        #pragma omp for
-        for (j = 0; j < n_macroparticles; j++){
-            a = input[j];   // Particle dt
-            if ((a < cut_left_array[0])||(a > cut_right_array[n_filled_buckets-1]))
-                continue;
-            // Find bucket in which the particle is and its index
-            fbunch = (a - cut_left_array[0]) * inv_bucket_length;
-            ffbunch = (int) fbunch;
-            i_bucket = (int) bunch_indexes[ffbunch];
-            if (i_bucket == -1)
-                continue;
-            // Find the bin inside the corresponding bucket
-            fbin = (a - cut_left_array[i_bucket]) * inv_bin_width;
-            ffbin = i_bucket*n_slices_bucket + (int) fbin;
-            histo[id][ffbin] += 1.0;
-        }
-        
-        // Reduce to a single histogram
-        #pragma omp for
-        for (int i = 0; i < n_filled_buckets * n_slices_bucket; i++) {
-            output[i] = 0.;
-            for (int t = 0; t < threads; t++)
-                output[i] += histo[t][i];
-        }
 
-    }
-    
-    // free memory
-    free(histo[0]);
-    free(histo);
+extern "C" void sparse_histogramf(const float * __restrict__ input,
+                                  float * __restrict__ output,
+                                  const float * __restrict__ cut_left_array,
+                                  const float * __restrict__ cut_right_array,
+                                  const float * __restrict__ bunch_indexes,
+                                  const int n_slices_bucket,
+                                  const int n_filled_buckets,
+                                  const int n_macroparticles)
+{
+    sparse_histogram_impl<float>(input, output, cut_left_array,
+                                 cut_right_array, bunch_indexes,
+                                 n_slices_bucket, n_filled_buckets,
+                                 n_macroparticles);
 }
@@ -83,6 +83,8 @@ cflags = ['-O3', '-ffast-math', '-std=c++11', '-shared']
 cpp_files = [
     os.path.join(basepath, 'cpp_routines/kick.cpp'),
     os.path.join(basepath, 'cpp_routines/drift.cpp'),
+    os.path.join(basepath, 'cpp_routines/kick_drift.cpp'),
+    os.path.join(basepath, 'cpp_routines/random.cpp'),
     os.path.join(basepath, 'cpp_routines/linear_interp_kick.cpp'),
     os.path.join(basepath, 'cpp_routines/histogram.cpp'),
     os.path.join(basepath, 'cpp_routines/music_track.cpp'),
@@ -92,8 +94,10 @@ cpp_files = [
     os.path.join(basepath, 'cpp_routines/fft.cpp'),
     os.path.join(basepath, 'cpp_routines/openmp.cpp'),
     os.path.join(basepath, 'toolbox/tomoscope.cpp'),
+    os.path.join(basepath, 'toolbox/fitting.cpp'),
     os.path.join(basepath, 'synchrotron_radiation/synchrotron_radiation.cpp'),
     os.path.join(basepath, 'beam/sparse_histogram.cpp'),
+    os.path.join(basepath, 'beam/beam_statistics.cpp'),
 ]
 
 
@@ -257,14 +257,13 @@ extern "C" {
 
         #pragma omp parallel for
         for (int n = 0; n < size; ++n) {
-            res[n] = 0;
             const int kmin = (n >= KernelLen - 1) ? n - (KernelLen - 1) : 0;
             const int kmax = (n < SignalLen - 1) ? n : SignalLen - 1;
-            // uint j = n - kmin;
-            for (int k = kmin; k <= kmax; k++) {
-                res[n] += signal[k] * kernel[n - k];
-                //--j;
-            }
+            // Local accumulator, so that the loop is vectorized
+            double sum = 0;
+            for (int k = kmin; k <= kmax; k++)
+                sum += signal[k] * kernel[n - k];
+            res[n] = sum;
         }
     }
 
@@ -279,14 +278,13 @@ extern "C" {
 
         #pragma omp parallel for
         for (int n = 0; n < size; ++n) {
-            res[n] = 0;
             const int kmin = (n >= KernelLen - 1) ? n - (KernelLen - 1) : 0;
             const int kmax = (n < SignalLen - 1) ? n : SignalLen - 1;
-            // uint j = n - kmin;
-            for (int k = kmin; k <= kmax; k++) {
-                res[n] += signal[k] * kernel[n - k];
-                //--j;
-            }
+            // Local accumulator, so that the loop is vectorized
+            float sum = 0;
+            for (int k = kmin; k <= kmax; k++)
+                sum += signal[k] * kernel[n - k];
+            res[n] = sum;
         }
     }
 
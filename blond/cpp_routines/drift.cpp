@@ -17,6 +17,7 @@ Project website: http://blond.web.cern.ch/
 
 #include <string.h>
 #include <math.h>
+#include "drift.h"
 
 extern "C" void drift(double * __restrict__ beam_dt,
                       const double * __restrict__ beam_dE,
@@ -159,3 +160,68 @@ extern "C" void driftf(float * __restrict__ beam_dt,
 
 }
 
+
+
+// Drift of single-precision arrival times stored as offsets beam_dt from the
+// double-precision reference dt_reference[b] of their bunch (see
+// kick_compensatedf). The drift is computed and accumulated in double
+// precision on the offsets, which stay small, so that the drifts of each
+// turn are not lost in the rounding. The reference of every bunch is moved
+// by dt_shift[b] in the same pass, and dt_shift[b] is set to the middle of
+// the new offsets, to be applied at the next call.
+extern "C" void drift_compensatedf(float * __restrict__ beam_dt,
+                                   const float * __restrict__ beam_dE,
+                                   double * __restrict__ dt_reference,
+                                   const int * __restrict__ bunch_bounds,
+                                   double * __restrict__ dt_shift,
+                                   const int n_bunches,
+                                   const char * __restrict__ solver,
+                                   const double T0, const double length_ratio,
+                                   const double alpha_order,
+                                   const double eta_zero,
+                                   const double eta_one,
+                                   const double eta_two,
+                                   const double alpha_zero,
+                                   const double alpha_one,
+                                   const double alpha_two,
+                                   const double beta, const double energy)
+{
+    const int STEP = 64;
+    const drift_params<double> drift = make_drift_params<double>(
+        drift_solver_id(solver), T0, length_ratio, alpha_order,
+        eta_zero, eta_one, eta_two, alpha_zero, alpha_one, alpha_two,
+        beta, energy);
+
+    for (int b = 0; b < n_bunches; b++) {
+        const int first = bunch_bounds[b];
+        const int last = bunch_bounds[b + 1];
+        const double shift = dt_shift[b];
+        float lowest = INFINITY;
+        float highest = -INFINITY;
+
+        #pragma omp parallel for reduction(min:lowest) reduction(max:highest)
+        for (int i = first; i < last; i += STEP) {
+
+            const int loop_count = last - i > STEP ? STEP : last - i;
+            double dt[STEP];
+            double dE[STEP];
+
+            for (int j = 0; j < loop_count; j++) {
+                dt[j] = (double) beam_dt[i + j] - shift;
+                dE[j] = beam_dE[i + j];
+            }
+
+            drift_block(dt, dE, loop_count, drift);
+
+            for (int j = 0; j < loop_count; j++) {
+                const float offset = (float) dt[j];
+                beam_dt[i + j] = offset;
+                lowest = offset < lowest ? offset : lowest;
+                highest = offset > highest ? offset : highest;
+            }
+        }
+
+        dt_reference[b] += shift;
+        dt_shift[b] = last > first ? 0.5 * ((double) lowest + highest) : 0.;
+    }
+}
@@ -0,0 +1,106 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Drift equations shared by the fused tracking routines. The same equations
+// as in drift.cpp, with the per-turn coefficients computed once and the
+// solver selected outside of the particle loops.
+
+#ifndef DRIFT_H_
+#define DRIFT_H_
+
+#include <string.h>
+#include <math.h>
+
+enum drift_solver {SIMPLE_SOLVER = 0, LEGACY_SOLVER = 1, EXACT_SOLVER = 2};
+
+inline int drift_solver_id(const char * __restrict__ solver)
+{
+    if (strcmp(solver, "simple") == 0)
+        return SIMPLE_SOLVER;
+    else if (strcmp(solver, "legacy") == 0)
+        return LEGACY_SOLVER;
+    else
+        return EXACT_SOLVER;
+}
+
+template <typename real_t>
+struct drift_params {
+    int solver;
+    real_t T;
+    real_t coeff;
+    real_t eta0, eta1, eta2;
+    real_t alpha0, alpha1, alpha2;
+    real_t invbetasq, invenesq, energy;
+};
+
+template <typename real_t>
+inline drift_params<real_t> make_drift_params(
+    const int solver, const real_t T0, const real_t length_ratio,
+    const real_t alpha_order, const real_t eta_zero, const real_t eta_one,
+    const real_t eta_two, const real_t alpha_zero, const real_t alpha_one,
+    const real_t alpha_two, const real_t beta, const real_t energy)
+{
+    drift_params<real_t> p;
+    p.solver = solver;
+    p.T = T0 * length_ratio;
+    p.coeff = 0.;
+    p.eta0 = p.eta1 = p.eta2 = 0.;
+    p.alpha0 = alpha_zero;
+    p.alpha1 = alpha_one;
+    p.alpha2 = alpha_two;
+    p.invbetasq = 1 / (beta * beta);
+    p.invenesq = 1 / (energy * energy);
+    p.energy = energy;
+
+    if (solver == SIMPLE_SOLVER) {
+        p.coeff = eta_zero / (beta * beta * energy);
+    } else if (solver == LEGACY_SOLVER) {
+        const real_t coeff = 1. / (beta * beta * energy);
+        p.eta0 = eta_zero * coeff;
+        if (alpha_order > 0)
+            p.eta1 = eta_one * coeff * coeff;
+        if (alpha_order > 1)
+            p.eta2 = eta_two * coeff * coeff * coeff;
+    }
+    return p;
+}
+
+// Apply the drift to n particles; meant to be called on blocks of particles
+// that already sit in cache.
+template <typename real_t>
+inline void drift_block(real_t * __restrict__ beam_dt,
+                        const real_t * __restrict__ beam_dE,
+                        const int n, const drift_params<real_t> &p)
+{
+    if (p.solver == SIMPLE_SOLVER) {
+        const real_t coeff = p.T * p.coeff;
+        for (int j = 0; j < n; j++)
+            beam_dt[j] += coeff * beam_dE[j];
+    } else if (p.solver == LEGACY_SOLVER) {
+        for (int j = 0; j < n; j++)
+            beam_dt[j] += p.T * (1. / (1. - p.eta0 * beam_dE[j]
+                                       - p.eta1 * beam_dE[j] * beam_dE[j]
+                                       - p.eta2 * beam_dE[j] * beam_dE[j] * beam_dE[j]) - 1.);
+    } else {
+        for (int j = 0; j < n; j++) {
+            const real_t beam_delta = sqrt(1. + p.invbetasq *
+                                           (beam_dE[j] * beam_dE[j] * p.invenesq
+                                            + 2.*beam_dE[j] / p.energy)) - 1.;
+
+            beam_dt[j] += p.T * (
+                              (1. + p.alpha0 * beam_delta +
+                               p.alpha1 * (beam_delta * beam_delta) +
+                               p.alpha2 * (beam_delta * beam_delta * beam_delta)) *
+                              (1. + beam_dE[j] / p.energy) / (1. + beam_delta) - 1.);
+        }
+    }
+}
+
+#endif // DRIFT_H_
@@ -13,6 +13,8 @@
 
 #include <stdlib.h>
 #include <math.h>
+#include <algorithm>
+#include "openmp.h"
 
 
 extern "C" void fast_resonator_real_imag(double *__restrict__ impedanceReal,
@@ -130,3 +132,134 @@ extern "C" void fast_resonator_real_imagf(float *__restrict__ impedanceReal,
 
 }
 
+
+
+// Induced voltage of resonators for a piecewise linear line density sampled
+// at the sorted points bin_centers, evaluated at arbitrary times. With the
+// coefficients c_j = kappa_{j-1} - kappa_j of the slopes kappa of the line
+// density, the voltage of a resonator is
+//     A sum_j c_j (H(t - b_j) g(t - b_j) - sign(t - b_j)),
+// where g(x) = Re[(2 - i / Qtilde) exp(s x)] and s = -alpha + i omega_bar.
+// The sum over the bins before t is accumulated recursively once per turn,
+// referred to the last of these bins, so that every time only needs a
+// binary search and one complex exponential per resonator.
+template <typename real_t>
+static void resonator_induced_voltage_impl(
+    const real_t * __restrict__ coefficients,
+    const real_t * __restrict__ bin_centers,
+    const int n_slices,
+    const real_t * __restrict__ time_array,
+    const int n_time,
+    const double * __restrict__ R_S,
+    const double * __restrict__ omega_R,
+    const double * __restrict__ Q,
+    const int n_resonators,
+    real_t * __restrict__ voltage)
+{
+    // Sums of the coefficients before every bin
+    double *partial = (double *) malloc((n_slices + 1) * sizeof(double));
+    partial[0] = 0.;
+    for (int j = 0; j < n_slices; j++)
+        partial[j + 1] = partial[j] + coefficients[j];
+
+    // State of every resonator after the bins 0 to j, referred to bin j
+    double *state_re = (double *) malloc((size_t) n_resonators * n_slices
+                                         * sizeof(double));
+    double *state_im = (double *) malloc((size_t) n_resonators * n_slices
+                                         * sizeof(double));
+
+    #pragma omp parallel for
+    for (int r = 0; r < n_resonators; r++) {
+        const double alpha = omega_R[r] / (2. * Q[r]);
+        const double omega_bar = sqrt(omega_R[r] * omega_R[r] - alpha * alpha);
+        double *re = state_re + (size_t) r * n_slices;
+        double *im = state_im + (size_t) r * n_slices;
+        re[0] = coefficients[0];
+        im[0] = 0.;
+        for (int j = 1; j < n_slices; j++) {
+            const double dt = bin_centers[j] - bin_centers[j - 1];
+            const double decay = exp(-alpha * dt);
+            const double c = decay * cos(omega_bar * dt);
+            const double s = decay * sin(omega_bar * dt);
+            re[j] = re[j - 1] * c - im[j - 1] * s + coefficients[j];
+            im[j] = re[j - 1] * s + im[j - 1] * c;
+        }
+    }
+
+    #pragma omp parallel for
+    for (int i = 0; i < n_time; i++) {
+        const double t = time_array[i];
+        // Number of bins before t, and the bin at t if any
+        const int m = std::lower_bound(bin_centers, bin_centers + n_slices,
+                                       (real_t) t) - bin_centers;
+        const double equal = (m < n_slices && bin_centers[m] == t) ?
+                             (double) coefficients[m] : 0.;
+        // sum_j c_j sign(t - b_j)
+        const double sign_sum = 2. * partial[m] + equal - partial[n_slices];
+
+        double sum = 0.;
+        for (int r = 0; r < n_resonators; r++) {
+            const double alpha = omega_R[r] / (2. * Q[r]);
+            const double omega_bar = sqrt(omega_R[r] * omega_R[r]
+                                          - alpha * alpha);
+            const double q_tilde = omega_bar / (2. * alpha);
+            double wake = 0.;
+            if (m > 0) {
+                const double dt = t - bin_centers[m - 1];
+                const double decay = exp(-alpha * dt);
+                const double c = decay * cos(omega_bar * dt);
+                const double s = decay * sin(omega_bar * dt);
+                const double re = state_re[(size_t) r * n_slices + m - 1];
+                const double im = state_im[(size_t) r * n_slices + m - 1];
+                // Re[(2 - i / q_tilde) (c + i s) (re + i im)]
+                wake = 2. * (re * c - im * s) + (re * s + im * c) / q_tilde;
+            }
+            // H(0) g(0) = 1 for the bin at t
+            sum += R_S[r] / (2. * omega_R[r] * Q[r])
+                   * (wake + equal - sign_sum);
+        }
+        voltage[i] = sum;
+    }
+
+    free(partial);
+    free(state_re);
+    free(state_im);
+}
+
+
+extern "C" void resonator_induced_voltage(
+    const double * __restrict__ coefficients,
+    const double * __restrict__ bin_centers,
+    const int n_slices,
+    const double * __restrict__ time_array,
+    const int n_time,
+    const double * __restrict__ R_S,
+    const double * __restrict__ omega_R,
+    const double * __restrict__ Q,
+    const int n_resonators,
+    double * __restrict__ voltage)
+{
+    resonator_induced_voltage_impl<double>(coefficients, bin_centers,
+                                           n_slices, time_array, n_time,
+                                           R_S, omega_R, Q, n_resonators,
+                                           voltage);
+}
+
+
+extern "C" void resonator_induced_voltagef(
+    const float * __restrict__ coefficients,
+    const float * __restrict__ bin_centers,
+    const int n_slices,
+    const float * __restrict__ time_array,
+    const int n_time,
+    const double * __restrict__ R_S,
+    const double * __restrict__ omega_R,
+    const double * __restrict__ Q,
+    const int n_resonators,
+    float * __restrict__ voltage)
+{
+    resonator_induced_voltage_impl<float>(coefficients, bin_centers,
+                                          n_slices, time_array, n_time,
+                                          R_S, omega_R, Q, n_resonators,
+                                          voltage);
+}
@@ -15,61 +15,98 @@
 #include <stdlib.h>     // mmalloc()
 #include <math.h>
 #include "openmp.h"
+#include "histogram.h"
+
+
+template <typename real_t>
+static void histogram_impl(const real_t *__restrict__ input,
+                           real_t *__restrict__ output, const real_t cut_left,
+                           const real_t cut_right, const int n_slices,
+                           const int n_macroparticles, const int strategy)
+{
+    const real_t inv_bin_width = n_slices / (cut_right - cut_left);
+
+    auto bin_block = [=](const int i, const int loop_count, int *bins) {
+        for (int j = 0; j < loop_count; j++) {
+            const real_t fbin = floor((input[i + j] - cut_left) * inv_bin_width);
+            bins[j] = (fbin < 0 || fbin >= n_slices) ? -1 : (int) fbin;
+        }
+    };
+
+    histogram_engine<real_t>(bin_block, output, n_slices, n_macroparticles,
+                             strategy);
+}
 
 
 extern "C" void histogram(const double *__restrict__ input,
                           double *__restrict__ output, const double cut_left,
                           const double cut_right, const int n_slices,
-                          const int n_macroparticles)
+                          const int n_macroparticles, const int strategy)
 {
-    // Number of Iterations of the inner loop
-    const int STEP = 16;
-    const double inv_bin_width = n_slices / (cut_right - cut_left);
+    histogram_impl<double>(input, output, cut_left, cut_right, n_slices,
+                           n_macroparticles, strategy);
+}
 
-    // allocate memory for the thread_private histogram
-    double **histo = (double **) malloc(omp_get_max_threads() * sizeof(double *));
-    histo[0] = (double *) malloc (omp_get_max_threads() * n_slices * sizeof(double));
-    for (int i = 0; i < omp_get_max_threads(); i++)
-        histo[i] = (*histo + n_slices * i);
+// Histogram that also stores, for every particle, its bin (-1 outside the
+// histogram) and its position in the bin as a fraction of the bin width,
+// to be reused by linear_interp_kick_cached.
+template <typename real_t>
+static void histogram_n_cache_impl(const real_t *__restrict__ input,
+                                   real_t *__restrict__ output,
+                                   const real_t cut_left,
+                                   const real_t cut_right,
+                                   const int n_slices,
+                                   const int n_macroparticles,
+                                   int *__restrict__ bin_index,
+                                   float *__restrict__ bin_fraction)
+{
+    const real_t inv_bin_width = n_slices / (cut_right - cut_left);
 
-    #pragma omp parallel
-    {
-        const int id = omp_get_thread_num();
-        const int threads = omp_get_num_threads();
-        memset(histo[id], 0., n_slices * sizeof(double));
-        float fbin[STEP];
-        #pragma omp for
-        for (int i = 0; i < n_macroparticles; i += STEP) {
+    auto bin_block = [=](const int i, const int loop_count, int *bins) {
+        for (int j = 0; j < loop_count; j++) {
+            const real_t x = (input[i + j] - cut_left) * inv_bin_width;
+            const real_t fbin = floor(x);
+            bins[j] = (fbin < 0 || fbin >= n_slices) ? -1 : (int) fbin;
+            bin_index[i + j] = bins[j];
+            bin_fraction[i + j] = (float) (x - fbin);
+        }
+    };
 
-            const int loop_count = n_macroparticles - i > STEP ?
-                                   STEP : n_macroparticles - i;
+    histogram_engine<real_t>(bin_block, output, n_slices, n_macroparticles,
+                             HISTOGRAM_AUTO);
+}
 
-            // First calculate the index to update
-            for (int j = 0; j < loop_count; j++) {
-                fbin[j] = floor((input[i + j] - cut_left) * inv_bin_width);
-            }
-            // Then update the corresponding bins
-            for (int j = 0; j < loop_count; j++) {
-                const int bin  = (int) fbin[j];
-                if (bin < 0 || bin >= n_slices) continue;
-                histo[id][bin] += 1.;
-            }
-        }
 
-        // Reduce to a single histogram
-        #pragma omp for
-        for (int i = 0; i < n_slices; i++) {
-            output[i] = 0.;
-            for (int t = 0; t < threads; t++)
-                output[i] += histo[t][i];
-        }
-    }
+extern "C" void histogram_n_cache(const double *__restrict__ input,
+                                  double *__restrict__ output,
+                                  const double cut_left,
+                                  const double cut_right,
+                                  const int n_slices,
+                                  const int n_macroparticles,
+                                  int *__restrict__ bin_index,
+                                  float *__restrict__ bin_fraction)
+{
+    histogram_n_cache_impl<double>(input, output, cut_left, cut_right,
+                                   n_slices, n_macroparticles, bin_index,
+                                   bin_fraction);
+}
 
-    // free memory
-    free(histo[0]);
-    free(histo);
+
+extern "C" void histogram_n_cachef(const float *__restrict__ input,
+                                   float *__restrict__ output,
+                                   const float cut_left,
+                                   const float cut_right,
+                                   const int n_slices,
+                                   const int n_macroparticles,
+                                   int *__restrict__ bin_index,
+                                   float *__restrict__ bin_fraction)
+{
+    histogram_n_cache_impl<float>(input, output, cut_left, cut_right,
+                                  n_slices, n_macroparticles, bin_index,
+                                  bin_fraction);
 }
 
+
 extern "C" void smooth_histogram(const double *__restrict__ input,
                                  double *__restrict__ output, const double cut_left,
                                  const double cut_right, const int n_slices,
@@ -133,58 +170,10 @@ extern "C" void smooth_histogram(const double *__restrict__ input,
 extern "C" void histogramf(const float *__restrict__ input,
                            float *__restrict__ output, const float cut_left,
                            const float cut_right, const int n_slices,
-                           const int n_macroparticles)
+                           const int n_macroparticles, const int strategy)
 {
-    // Number of Iterations of the inner loop
-    const int STEP = 16;
-    const float inv_bin_width = n_slices / (cut_right - cut_left);
-
-    // allocate memory for the thread_private histogram
-    static float **histo = nullptr;
-
-    if (!histo) {
-        histo = (float **) malloc(omp_get_max_threads() * sizeof(float *));
-        histo[0] = (float *) malloc (omp_get_max_threads() * n_slices * sizeof(float));
-        for (int i = 0; i < omp_get_max_threads(); i++)
-            histo[i] = (*histo + n_slices * i);
-    }
-
-    #pragma omp parallel
-    {
-        const int id = omp_get_thread_num();
-        const int threads = omp_get_num_threads();
-        memset(histo[id], 0., n_slices * sizeof(float));
-        float fbin[STEP];
-        #pragma omp for
-        for (int i = 0; i < n_macroparticles; i += STEP) {
-
-            const int loop_count = n_macroparticles - i > STEP ?
-                                   STEP : n_macroparticles - i;
-
-            // First calculate the index to update
-            for (int j = 0; j < loop_count; j++) {
-                fbin[j] = floor((input[i + j] - cut_left) * inv_bin_width);
-            }
-            // Then update the corresponding bins
-            for (int j = 0; j < loop_count; j++) {
-                const int bin  = (int) fbin[j];
-                if (bin < 0 || bin >= n_slices) continue;
-                histo[id][bin] += 1.;
-            }
-        }
-
-        // Reduce to a single histogram
-        #pragma omp for
-        for (int i = 0; i < n_slices; i++) {
-            output[i] = 0.;
-            for (int t = 0; t < threads; t++)
-                output[i] += histo[t][i];
-        }
-    }
-
-    // free memory
-    // free(histo[0]);
-    // free(histo);
+    histogram_impl<float>(input, output, cut_left, cut_right, n_slices,
+                          n_macroparticles, strategy);
 }
 
 
@@ -248,6 +237,139 @@ extern "C" void smooth_histogramf(const float *__restrict__ input,
 }
 
 
+// Cloud-in-cell (order 1) and triangular-shaped-cloud (order 2) deposition.
+// Every particle is spread over the 2 or 3 nearest bin centers with the
+// linear or quadratic spline weights. The histograms have two guard bins on
+// each side, so that the particles next to the edges are deposited without
+// bound checks; the weights falling outside the profile are dropped. The
+// strategy (thread-private histograms or atomics) is selected as in
+// histogram.h.
+template <int order>
+static inline void deposit_weights(const double x, int &bin, double *weights)
+{
+    if (order == 1) {
+        const double fbin = floor(x);
+        const double f = x - fbin;
+        bin = (int) fbin;
+        weights[0] = 1. - f;
+        weights[1] = f;
+    } else {
+        const double fbin = floor(x + 0.5);
+        const double d = x - fbin;
+        bin = (int) fbin - 1;
+        weights[0] = 0.5 * (0.5 - d) * (0.5 - d);
+        weights[1] = 0.75 - d * d;
+        weights[2] = 0.5 * (0.5 + d) * (0.5 + d);
+    }
+}
+
+
+template <typename real_t, int order>
+static void deposit_impl(const real_t *__restrict__ input,
+                         real_t *__restrict__ output, const real_t cut_left,
+                         const real_t cut_right, const int n_slices,
+                         const int n_macroparticles)
+{
+    // Position in units of bins, relative to the first bin center
+    const real_t inv_bin_width = n_slices / (cut_right - cut_left);
+    const real_t origin = cut_left + (real_t) 0.5 / inv_bin_width;
+    const real_t lower = (real_t) -0.5 * (order + 1);
+    const real_t upper = n_slices + (real_t) 0.5 * (order - 1);
+    const int padded = n_slices + 4;
+    const int strategy = histogram_select(padded, n_macroparticles,
+                                          omp_get_max_threads());
+    const int copies = strategy == HISTOGRAM_ATOMIC ? 1 : omp_get_max_threads();
+    double *histo = (double *) malloc((size_t) copies * padded * sizeof(double));
+
+    #pragma omp parallel
+    {
+        const int id = omp_get_thread_num();
+        const int threads = omp_get_num_threads();
+        double *local = strategy == HISTOGRAM_ATOMIC ?
+                        histo : histo + (size_t) id * padded;
+        if (strategy == HISTOGRAM_ATOMIC) {
+            #pragma omp for
+            for (int b = 0; b < padded; b++)
+                local[b] = 0.;
+        } else {
+            memset(local, 0, padded * sizeof(double));
+        }
+
+        #pragma omp for
+        for (int i = 0; i < n_macroparticles; i++) {
+            const real_t x = (input[i] - origin) * inv_bin_width;
+            // Particles with no weight inside the profile are skipped; the
+            // bins are shifted by 2 for the guard bins
+            if (!(x > lower) || !(x < upper))
+                continue;
+            int bin;
+            double weights[order + 1];
+            deposit_weights<order>(x, bin, weights);
+            for (int k = 0; k <= order; k++) {
+                if (strategy == HISTOGRAM_ATOMIC) {
+                    #pragma omp atomic
+                    local[bin + k + 2] += weights[k];
+                } else {
+                    local[bin + k + 2] += weights[k];
+                }
+            }
+        }
+
+        // Reduce to a single histogram, without the guard bins
+        const int n_histo = strategy == HISTOGRAM_ATOMIC ? 1 : threads;
+        #pragma omp for
+        for (int b = 0; b < n_slices; b++) {
+            double sum = 0.;
+            for (int t = 0; t < n_histo; t++)
+                sum += histo[(size_t) t * padded + b + 2];
+            output[b] = (real_t) sum;
+        }
+    }
+
+    free(histo);
+}
+
+
+extern "C" void histogram_cic(const double *__restrict__ input,
+                              double *__restrict__ output,
+                              const double cut_left, const double cut_right,
+                              const int n_slices, const int n_macroparticles)
+{
+    deposit_impl<double, 1>(input, output, cut_left, cut_right, n_slices,
+                            n_macroparticles);
+}
+
+
+extern "C" void histogram_cicf(const float *__restrict__ input,
+                               float *__restrict__ output,
+                               const float cut_left, const float cut_right,
+                               const int n_slices, const int n_macroparticles)
+{
+    deposit_impl<float, 1>(input, output, cut_left, cut_right, n_slices,
+                           n_macroparticles);
+}
+
+
+extern "C" void histogram_tsc(const double *__restrict__ input,
+                              double *__restrict__ output,
+                              const double cut_left, const double cut_right,
+                              const int n_slices, const int n_macroparticles)
+{
+    deposit_impl<double, 2>(input, output, cut_left, cut_right, n_slices,
+                            n_macroparticles);
+}
+
+
+extern "C" void histogram_tscf(const float *__restrict__ input,
+                               float *__restrict__ output,
+                               const float cut_left, const float cut_right,
+                               const int n_slices, const int n_macroparticles)
+{
+    deposit_impl<float, 2>(input, output, cut_left, cut_right, n_slices,
+                           n_macroparticles);
+}
+
+
 /***** serial histogram
 
 extern "C" void histogram(const double *__restrict__ input,
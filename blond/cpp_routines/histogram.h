@@ -0,0 +1,165 @@
+/*
+ Copyright 2016 CERN. This software is distributed under the
+ terms of the GNU General Public Licence version 3 (GPL Version 3),
+ copied verbatim in the file LICENCE.md.
+ In applying this licence, CERN does not waive the privileges and immunities
+ granted to it by virtue of its status as an Intergovernmental Organization or
+ submit itself to any jurisdiction.
+ Project website: http://blond.web.cern.ch/
+ */
+
+// Histogram engine shared by the histogram kernels. The particles are
+// processed in blocks; a bin_block(i, count, bins) functor writes the bin of
+// the particles i to i + count - 1 into bins, -1 for the particles outside
+// the histogram. The counts are accumulated as integers with one of the
+// strategies below and converted to real_t at the end.
+//
+// - HISTOGRAM_PRIVATE: one histogram per thread, summed over the threads
+//   in parallel over the bins. Fastest when threads * n_slices is small
+//   compared to the number of particles.
+// - HISTOGRAM_ATOMIC: a single shared histogram updated with atomics, for
+//   fine histograms where the private copies would not fit in memory or
+//   their reduction would cost more than the deposition.
+// - HISTOGRAM_SORT: the bins of all the particles are sorted (in parallel
+//   with -D_GLIBCXX_PARALLEL) and every bin is counted from the segment
+//   boundaries, without any update conflict. Only used on request.
+
+#ifndef HISTOGRAM_H_
+#define HISTOGRAM_H_
+
+#include <stdint.h>
+#include <string.h>     // memset()
+#include <stdlib.h>     // malloc()
+#include <algorithm>
+#include "openmp.h"
+
+enum histogram_strategy {
+    HISTOGRAM_AUTO = 0,
+    HISTOGRAM_PRIVATE = 1,
+    HISTOGRAM_ATOMIC = 2,
+    HISTOGRAM_SORT = 3
+};
+
+// Particles per block, as in the original histogram loop
+#define HISTOGRAM_STEP 64
+
+// Maximum memory used by the thread-private histograms [bytes]
+#define HISTOGRAM_PRIVATE_BYTES (64 << 20)
+
+
+// Strategy of HISTOGRAM_AUTO; HISTOGRAM_SORT is never selected, as no
+// regime where it beats the other two has been measured
+static inline int histogram_select(const int n_slices,
+                                   const int n_macroparticles,
+                                   const int threads)
+{
+    if (threads <= 1)
+        return HISTOGRAM_PRIVATE;
+    const double private_size = (double) threads * n_slices;
+    if (private_size * sizeof(uint32_t) <= HISTOGRAM_PRIVATE_BYTES
+            && private_size <= 4. * n_macroparticles)
+        return HISTOGRAM_PRIVATE;
+    return HISTOGRAM_ATOMIC;
+}
+
+
+template <typename real_t, typename BinBlock>
+static void histogram_engine(const BinBlock &bin_block,
+                             real_t * __restrict__ output,
+                             const int n_slices,
+                             const int n_macroparticles,
+                             int strategy)
+{
+    if (strategy == HISTOGRAM_AUTO)
+        strategy = histogram_select(n_slices, n_macroparticles,
+                                    omp_get_max_threads());
+
+    if (strategy == HISTOGRAM_SORT) {
+        int *bins = (int *) malloc(n_macroparticles * sizeof(int));
+
+        #pragma omp parallel for
+        for (int i = 0; i < n_macroparticles; i += HISTOGRAM_STEP) {
+            const int loop_count = n_macroparticles - i > HISTOGRAM_STEP ?
+                                   HISTOGRAM_STEP : n_macroparticles - i;
+            bin_block(i, loop_count, bins + i);
+        }
+
+        // The particles outside the histogram (-1) are sorted first
+        std::sort(bins, bins + n_macroparticles);
+
+        #pragma omp parallel for
+        for (int b = 0; b < n_slices; b++) {
+            const int *end = bins + n_macroparticles;
+            const int *first = std::lower_bound((const int *) bins, end, b);
+            const int *last = std::lower_bound(first, end, b + 1);
+            output[b] = (real_t) (last - first);
+        }
+
+        free(bins);
+
+    } else if (strategy == HISTOGRAM_ATOMIC) {
+        uint32_t *counts = (uint32_t *) calloc(n_slices, sizeof(uint32_t));
+
+        #pragma omp parallel
+        {
+            int bins[HISTOGRAM_STEP];
+
+            #pragma omp for
+            for (int i = 0; i < n_macroparticles; i += HISTOGRAM_STEP) {
+                const int loop_count = n_macroparticles - i > HISTOGRAM_STEP ?
+                                       HISTOGRAM_STEP : n_macroparticles - i;
+                bin_block(i, loop_count, bins);
+                for (int j = 0; j < loop_count; j++) {
+                    if (bins[j] < 0) continue;
+                    #pragma omp atomic
+                    counts[bins[j]]++;
+                }
+            }
+
+            #pragma omp for
+            for (int b = 0; b < n_slices; b++)
+                output[b] = (real_t) counts[b];
+        }
+
+        free(counts);
+
+    } else {
+        const int max_threads = omp_get_max_threads();
+        uint32_t *counts = (uint32_t *) malloc((size_t) max_threads * n_slices
+                                               * sizeof(uint32_t));
+
+        #pragma omp parallel
+        {
+            const int id = omp_get_thread_num();
+            const int threads = omp_get_num_threads();
+            uint32_t *histo = counts + (size_t) id * n_slices;
+            memset(histo, 0, n_slices * sizeof(uint32_t));
+            int bins[HISTOGRAM_STEP];
+
+            #pragma omp for
+            for (int i = 0; i < n_macroparticles; i += HISTOGRAM_STEP) {
+                const int loop_count = n_macroparticles - i > HISTOGRAM_STEP ?
+                                       HISTOGRAM_STEP : n_macroparticles - i;
+                bin_block(i, loop_count, bins);
+                for (int j = 0; j < loop_count; j++) {
+                    if (bins[j] < 0) continue;
+                    histo[bins[j]]++;
+                }
+            }
+
+            // Reduce to a single histogram, every thread summing all the
+            // private histograms over its own range of bins
+            #pragma omp for
+            for (int b = 0; b < n_slices; b++) {
+                uint32_t sum = 0;
+                for (int t = 0; t < threads; t++)
+                    sum += counts[(size_t) t * n_slices + b];
+                output[b] = (real_t) sum;
+            }
+        }
+
+        free(counts);
+    }
+}
+
+#endif // HISTOGRAM_H_
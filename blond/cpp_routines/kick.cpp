@@ -11,6 +11,8 @@ Project website: http://blond.web.cern.ch/
 // Optimised C++ routine that calculates the kicks
 // Author: Danilo Quartullo, Helga Timko, Alexandre Lasheen
 
+#include <stdlib.h>
+#include <math.h>
 #include "sin.h"
 
 using namespace vdt;
@@ -96,3 +98,140 @@ extern "C" void rf_volt_compf(const float * __restrict__ voltage,
     }
 }
 
+
+
+// Kick of single-precision arrival times stored as offsets beam_dt from the
+// double-precision reference dt_reference[b] of their bunch, the particles
+// of the bunch b being bunch_bounds[b] to bunch_bounds[b + 1]. The RF phase
+// of the reference is computed in double precision once per bunch, so that
+// the kick itself is computed in single precision on small offsets.
+extern "C" void kick_compensatedf(const float * __restrict__ beam_dt,
+                                  float * __restrict__ beam_dE,
+                                  const double * __restrict__ dt_reference,
+                                  const int * __restrict__ bunch_bounds,
+                                  const int n_bunches, const int n_rf,
+                                  const double * __restrict__ voltage,
+                                  const double * __restrict__ omega_RF,
+                                  const double * __restrict__ phi_RF,
+                                  const double acc_kick)
+{
+    const float acc = acc_kick;
+    for (int b = 0; b < n_bunches; b++) {
+        const int first = bunch_bounds[b];
+        const int last = bunch_bounds[b + 1];
+
+        if (n_rf == 0) {
+            #pragma omp parallel for
+            for (int i = first; i < last; i++)
+                beam_dE[i] = beam_dE[i] + acc;
+        }
+
+        // One pass per RF system, as in kick, so that the loop is vectorised
+        for (int j = 0; j < n_rf; j++) {
+            const float volt = voltage[j];
+            const float omega = omega_RF[j];
+            const float phase = fmod(omega_RF[j] * dt_reference[b]
+                                     + phi_RF[j], 2 * M_PI);
+            const float acc_j = j == n_rf - 1 ? acc : 0;
+            #pragma omp parallel for
+            for (int i = first; i < last; i++)
+                beam_dE[i] = beam_dE[i] + volt
+                             * fast_sinf(omega * beam_dt[i] + phase) + acc_j;
+        }
+    }
+}
+
+// Kick with the total RF voltage tabulated on a regular time grid of n_table
+// points between table_left and table_right: a single pass over the
+// particles, whatever the number of RF systems. The particles outside of
+// the grid get the exact kick.
+extern "C" void tabulated_kick(const double * __restrict__ beam_dt,
+                               double * __restrict__ beam_dE,
+                               const double * __restrict__ voltage_table,
+                               const double table_left,
+                               const double table_right,
+                               const int n_table, const int n_rf,
+                               const double * __restrict__ voltage,
+                               const double * __restrict__ omega_RF,
+                               const double * __restrict__ phi_RF,
+                               const int n_macroparticles,
+                               const double acc_kick)
+{
+    const double bin_width = (table_right - table_left) / (n_table - 1);
+    const double inv_bin_width = 1. / bin_width;
+    double *slope = (double *) malloc((n_table - 1) * sizeof(double));
+    double *factor = (double *) malloc((n_table - 1) * sizeof(double));
+
+    #pragma omp parallel
+    {
+        #pragma omp for
+        for (int i = 0; i < n_table - 1; i++) {
+            slope[i] = (voltage_table[i + 1] - voltage_table[i]) * inv_bin_width;
+            factor[i] = voltage_table[i] - (table_left + i * bin_width) * slope[i]
+                        + acc_kick;
+        }
+
+        #pragma omp for
+        for (int i = 0; i < n_macroparticles; i++) {
+            const double fbin = floor((beam_dt[i] - table_left) * inv_bin_width);
+            if (fbin >= 0 && fbin < n_table - 1) {
+                const int bin = (int) fbin;
+                beam_dE[i] += beam_dt[i] * slope[bin] + factor[bin];
+            } else {
+                for (int j = 0; j < n_rf; j++)
+                    beam_dE[i] += voltage[j]
+                                  * fast_sin(omega_RF[j] * beam_dt[i] + phi_RF[j]);
+                beam_dE[i] += acc_kick;
+            }
+        }
+    }
+
+    free(slope);
+    free(factor);
+}
+
+
+extern "C" void tabulated_kickf(const float * __restrict__ beam_dt,
+                                float * __restrict__ beam_dE,
+                                const float * __restrict__ voltage_table,
+                                const float table_left,
+                                const float table_right,
+                                const int n_table, const int n_rf,
+                                const float * __restrict__ voltage,
+                                const float * __restrict__ omega_RF,
+                                const float * __restrict__ phi_RF,
+                                const int n_macroparticles,
+                                const float acc_kick)
+{
+    const float bin_width = (table_right - table_left) / (n_table - 1);
+    const float inv_bin_width = 1. / bin_width;
+    float *slope = (float *) malloc((n_table - 1) * sizeof(float));
+    float *factor = (float *) malloc((n_table - 1) * sizeof(float));
+
+    #pragma omp parallel
+    {
+        #pragma omp for
+        for (int i = 0; i < n_table - 1; i++) {
+            slope[i] = (voltage_table[i + 1] - voltage_table[i]) * inv_bin_width;
+            factor[i] = voltage_table[i] - (table_left + i * bin_width) * slope[i]
+                        + acc_kick;
+        }
+
+        #pragma omp for
+        for (int i = 0; i < n_macroparticles; i++) {
+            const float fbin = floorf((beam_dt[i] - table_left) * inv_bin_width);
+            if (fbin >= 0 && fbin < n_table - 1) {
+                const int bin = (int) fbin;
+                beam_dE[i] += beam_dt[i] * slope[bin] + factor[bin];
+            } else {
+                for (int j = 0; j < n_rf; j++)
+                    beam_dE[i] += voltage[j]
+                                  * fast_sinf(omega_RF[j] * beam_dt[i] + phi_RF[j]);
+                beam_dE[i] += acc_kick;
+            }
+        }
+    }
+
+    free(slope);
+    free(factor);
+}
@@ -0,0 +1,504 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Optimised C++ routines that fuse the kick, drift and histogram passes
+// over the particles.
+
+#include <stdlib.h>
+#include <string.h>     // memset()
+#include "sin.h"
+#include "drift.h"
+#include "openmp.h"
+#include "histogram.h"
+
+using namespace vdt;
+
+static inline double kick_sin(const double x) {return fast_sin(x);}
+static inline float kick_sin(const float x) {return fast_sinf(x);}
+
+
+// Tracks n_turns of kick and drift. The RF programs are given per turn,
+// with shape (n_turns, n_rf); the drift parameters are the ones of the
+// turn following the kick. The particles are processed in small blocks
+// that stay in cache for all the turns.
+template <typename real_t>
+static void kick_drift_multi_turn_impl(real_t * __restrict__ beam_dt,
+                                       real_t * __restrict__ beam_dE,
+                                       const int n_turns, const int n_rf,
+                                       const real_t * __restrict__ voltage,
+                                       const real_t * __restrict__ omega_RF,
+                                       const real_t * __restrict__ phi_RF,
+                                       const real_t * __restrict__ acc_kick,
+                                       const char * __restrict__ solver,
+                                       const real_t * __restrict__ T0,
+                                       const real_t length_ratio,
+                                       const real_t alpha_order,
+                                       const real_t * __restrict__ eta_zero,
+                                       const real_t * __restrict__ eta_one,
+                                       const real_t * __restrict__ eta_two,
+                                       const real_t * __restrict__ alpha_zero,
+                                       const real_t * __restrict__ alpha_one,
+                                       const real_t * __restrict__ alpha_two,
+                                       const real_t * __restrict__ beta,
+                                       const real_t * __restrict__ energy,
+                                       const int n_macroparticles)
+{
+    const int STEP = 64;
+    const int solver_id = drift_solver_id(solver);
+
+    drift_params<real_t> *drift = (drift_params<real_t> *)
+                                  malloc(n_turns * sizeof(drift_params<real_t>));
+    for (int t = 0; t < n_turns; t++)
+        drift[t] = make_drift_params<real_t>(solver_id, T0[t], length_ratio,
+                                             alpha_order, eta_zero[t],
+                                             eta_one[t], eta_two[t],
+                                             alpha_zero[t], alpha_one[t],
+                                             alpha_two[t], beta[t], energy[t]);
+
+    #pragma omp parallel for
+    for (int i = 0; i < n_macroparticles; i += STEP) {
+
+        const int loop_count = n_macroparticles - i > STEP ?
+                               STEP : n_macroparticles - i;
+        real_t * __restrict__ dt = beam_dt + i;
+        real_t * __restrict__ dE = beam_dE + i;
+
+        for (int t = 0; t < n_turns; t++) {
+            // KICK
+            for (int k = 0; k < n_rf; k++) {
+                const real_t v = voltage[t * n_rf + k];
+                const real_t w = omega_RF[t * n_rf + k];
+                const real_t p = phi_RF[t * n_rf + k];
+                for (int j = 0; j < loop_count; j++)
+                    dE[j] = dE[j] + v * kick_sin(w * dt[j] + p);
+            }
+
+            // SYNCHRONOUS ENERGY CHANGE
+            for (int j = 0; j < loop_count; j++)
+                dE[j] = dE[j] + acc_kick[t];
+
+            // DRIFT
+            drift_block(dt, dE, loop_count, drift[t]);
+        }
+    }
+
+    free(drift);
+}
+
+
+extern "C" void kick_drift_multi_turn(double * __restrict__ beam_dt,
+                                      double * __restrict__ beam_dE,
+                                      const int n_turns, const int n_rf,
+                                      const double * __restrict__ voltage,
+                                      const double * __restrict__ omega_RF,
+                                      const double * __restrict__ phi_RF,
+                                      const double * __restrict__ acc_kick,
+                                      const char * __restrict__ solver,
+                                      const double * __restrict__ T0,
+                                      const double length_ratio,
+                                      const double alpha_order,
+                                      const double * __restrict__ eta_zero,
+                                      const double * __restrict__ eta_one,
+                                      const double * __restrict__ eta_two,
+                                      const double * __restrict__ alpha_zero,
+                                      const double * __restrict__ alpha_one,
+                                      const double * __restrict__ alpha_two,
+                                      const double * __restrict__ beta,
+                                      const double * __restrict__ energy,
+                                      const int n_macroparticles)
+{
+    kick_drift_multi_turn_impl<double>(beam_dt, beam_dE, n_turns, n_rf,
+                                       voltage, omega_RF, phi_RF, acc_kick,
+                                       solver, T0, length_ratio, alpha_order,
+                                       eta_zero, eta_one, eta_two,
+                                       alpha_zero, alpha_one, alpha_two,
+                                       beta, energy, n_macroparticles);
+}
+
+
+extern "C" void kick_drift_multi_turnf(float * __restrict__ beam_dt,
+                                       float * __restrict__ beam_dE,
+                                       const int n_turns, const int n_rf,
+                                       const float * __restrict__ voltage,
+                                       const float * __restrict__ omega_RF,
+                                       const float * __restrict__ phi_RF,
+                                       const float * __restrict__ acc_kick,
+                                       const char * __restrict__ solver,
+                                       const float * __restrict__ T0,
+                                       const float length_ratio,
+                                       const float alpha_order,
+                                       const float * __restrict__ eta_zero,
+                                       const float * __restrict__ eta_one,
+                                       const float * __restrict__ eta_two,
+                                       const float * __restrict__ alpha_zero,
+                                       const float * __restrict__ alpha_one,
+                                       const float * __restrict__ alpha_two,
+                                       const float * __restrict__ beta,
+                                       const float * __restrict__ energy,
+                                       const int n_macroparticles)
+{
+    kick_drift_multi_turn_impl<float>(beam_dt, beam_dE, n_turns, n_rf,
+                                      voltage, omega_RF, phi_RF, acc_kick,
+                                      solver, T0, length_ratio, alpha_order,
+                                      eta_zero, eta_one, eta_two,
+                                      alpha_zero, alpha_one, alpha_two,
+                                      beta, energy, n_macroparticles);
+}
+
+
+// Tracks all the RF stations of the ring for one turn. The RF programs of
+// the stations are concatenated, station s having n_rf[s] RF systems; the
+// drift parameters of each station are the ones of the turn following the
+// kick. The particles are processed in small blocks that stay in cache for
+// all the stations.
+template <typename real_t>
+static void kick_drift_multi_section_impl(real_t * __restrict__ beam_dt,
+                                          real_t * __restrict__ beam_dE,
+                                          const int n_sections,
+                                          const int * __restrict__ n_rf,
+                                          const real_t * __restrict__ voltage,
+                                          const real_t * __restrict__ omega_RF,
+                                          const real_t * __restrict__ phi_RF,
+                                          const real_t * __restrict__ acc_kick,
+                                          const char * __restrict__ solver,
+                                          const real_t * __restrict__ T0,
+                                          const real_t * __restrict__ length_ratio,
+                                          const real_t alpha_order,
+                                          const real_t * __restrict__ eta_zero,
+                                          const real_t * __restrict__ eta_one,
+                                          const real_t * __restrict__ eta_two,
+                                          const real_t * __restrict__ alpha_zero,
+                                          const real_t * __restrict__ alpha_one,
+                                          const real_t * __restrict__ alpha_two,
+                                          const real_t * __restrict__ beta,
+                                          const real_t * __restrict__ energy,
+                                          const int n_macroparticles)
+{
+    const int STEP = 64;
+    const int solver_id = drift_solver_id(solver);
+
+    drift_params<real_t> *drift = (drift_params<real_t> *)
+                                  malloc(n_sections * sizeof(drift_params<real_t>));
+    int *rf_offset = (int *) malloc(n_sections * sizeof(int));
+    for (int s = 0; s < n_sections; s++) {
+        drift[s] = make_drift_params<real_t>(solver_id, T0[s], length_ratio[s],
+                                             alpha_order, eta_zero[s],
+                                             eta_one[s], eta_two[s],
+                                             alpha_zero[s], alpha_one[s],
+                                             alpha_two[s], beta[s], energy[s]);
+        rf_offset[s] = s == 0 ? 0 : rf_offset[s - 1] + n_rf[s - 1];
+    }
+
+    #pragma omp parallel for
+    for (int i = 0; i < n_macroparticles; i += STEP) {
+
+        const int loop_count = n_macroparticles - i > STEP ?
+                               STEP : n_macroparticles - i;
+        real_t * __restrict__ dt = beam_dt + i;
+        real_t * __restrict__ dE = beam_dE + i;
+
+        for (int s = 0; s < n_sections; s++) {
+            // KICK
+            for (int k = rf_offset[s]; k < rf_offset[s] + n_rf[s]; k++) {
+                const real_t v = voltage[k];
+                const real_t w = omega_RF[k];
+                const real_t p = phi_RF[k];
+                for (int j = 0; j < loop_count; j++)
+                    dE[j] = dE[j] + v * kick_sin(w * dt[j] + p);
+            }
+
+            // SYNCHRONOUS ENERGY CHANGE
+            for (int j = 0; j < loop_count; j++)
+                dE[j] = dE[j] + acc_kick[s];
+
+            // DRIFT
+            drift_block(dt, dE, loop_count, drift[s]);
+        }
+    }
+
+    free(drift);
+    free(rf_offset);
+}
+
+
+extern "C" void kick_drift_multi_section(double * __restrict__ beam_dt,
+                                         double * __restrict__ beam_dE,
+                                         const int n_sections,
+                                         const int * __restrict__ n_rf,
+                                         const double * __restrict__ voltage,
+                                         const double * __restrict__ omega_RF,
+                                         const double * __restrict__ phi_RF,
+                                         const double * __restrict__ acc_kick,
+                                         const char * __restrict__ solver,
+                                         const double * __restrict__ T0,
+                                         const double * __restrict__ length_ratio,
+                                         const double alpha_order,
+                                         const double * __restrict__ eta_zero,
+                                         const double * __restrict__ eta_one,
+                                         const double * __restrict__ eta_two,
+                                         const double * __restrict__ alpha_zero,
+                                         const double * __restrict__ alpha_one,
+                                         const double * __restrict__ alpha_two,
+                                         const double * __restrict__ beta,
+                                         const double * __restrict__ energy,
+                                         const int n_macroparticles)
+{
+    kick_drift_multi_section_impl<double>(beam_dt, beam_dE, n_sections, n_rf,
+                                          voltage, omega_RF, phi_RF, acc_kick,
+                                          solver, T0, length_ratio, alpha_order,
+                                          eta_zero, eta_one, eta_two,
+                                          alpha_zero, alpha_one, alpha_two,
+                                          beta, energy, n_macroparticles);
+}
+
+
+extern "C" void kick_drift_multi_sectionf(float * __restrict__ beam_dt,
+                                          float * __restrict__ beam_dE,
+                                          const int n_sections,
+                                          const int * __restrict__ n_rf,
+                                          const float * __restrict__ voltage,
+                                          const float * __restrict__ omega_RF,
+                                          const float * __restrict__ phi_RF,
+                                          const float * __restrict__ acc_kick,
+                                          const char * __restrict__ solver,
+                                          const float * __restrict__ T0,
+                                          const float * __restrict__ length_ratio,
+                                          const float alpha_order,
+                                          const float * __restrict__ eta_zero,
+                                          const float * __restrict__ eta_one,
+                                          const float * __restrict__ eta_two,
+                                          const float * __restrict__ alpha_zero,
+                                          const float * __restrict__ alpha_one,
+                                          const float * __restrict__ alpha_two,
+                                          const float * __restrict__ beta,
+                                          const float * __restrict__ energy,
+                                          const int n_macroparticles)
+{
+    kick_drift_multi_section_impl<float>(beam_dt, beam_dE, n_sections, n_rf,
+                                         voltage, omega_RF, phi_RF, acc_kick,
+                                         solver, T0, length_ratio, alpha_order,
+                                         eta_zero, eta_one, eta_two,
+                                         alpha_zero, alpha_one, alpha_two,
+                                         beta, energy, n_macroparticles);
+}
+
+
+// Drift followed by the histogram of the drifted particles, in a single pass
+// over the particles. Same binning and histogram engine as in
+// histogram.cpp.
+template <typename real_t>
+static void drift_n_histogram_impl(real_t * __restrict__ beam_dt,
+                                   const real_t * __restrict__ beam_dE,
+                                   const char * __restrict__ solver,
+                                   const real_t T0, const real_t length_ratio,
+                                   const real_t alpha_order,
+                                   const real_t eta_zero,
+                                   const real_t eta_one,
+                                   const real_t eta_two,
+                                   const real_t alpha_zero,
+                                   const real_t alpha_one,
+                                   const real_t alpha_two,
+                                   const real_t beta, const real_t energy,
+                                   real_t * __restrict__ output,
+                                   const real_t cut_left,
+                                   const real_t cut_right,
+                                   const int n_slices,
+                                   const int n_macroparticles)
+{
+    const real_t inv_bin_width = n_slices / (cut_right - cut_left);
+    const drift_params<real_t> drift = make_drift_params<real_t>(
+        drift_solver_id(solver), T0, length_ratio, alpha_order,
+        eta_zero, eta_one, eta_two, alpha_zero, alpha_one, alpha_two,
+        beta, energy);
+
+    auto bin_block = [&](const int i, const int loop_count, int *bins) {
+        drift_block(beam_dt + i, beam_dE + i, loop_count, drift);
+        for (int j = 0; j < loop_count; j++) {
+            const real_t fbin = floor((beam_dt[i + j] - cut_left) * inv_bin_width);
+            bins[j] = (fbin < 0 || fbin >= n_slices) ? -1 : (int) fbin;
+        }
+    };
+
+    histogram_engine<real_t>(bin_block, output, n_slices, n_macroparticles,
+                             HISTOGRAM_AUTO);
+}
+
+
+extern "C" void drift_n_histogram(double * __restrict__ beam_dt,
+                                  const double * __restrict__ beam_dE,
+                                  const char * __restrict__ solver,
+                                  const double T0, const double length_ratio,
+                                  const double alpha_order,
+                                  const double eta_zero,
+                                  const double eta_one,
+                                  const double eta_two,
+                                  const double alpha_zero,
+                                  const double alpha_one,
+                                  const double alpha_two,
+                                  const double beta, const double energy,
+                                  double * __restrict__ output,
+                                  const double cut_left,
+                                  const double cut_right,
+                                  const int n_slices,
+                                  const int n_macroparticles)
+{
+    drift_n_histogram_impl<double>(beam_dt, beam_dE, solver, T0,
+                                   length_ratio, alpha_order, eta_zero,
+                                   eta_one, eta_two, alpha_zero, alpha_one,
+                                   alpha_two, beta, energy, output,
+                                   cut_left, cut_right, n_slices,
+                                   n_macroparticles);
+}
+
+
+extern "C" void drift_n_histogramf(float * __restrict__ beam_dt,
+                                   const float * __restrict__ beam_dE,
+                                   const char * __restrict__ solver,
+                                   const float T0, const float length_ratio,
+                                   const float alpha_order,
+                                   const float eta_zero,
+                                   const float eta_one,
+                                   const float eta_two,
+                                   const float alpha_zero,
+                                   const float alpha_one,
+                                   const float alpha_two,
+                                   const float beta, const float energy,
+                                   float * __restrict__ output,
+                                   const float cut_left,
+                                   const float cut_right,
+                                   const int n_slices,
+                                   const int n_macroparticles)
+{
+    drift_n_histogram_impl<float>(beam_dt, beam_dE, solver, T0,
+                                  length_ratio, alpha_order, eta_zero,
+                                  eta_one, eta_two, alpha_zero, alpha_one,
+                                  alpha_two, beta, energy, output,
+                                  cut_left, cut_right, n_slices,
+                                  n_macroparticles);
+}
+
+
+// Kick and drift with periodic boundary conditions in [0, T0], T0 being the
+// revolution period of the turn following the kick. The particles beyond the
+// ring period are shifted by one period and skip this turn, while the
+// particles that drift to negative times are shifted by one period and get
+// a second kick and drift.
+template <typename real_t>
+static inline void kick_drift_particle(real_t &dt, real_t &dE, const int n_rf,
+                                       const real_t * __restrict__ voltage,
+                                       const real_t * __restrict__ omega_RF,
+                                       const real_t * __restrict__ phi_RF,
+                                       const real_t acc_kick,
+                                       const drift_params<real_t> &drift)
+{
+    for (int k = 0; k < n_rf; k++)
+        dE = dE + voltage[k] * kick_sin(omega_RF[k] * dt + phi_RF[k]);
+    dE = dE + acc_kick;
+    drift_block(&dt, &dE, 1, drift);
+}
+
+
+template <typename real_t>
+static void kick_drift_periodic_impl(real_t * __restrict__ beam_dt,
+                                     real_t * __restrict__ beam_dE,
+                                     const int n_rf,
+                                     const real_t * __restrict__ voltage,
+                                     const real_t * __restrict__ omega_RF,
+                                     const real_t * __restrict__ phi_RF,
+                                     const real_t acc_kick,
+                                     const char * __restrict__ solver,
+                                     const real_t T0,
+                                     const real_t length_ratio,
+                                     const real_t alpha_order,
+                                     const real_t eta_zero,
+                                     const real_t eta_one,
+                                     const real_t eta_two,
+                                     const real_t alpha_zero,
+                                     const real_t alpha_one,
+                                     const real_t alpha_two,
+                                     const real_t beta, const real_t energy,
+                                     const int n_macroparticles)
+{
+    const drift_params<real_t> drift = make_drift_params<real_t>(
+        drift_solver_id(solver), T0, length_ratio, alpha_order,
+        eta_zero, eta_one, eta_two, alpha_zero, alpha_one, alpha_two,
+        beta, energy);
+
+    #pragma omp parallel for
+    for (int i = 0; i < n_macroparticles; i++) {
+        if (beam_dt[i] > T0) {
+            beam_dt[i] -= T0;
+            continue;
+        }
+        kick_drift_particle(beam_dt[i], beam_dE[i], n_rf, voltage, omega_RF,
+                            phi_RF, acc_kick, drift);
+        if (beam_dt[i] < 0) {
+            beam_dt[i] += T0;
+            kick_drift_particle(beam_dt[i], beam_dE[i], n_rf, voltage,
+                                omega_RF, phi_RF, acc_kick, drift);
+        }
+    }
+}
+
+
+extern "C" void kick_drift_periodic(double * __restrict__ beam_dt,
+                                    double * __restrict__ beam_dE,
+                                    const int n_rf,
+                                    const double * __restrict__ voltage,
+                                    const double * __restrict__ omega_RF,
+                                    const double * __restrict__ phi_RF,
+                                    const double acc_kick,
+                                    const char * __restrict__ solver,
+                                    const double T0, const double length_ratio,
+                                    const double alpha_order,
+                                    const double eta_zero,
+                                    const double eta_one,
+                                    const double eta_two,
+                                    const double alpha_zero,
+                                    const double alpha_one,
+                                    const double alpha_two,
+                                    const double beta, const double energy,
+                                    const int n_macroparticles)
+{
+    kick_drift_periodic_impl<double>(beam_dt, beam_dE, n_rf, voltage,
+                                     omega_RF, phi_RF, acc_kick, solver, T0,
+                                     length_ratio, alpha_order, eta_zero,
+                                     eta_one, eta_two, alpha_zero, alpha_one,
+                                     alpha_two, beta, energy,
+                                     n_macroparticles);
+}
+
+
+extern "C" void kick_drift_periodicf(float * __restrict__ beam_dt,
+                                     float * __restrict__ beam_dE,
+                                     const int n_rf,
+                                     const float * __restrict__ voltage,
+                                     const float * __restrict__ omega_RF,
+                                     const float * __restrict__ phi_RF,
+                                     const float acc_kick,
+                                     const char * __restrict__ solver,
+                                     const float T0, const float length_ratio,
+                                     const float alpha_order,
+                                     const float eta_zero,
+                                     const float eta_one,
+                                     const float eta_two,
+                                     const float alpha_zero,
+                                     const float alpha_one,
+                                     const float alpha_two,
+                                     const float beta, const float energy,
+                                     const int n_macroparticles)
+{
+    kick_drift_periodic_impl<float>(beam_dt, beam_dE, n_rf, voltage,
+                                    omega_RF, phi_RF, acc_kick, solver, T0,
+                                    length_ratio, alpha_order, eta_zero,
+                                    eta_one, eta_two, alpha_zero, alpha_one,
+                                    alpha_two, beta, energy,
+                                    n_macroparticles);
+}
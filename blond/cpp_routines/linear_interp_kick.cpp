@@ -15,6 +15,7 @@ Project website: http://blond.web.cern.ch/
 #include <stdlib.h>
 #include <math.h>
 #include <cmath>
+#include "drift.h"
 
 
 extern "C" void linear_interp_kick(double * __restrict__ beam_dt,
@@ -94,74 +95,6 @@ extern "C" void linear_interp_time_translation(
 
 }
 
-extern "C" void linear_interp_kick_n_drift(double * __restrict__ beam_dt,
-        double * __restrict__ beam_dE,
-        const double * __restrict__ voltage_array,
-        const double * __restrict__ bin_centers,
-        const int n_slices,
-        const int n_macroparticles,
-        const double acc_kick,
-        const char * __restrict__ solver,
-        const double T0,
-        const double length_ratio,
-        const double alpha_order,
-        const double eta_zero,
-        const double eta_one,
-        const double eta_two,
-        const double beta,
-        const double energy,
-        const double charge)
-{
-
-
-    const int STEP = 64;
-    const double inv_bin_width = (n_slices - 1)
-                                 / (bin_centers[n_slices - 1]
-                                    - bin_centers[0]);
-    const double coeff = T0 * length_ratio * eta_zero / (beta * beta * energy);
-
-    double *voltageKick = (double *) malloc ((n_slices - 1) * sizeof(double));
-    double *factor = (double *) malloc ((n_slices - 1) * sizeof(double));
-
-    #pragma omp parallel
-    {
-        unsigned fbin[STEP];
-
-        #pragma omp for
-        for (int i = 0; i < n_slices - 1; i++) {
-            voltageKick[i] =  charge * (voltage_array[i + 1] - voltage_array[i]) * inv_bin_width;
-            factor[i] = charge * voltage_array[i] - bin_centers[i] * voltageKick[i] + acc_kick;
-        }
-
-        #pragma omp for
-        for (int i = 0; i < n_macroparticles; i += STEP) {
-
-            const int loop_count = n_macroparticles - i > STEP ?
-                                   STEP : n_macroparticles - i;
-
-            for (int j = 0; j < loop_count; j++) {
-                fbin[j] = (unsigned) std::floor((beam_dt[i + j] - bin_centers[0])
-                                                * inv_bin_width);
-            }
-
-            for (int j = 0; j < loop_count; j++) {
-                if (fbin[j] < n_slices - 1) {
-                    beam_dE[i + j] += beam_dt[i + j] * voltageKick[fbin[j]] + factor[fbin[j]];
-                }
-            }
-
-            for (int j = 0; j < loop_count; j++) {
-                beam_dt[i + j] += coeff * beam_dE[i + j];
-            }
-
-        }
-    }
-    free(voltageKick);
-    free(factor);
-}
-
-
-
 extern "C" void linear_interp_kickf(float * __restrict__ beam_dt,
                                     float * __restrict__ beam_dE,
                                     const float * __restrict__ voltage_array,
@@ -240,34 +173,43 @@ extern "C" void linear_interp_time_translationf(
 }
 
 
-extern "C" void linear_interp_kick_n_driftf(float * __restrict__ beam_dt,
-        float * __restrict__ beam_dE,
-        const float * __restrict__ voltage_array,
-        const float * __restrict__ bin_centers,
+// Interpolated kick followed by the drift, in a single pass over the
+// particles. The drift supports the same solvers as drift.cpp.
+template <typename real_t>
+static void linear_interp_kick_n_drift_impl(real_t * __restrict__ beam_dt,
+        real_t * __restrict__ beam_dE,
+        const real_t * __restrict__ voltage_array,
+        const real_t * __restrict__ bin_centers,
         const int n_slices,
         const int n_macroparticles,
-        const float acc_kick,
+        const real_t acc_kick,
         const char * __restrict__ solver,
-        const float T0,
-        const float length_ratio,
-        const float alpha_order,
-        const float eta_zero,
-        const float eta_one,
-        const float eta_two,
-        const float beta,
-        const float energy,
-        const float charge)
+        const real_t T0,
+        const real_t length_ratio,
+        const real_t alpha_order,
+        const real_t eta_zero,
+        const real_t eta_one,
+        const real_t eta_two,
+        const real_t alpha_zero,
+        const real_t alpha_one,
+        const real_t alpha_two,
+        const real_t beta,
+        const real_t energy,
+        const real_t charge)
 {
 
 
     const int STEP = 64;
-    const float inv_bin_width = (n_slices - 1)
-                                / (bin_centers[n_slices - 1]
-                                   - bin_centers[0]);
-    const float coeff = T0 * length_ratio * eta_zero / (beta * beta * energy);
+    const real_t inv_bin_width = (n_slices - 1)
+                                 / (bin_centers[n_slices - 1]
+                                    - bin_centers[0]);
+    const drift_params<real_t> drift = make_drift_params<real_t>(
+        drift_solver_id(solver), T0, length_ratio, alpha_order,
+        eta_zero, eta_one, eta_two, alpha_zero, alpha_one, alpha_two,
+        beta, energy);
 
-    float *voltageKick = (float *) malloc ((n_slices - 1) * sizeof(float));
-    float *factor = (float *) malloc ((n_slices - 1) * sizeof(float));
+    real_t *voltageKick = (real_t *) malloc ((n_slices - 1) * sizeof(real_t));
+    real_t *factor = (real_t *) malloc ((n_slices - 1) * sizeof(real_t));
 
     #pragma omp parallel
     {
@@ -276,7 +218,7 @@ extern "C" void linear_interp_kick_n_driftf(float * __restrict__ beam_dt,
         #pragma omp for
         for (int i = 0; i < n_slices - 1; i++) {
             voltageKick[i] =  charge * (voltage_array[i + 1] - voltage_array[i]) * inv_bin_width;
-            factor[i] = charge * voltage_array[i] - bin_centers[i] * voltageKick[i] + acc_kick;
+            factor[i] = (charge * voltage_array[i] - bin_centers[i] * voltageKick[i]) + acc_kick;
         }
 
         #pragma omp for
@@ -296,9 +238,7 @@ extern "C" void linear_interp_kick_n_driftf(float * __restrict__ beam_dt,
                 }
             }
 
-            for (int j = 0; j < loop_count; j++) {
-                beam_dt[i + j] += coeff * beam_dE[i + j];
-            }
+            drift_block(beam_dt + i, beam_dE + i, loop_count, drift);
 
         }
     }
@@ -307,3 +247,284 @@ extern "C" void linear_interp_kick_n_driftf(float * __restrict__ beam_dt,
 }
 
 
+extern "C" void linear_interp_kick_n_drift(double * __restrict__ beam_dt,
+        double * __restrict__ beam_dE,
+        const double * __restrict__ voltage_array,
+        const double * __restrict__ bin_centers,
+        const int n_slices,
+        const int n_macroparticles,
+        const double acc_kick,
+        const char * __restrict__ solver,
+        const double T0,
+        const double length_ratio,
+        const double alpha_order,
+        const double eta_zero,
+        const double eta_one,
+        const double eta_two,
+        const double alpha_zero,
+        const double alpha_one,
+        const double alpha_two,
+        const double beta,
+        const double energy,
+        const double charge)
+{
+    linear_interp_kick_n_drift_impl<double>(beam_dt, beam_dE, voltage_array,
+                                            bin_centers, n_slices,
+                                            n_macroparticles, acc_kick,
+                                            solver, T0, length_ratio,
+                                            alpha_order, eta_zero, eta_one,
+                                            eta_two, alpha_zero, alpha_one,
+                                            alpha_two, beta, energy, charge);
+}
+
+
+extern "C" void linear_interp_kick_n_driftf(float * __restrict__ beam_dt,
+        float * __restrict__ beam_dE,
+        const float * __restrict__ voltage_array,
+        const float * __restrict__ bin_centers,
+        const int n_slices,
+        const int n_macroparticles,
+        const float acc_kick,
+        const char * __restrict__ solver,
+        const float T0,
+        const float length_ratio,
+        const float alpha_order,
+        const float eta_zero,
+        const float eta_one,
+        const float eta_two,
+        const float alpha_zero,
+        const float alpha_one,
+        const float alpha_two,
+        const float beta,
+        const float energy,
+        const float charge)
+{
+    linear_interp_kick_n_drift_impl<float>(beam_dt, beam_dE, voltage_array,
+                                           bin_centers, n_slices,
+                                           n_macroparticles, acc_kick,
+                                           solver, T0, length_ratio,
+                                           alpha_order, eta_zero, eta_one,
+                                           eta_two, alpha_zero, alpha_one,
+                                           alpha_two, beta, energy, charge);
+}
+
+
+// Interpolated kick using the bins and bin fractions stored by
+// histogram_n_cache during the slicing, without reading beam_dt. The
+// voltage is given on the bin centers, hence the half-bin shift; the
+// particles outside the bin centers get no kick, as in linear_interp_kick.
+template <typename real_t>
+static void linear_interp_kick_cached_impl(real_t * __restrict__ beam_dE,
+                                           const real_t * __restrict__ voltage_array,
+                                           const int * __restrict__ bin_index,
+                                           const float * __restrict__ bin_fraction,
+                                           const real_t charge,
+                                           const int n_slices,
+                                           const int n_macroparticles,
+                                           const real_t acc_kick)
+{
+    real_t *voltageKick = (real_t *) malloc ((n_slices - 1) * sizeof(real_t));
+
+    #pragma omp parallel
+    {
+        #pragma omp for
+        for (int i = 0; i < n_slices - 1; i++)
+            voltageKick[i] = charge * (voltage_array[i + 1] - voltage_array[i]);
+
+        #pragma omp for
+        for (int i = 0; i < n_macroparticles; i++) {
+            if (bin_index[i] < 0)
+                continue;
+            const int left = bin_fraction[i] < 0.5f;
+            const int bin = bin_index[i] - left;
+            if (bin < 0 || bin >= n_slices - 1)
+                continue;
+            const real_t weight = bin_fraction[i] - 0.5f + left;
+            beam_dE[i] += charge * voltage_array[bin]
+                          + weight * voltageKick[bin] + acc_kick;
+        }
+    }
+
+    free(voltageKick);
+}
+
+
+extern "C" void linear_interp_kick_cached(double * __restrict__ beam_dE,
+                                          const double * __restrict__ voltage_array,
+                                          const int * __restrict__ bin_index,
+                                          const float * __restrict__ bin_fraction,
+                                          const double charge,
+                                          const int n_slices,
+                                          const int n_macroparticles,
+                                          const double acc_kick)
+{
+    linear_interp_kick_cached_impl<double>(beam_dE, voltage_array, bin_index,
+                                           bin_fraction, charge, n_slices,
+                                           n_macroparticles, acc_kick);
+}
+
+
+extern "C" void linear_interp_kick_cachedf(float * __restrict__ beam_dE,
+                                           const float * __restrict__ voltage_array,
+                                           const int * __restrict__ bin_index,
+                                           const float * __restrict__ bin_fraction,
+                                           const float charge,
+                                           const int n_slices,
+                                           const int n_macroparticles,
+                                           const float acc_kick)
+{
+    linear_interp_kick_cached_impl<float>(beam_dE, voltage_array, bin_index,
+                                          bin_fraction, charge, n_slices,
+                                          n_macroparticles, acc_kick);
+}
+
+
+// Kick interpolated with the quadratic (triangular-shaped-cloud) weights
+// of histogram_tsc, i.e. the gather matching the TSC deposition. As in
+// linear_interp_kick, only the particles between the first and the last bin
+// centers are kicked; the neighbours beyond the edges take the edge values.
+template <typename real_t>
+static void tsc_interp_kick_impl(const real_t * __restrict__ beam_dt,
+                                 real_t * __restrict__ beam_dE,
+                                 const real_t * __restrict__ voltage_array,
+                                 const real_t * __restrict__ bin_centers,
+                                 const real_t charge,
+                                 const int n_slices,
+                                 const int n_macroparticles,
+                                 const real_t acc_kick)
+{
+    const double inv_bin_width = (n_slices - 1)
+                                 / ((double) bin_centers[n_slices - 1]
+                                    - bin_centers[0]);
+
+    #pragma omp parallel for
+    for (int i = 0; i < n_macroparticles; i++) {
+        const double x = (beam_dt[i] - bin_centers[0]) * inv_bin_width;
+        if (!(x >= 0.) || x > n_slices - 1)
+            continue;
+        const int bin = (int) floor(x + 0.5);
+        const double d = x - bin;
+        const int left = bin > 0 ? bin - 1 : 0;
+        const int right = bin < n_slices - 1 ? bin + 1 : n_slices - 1;
+        const double voltage = 0.5 * (0.5 - d) * (0.5 - d) * voltage_array[left]
+                               + (0.75 - d * d) * voltage_array[bin]
+                               + 0.5 * (0.5 + d) * (0.5 + d) * voltage_array[right];
+        beam_dE[i] += charge * voltage + acc_kick;
+    }
+}
+
+
+extern "C" void tsc_interp_kick(const double * __restrict__ beam_dt,
+                                double * __restrict__ beam_dE,
+                                const double * __restrict__ voltage_array,
+                                const double * __restrict__ bin_centers,
+                                const double charge,
+                                const int n_slices,
+                                const int n_macroparticles,
+                                const double acc_kick)
+{
+    tsc_interp_kick_impl<double>(beam_dt, beam_dE, voltage_array, bin_centers,
+                                 charge, n_slices, n_macroparticles, acc_kick);
+}
+
+
+extern "C" void tsc_interp_kickf(const float * __restrict__ beam_dt,
+                                 float * __restrict__ beam_dE,
+                                 const float * __restrict__ voltage_array,
+                                 const float * __restrict__ bin_centers,
+                                 const float charge,
+                                 const int n_slices,
+                                 const int n_macroparticles,
+                                 const float acc_kick)
+{
+    tsc_interp_kick_impl<float>(beam_dt, beam_dE, voltage_array, bin_centers,
+                                charge, n_slices, n_macroparticles, acc_kick);
+}
+
+
+// Interpolated kick for a sparse beam (see SparseSlices): the voltage is
+// given on the bin centers of every filled bucket, stored one bucket after
+// the other. The bucket of a particle is found from its arrival time and
+// mapped to its filled bucket through bucket_to_bunch (-1 for the empty
+// buckets); within the bucket, the kick is the same as linear_interp_kick.
+template <typename real_t>
+static void sparse_linear_interp_kick_impl(const real_t * __restrict__ beam_dt,
+                                           real_t * __restrict__ beam_dE,
+                                           const real_t * __restrict__ voltage_array,
+                                           const real_t * __restrict__ bin_centers,
+                                           const int * __restrict__ bucket_to_bunch,
+                                           const real_t cut_left,
+                                           const real_t bucket_length,
+                                           const real_t charge,
+                                           const int n_slices_bucket,
+                                           const int n_buckets,
+                                           const int n_macroparticles,
+                                           const real_t acc_kick)
+{
+    const real_t inv_bucket_length = 1. / bucket_length;
+    const real_t inv_bin_width = (n_slices_bucket - 1)
+                                 / (bin_centers[n_slices_bucket - 1]
+                                    - bin_centers[0]);
+
+    #pragma omp parallel for
+    for (int i = 0; i < n_macroparticles; i++) {
+        const real_t bucket = floor((beam_dt[i] - cut_left) * inv_bucket_length);
+        if (!(bucket >= 0) || bucket >= n_buckets)
+            continue;
+        const int bunch = bucket_to_bunch[(int) bucket];
+        if (bunch < 0)
+            continue;
+        const real_t *centers = bin_centers + (size_t) bunch * n_slices_bucket;
+        const real_t *voltage = voltage_array + (size_t) bunch * n_slices_bucket;
+        const real_t x = (beam_dt[i] - centers[0]) * inv_bin_width;
+        const real_t fbin = floor(x);
+        if (fbin < 0 || fbin >= n_slices_bucket - 1)
+            continue;
+        const int bin = (int) fbin;
+        beam_dE[i] += charge * (voltage[bin] + (x - fbin)
+                                * (voltage[bin + 1] - voltage[bin]))
+                      + acc_kick;
+    }
+}
+
+
+extern "C" void sparse_linear_interp_kick(const double * __restrict__ beam_dt,
+                                          double * __restrict__ beam_dE,
+                                          const double * __restrict__ voltage_array,
+                                          const double * __restrict__ bin_centers,
+                                          const int * __restrict__ bucket_to_bunch,
+                                          const double cut_left,
+                                          const double bucket_length,
+                                          const double charge,
+                                          const int n_slices_bucket,
+                                          const int n_buckets,
+                                          const int n_macroparticles,
+                                          const double acc_kick)
+{
+    sparse_linear_interp_kick_impl<double>(beam_dt, beam_dE, voltage_array,
+                                           bin_centers, bucket_to_bunch,
+                                           cut_left, bucket_length, charge,
+                                           n_slices_bucket, n_buckets,
+                                           n_macroparticles, acc_kick);
+}
+
+
+extern "C" void sparse_linear_interp_kickf(const float * __restrict__ beam_dt,
+                                           float * __restrict__ beam_dE,
+                                           const float * __restrict__ voltage_array,
+                                           const float * __restrict__ bin_centers,
+                                           const int * __restrict__ bucket_to_bunch,
+                                           const float cut_left,
+                                           const float bucket_length,
+                                           const float charge,
+                                           const int n_slices_bucket,
+                                           const int n_buckets,
+                                           const int n_macroparticles,
+                                           const float acc_kick)
+{
+    sparse_linear_interp_kick_impl<float>(beam_dt, beam_dE, voltage_array,
+                                          bin_centers, bucket_to_bunch,
+                                          cut_left, bucket_length, charge,
+                                          n_slices_bucket, n_buckets,
+                                          n_macroparticles, acc_kick);
+}
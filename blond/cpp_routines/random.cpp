@@ -0,0 +1,73 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Counter-based random number generation. Element k of the output is the
+// element offset + k of the sequence (seed, stream, counter), so that any
+// slice of a sequence can be generated independently, e.g. by MPI ranks.
+
+#include "random.h"
+
+template <typename real_t, bool normal>
+static void random_impl(real_t * __restrict__ output, const int n,
+                        const uint64_t seed, const uint32_t stream,
+                        const uint32_t counter, const uint64_t offset)
+{
+    if (n <= 0)
+        return;
+    const int64_t first_block = offset >> 2;
+    const int64_t last_block = (offset + n - 1) >> 2;
+
+    #pragma omp parallel for
+    for (int64_t b = first_block; b <= last_block; b++) {
+        double values[4];
+        if (normal)
+            philox_normal4(seed, stream, counter, b, values);
+        else
+            philox_uniform4(seed, stream, counter, b, values);
+
+        for (int k = 0; k < 4; k++) {
+            const int64_t i = 4 * b + k - (int64_t) offset;
+            if (i >= 0 && i < n)
+                output[i] = values[k];
+        }
+    }
+}
+
+
+extern "C" void random_normal(double * __restrict__ output, const int n,
+                              const uint64_t seed, const uint32_t stream,
+                              const uint32_t counter, const uint64_t offset)
+{
+    random_impl<double, true>(output, n, seed, stream, counter, offset);
+}
+
+
+extern "C" void random_normalf(float * __restrict__ output, const int n,
+                               const uint64_t seed, const uint32_t stream,
+                               const uint32_t counter, const uint64_t offset)
+{
+    random_impl<float, true>(output, n, seed, stream, counter, offset);
+}
+
+
+extern "C" void random_uniform(double * __restrict__ output, const int n,
+                               const uint64_t seed, const uint32_t stream,
+                               const uint32_t counter, const uint64_t offset)
+{
+    random_impl<double, false>(output, n, seed, stream, counter, offset);
+}
+
+
+extern "C" void random_uniformf(float * __restrict__ output, const int n,
+                                const uint64_t seed, const uint32_t stream,
+                                const uint32_t counter, const uint64_t offset)
+{
+    random_impl<float, false>(output, n, seed, stream, counter, offset);
+}
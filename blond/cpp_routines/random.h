@@ -0,0 +1,94 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Counter-based random number generator (Philox4x32-10, Salmon et al.,
+// "Parallel random numbers: as easy as 1, 2, 3", SC11). The random numbers
+// are a pure function of (seed, stream, counter, index), so that they do
+// not depend on the number of threads or MPI ranks generating them.
+
+#ifndef RANDOM_H_
+#define RANDOM_H_
+
+#include <stdint.h>
+#include <math.h>
+
+struct philox_block {
+    uint32_t v[4];
+};
+
+static inline void philox_mulhilo(const uint32_t a, const uint32_t b,
+                                  uint32_t &hi, uint32_t &lo)
+{
+    const uint64_t product = (uint64_t) a * (uint64_t) b;
+    hi = (uint32_t) (product >> 32);
+    lo = (uint32_t) product;
+}
+
+// Four random 32-bit words for the block number 'block' of the sequence
+// identified by (seed, stream, counter)
+static inline philox_block philox4x32(const uint64_t seed,
+                                      const uint32_t stream,
+                                      const uint32_t counter,
+                                      const uint64_t block)
+{
+    uint32_t c0 = (uint32_t) block;
+    uint32_t c1 = (uint32_t) (block >> 32);
+    uint32_t c2 = counter;
+    uint32_t c3 = stream;
+    uint32_t k0 = (uint32_t) seed;
+    uint32_t k1 = (uint32_t) (seed >> 32);
+
+    for (int r = 0; r < 10; r++) {
+        uint32_t hi0, lo0, hi1, lo1;
+        philox_mulhilo(0xD2511F53, c0, hi0, lo0);
+        philox_mulhilo(0xCD9E8D57, c2, hi1, lo1);
+        c0 = hi1 ^ c1 ^ k0;
+        c1 = lo1;
+        c2 = hi0 ^ c3 ^ k1;
+        c3 = lo0;
+        k0 += 0x9E3779B9;
+        k1 += 0xBB67AE85;
+    }
+
+    philox_block out = {{c0, c1, c2, c3}};
+    return out;
+}
+
+// Uniform number in the open interval (0, 1)
+static inline double philox_uniform(const uint32_t x)
+{
+    return ((double) x + 0.5) * 2.3283064365386963e-10;
+}
+
+// Four uniform numbers in (0, 1) for the block number 'block'
+static inline void philox_uniform4(const uint64_t seed, const uint32_t stream,
+                                   const uint32_t counter, const uint64_t block,
+                                   double * __restrict__ out)
+{
+    const philox_block b = philox4x32(seed, stream, counter, block);
+    for (int k = 0; k < 4; k++)
+        out[k] = philox_uniform(b.v[k]);
+}
+
+// Four standard normal numbers for the block number 'block' (Box-Muller)
+static inline void philox_normal4(const uint64_t seed, const uint32_t stream,
+                                  const uint32_t counter, const uint64_t block,
+                                  double * __restrict__ out)
+{
+    const philox_block b = philox4x32(seed, stream, counter, block);
+    for (int k = 0; k < 4; k += 2) {
+        const double r = sqrt(-2. * log(philox_uniform(b.v[k])));
+        const double theta = 2. * M_PI * philox_uniform(b.v[k + 1]);
+        out[k] = r * cos(theta);
+        out[k + 1] = r * sin(theta);
+    }
+}
+
+#endif // RANDOM_H_
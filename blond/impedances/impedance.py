@@ -17,12 +17,32 @@
 from __future__ import division, print_function
 from builtins import range, object
 import numpy as np
+from math import factorial
 from ctypes import c_uint, c_double, c_void_p
 from scipy.constants import e
 from ..toolbox.next_regular import next_regular
 from ..utils import bmath as bm
 
 
+def _linear_interp_kick_bunches(beam, voltage, bin_centers):
+    # Induced voltage kick of the beam, bunch by bunch since the arrival
+    # times are offsets from the reference time of their bunch in the
+    # compensated dt mode, see Beam.bunch_ranges()
+    for start, stop, reference in beam.bunch_ranges():
+        if stop == start:
+            continue
+        if reference != 0:
+            bin_centers_bunch = (bin_centers.astype(np.float64) -
+                                 reference).astype(bm.precision.real_t)
+        else:
+            bin_centers_bunch = bin_centers
+        bm.linear_interp_kick(dt=beam.dt[start:stop], dE=beam.dE[start:stop],
+                              voltage=voltage,
+                              bin_centers=bin_centers_bunch,
+                              charge=beam.Particle.charge,
+                              acceleration_kick=0.)
+
+
 class TotalInducedVoltage(object):
     r"""
     Object gathering all the induced voltage contributions. The input is a
@@ -39,6 +59,13 @@ class TotalInducedVoltage(object):
         Profile object
     induced_voltage_list : object list
         List of objects for which induced voltages have to be calculated
+    merged : boolean, optional
+        If True, the total impedances of the objects computing their induced
+        voltage by a single-turn DFT with the same number of points are
+        summed, so that a single inverse FFT per group is done at every turn.
+        The induced_voltage of these objects is then not updated, and
+        merge_impedances must be called if their total_impedance is changed
+        by hand
 
     Attributes
     ----------
@@ -52,9 +79,14 @@ class TotalInducedVoltage(object):
         Array to store the computed induced voltage [V]
     time_array : float array
         Time array corresponding to induced_voltage [s]
+    merged_impedances : dict
+        Sum of the total impedances of the merged objects for every number
+        of points of the DFT, {n_fft: total_impedance}
+    unmerged_list : object list
+        Objects computing their induced voltage on their own
     """
 
-    def __init__(self, Beam, Profile, induced_voltage_list):
+    def __init__(self, Beam, Profile, induced_voltage_list, merged=False):
         """
         Constructor.
         """
@@ -74,6 +106,13 @@ class TotalInducedVoltage(object):
         # Time array of the wake in s
         self.time_array = self.profile.bin_centers
 
+        # Merged mode flag, summed impedances and other objects
+        self.merged = merged
+        self.merged_impedances = {}
+        self.unmerged_list = induced_voltage_list
+        if self.merged:
+            self.merge_impedances()
+
     def reprocess(self):
         """
         Reprocess the impedance contributions. To be run when profile changes
@@ -82,17 +121,53 @@ class TotalInducedVoltage(object):
         for induced_voltage_object in self.induced_voltage_list:
             induced_voltage_object.process()
 
+        if self.merged:
+            self.merge_impedances()
+
+    def merge_impedances(self):
+        """
+        Method to sum the total impedances of the objects sharing the same
+        frequency grid, i.e. the same profile and number of points of the
+        DFT, whose induced voltage is calculated in a single turn.
+        """
+
+        self.merged_impedances = {}
+        self.unmerged_list = []
+
+        for induced_voltage_object in self.induced_voltage_list:
+            # Only the plain single-turn DFT of _InducedVoltage can be merged
+            if (not isinstance(induced_voltage_object, _InducedVoltage)
+                    or not induced_voltage_object._plain_dft()
+                    or induced_voltage_object.profile is not self.profile):
+                self.unmerged_list.append(induced_voltage_object)
+                continue
+
+            n_fft = induced_voltage_object.n_fft
+            if n_fft not in self.merged_impedances:
+                self.merged_impedances[n_fft] = np.zeros(
+                    len(induced_voltage_object.total_impedance),
+                    dtype=bm.precision.complex_t, order='C')
+            self.merged_impedances[n_fft] += \
+                induced_voltage_object.total_impedance
+
     def induced_voltage_sum(self):
         """
         Method to sum all the induced voltages in one single array.
         """
-        # For MPI, to avoid calulating beam spectrum multiple times
-        beam_spectrum_dict = {}
+        # The beam spectra are shared through the profile, so that each of
+        # them is calculated only once
         temp_induced_voltage = 0
 
-        for induced_voltage_object in self.induced_voltage_list:
-            induced_voltage_object.induced_voltage_generation(
-                beam_spectrum_dict)
+        # Merged objects, one inverse FFT per number of points
+        for n_fft, total_impedance in self.merged_impedances.items():
+            beam_spectrum = self.profile.get_beam_spectrum(n_fft)
+            temp_induced_voltage += - (
+                self.beam.Particle.charge * e * self.beam.ratio
+                * bm.irfft(total_impedance * beam_spectrum)
+                [:self.profile.n_slices])
+
+        for induced_voltage_object in self.unmerged_list:
+            induced_voltage_object.induced_voltage_generation()
             temp_induced_voltage += \
                 induced_voltage_object.induced_voltage[:self.profile.n_slices]
 
@@ -106,9 +181,8 @@ class TotalInducedVoltage(object):
         """
 
         # Assuming the same n_fft for all, we take only the first one
-        self.induced_voltage_list[0].profile.beam_spectrum_generation(
+        beam_spectrum = self.induced_voltage_list[0].profile.get_beam_spectrum(
             self.induced_voltage_list[0].n_fft)
-        beam_spectrum = self.induced_voltage_list[0].profile.beam_spectrum
 
         self.induced_voltage = []
         min_idx = self.profile.n_slices
@@ -129,11 +203,8 @@ class TotalInducedVoltage(object):
         """
 
         self.induced_voltage_sum()
-        bm.linear_interp_kick(dt=self.beam.dt, dE=self.beam.dE,
-                              voltage=self.induced_voltage,
-                              bin_centers=self.profile.bin_centers,
-                              charge=self.beam.Particle.charge,
-                              acceleration_kick=0.)
+        _linear_interp_kick_bunches(self.beam, self.induced_voltage,
+                                    self.profile.bin_centers)
 
     def track_ghosts_particles(self, ghostBeam):
 
@@ -162,13 +233,18 @@ class _InducedVoltage(object):
     multi_turn_wake : boolean, optional
         Multi-turn wake enable flag
     mtw_mode : boolean, optional
-        Multi-turn wake mode can be 'freq' or 'time' (default)
+        Multi-turn wake mode can be 'freq', 'time' (default) or 'resonator'
+        (Resonators sources only)
     RFParams : object, optional
         RFStation object for turn counter and revolution period
     use_regular_fft : boolean
         use the next_regular function to ensure regular number for FFT
         calculations (default is True for efficient calculations, for
         better control of the sampling frequency False is preferred)
+    mtw_tolerance : float, optional
+        In time domain multi-turn wake mode, the memory only covers the
+        wake above mtw_tolerance times its maximum (default 0, the whole
+        wake length)
 
     Attributes
     ----------
@@ -187,14 +263,21 @@ class _InducedVoltage(object):
     multi_turn_wake : boolean
         Multi-turn wake enable flag
     mtw_mode : boolean
-        Multi-turn wake mode can be 'freq' or 'time' (default)
+        Multi-turn wake mode can be 'freq', 'time' (default) or 'resonator'
+        (Resonators sources only)
     use_regular_fft : boolean
         User set value to use (default) or not regular numbers for FFTs
+    mtw_state : complex array
+        Ringing field of every resonator left by the previous turns, in
+        'resonator' multi-turn wake mode
+    n_mtw_effective : int
+        Number of points of the induced voltage kept in the ring buffer
+        memory, in 'time' multi-turn wake mode
     """
 
     def __init__(self, Beam, Profile, frequency_resolution=None,
                  wake_length=None, multi_turn_wake=False, mtw_mode='time',
-                 RFParams=None, use_regular_fft=True):
+                 RFParams=None, use_regular_fft=True, mtw_tolerance=0.):
 
         # Beam object in order to access the beam info
         self.beam = Beam
@@ -214,15 +297,21 @@ class _InducedVoltage(object):
         # Use regular numbers for fft (optional)
         self.use_regular_fft = use_regular_fft
 
+        # Relative level of the wake below which the time domain multi-turn
+        # memory is truncated (optional)
+        self.mtw_tolerance = mtw_tolerance
+
         # RFStation object for turn counter and revolution period
         self.RFParams = RFParams
 
         # Multi-turn wake enable flag
         self.multi_turn_wake = multi_turn_wake
 
-        # Multi-turn wake mode can be 'freq' or 'time' (default). If 'freq'
-        # is used, each turn the induced voltage of previous turns is shifted
-        # in the frequency domain. For 'time', a linear interpolation is used.
+        # Multi-turn wake mode can be 'freq', 'time' (default) or
+        # 'resonator'. If 'freq' is used, each turn the induced voltage of
+        # previous turns is shifted in the frequency domain. For 'time', a
+        # linear interpolation is used. For 'resonator', the field of every
+        # resonator is propagated analytically from turn to turn.
         self.mtw_mode = mtw_mode
 
         self.process()
@@ -265,7 +354,12 @@ class _InducedVoltage(object):
             raise RuntimeError('Error: only one of wake_length or ' +
                                'frequency_resolution can be specified.')
 
-        if self.multi_turn_wake:
+        if self.multi_turn_wake and self.mtw_mode == 'resonator':
+            self.front_wake_buffer = 0
+            self.process_mtw_resonator()
+
+            self.induced_voltage_generation = self.induced_voltage_mtw_resonator
+        elif self.multi_turn_wake:
             # Number of points of the memory array for multi-turn wake
             self.n_mtw_memory = self.n_induced_voltage
 
@@ -299,28 +393,32 @@ class _InducedVoltage(object):
                 self.time_mtw = np.linspace(0, self.wake_length,
                                             self.n_mtw_memory, endpoint=False,
                                             dtype=bm.precision.real_t)
+                # The ring buffer is sized at the first turn, once the wake
+                # is known
+                self.n_mtw_effective = None
 
             # Array to add and shift in time the multi-turn wake over the turns
             self.mtw_memory = np.zeros(self.n_mtw_memory,
                                        dtype=bm.precision.real_t, order='C')
 
             # Select induced voltage generation method to be used
-            self.induced_voltage_generation = self.induced_voltage_mtw
+            if self.mtw_mode == 'freq':
+                self.induced_voltage_generation = self.induced_voltage_mtw
+            else:
+                self.induced_voltage_generation = self.induced_voltage_mtw_time
         else:
             self.induced_voltage_generation = self.induced_voltage_1turn
 
-    def induced_voltage_1turn(self, beam_spectrum_dict={}):
+    def induced_voltage_1turn(self, beam_spectrum_dict=None):
         """
         Method to calculate the induced voltage at the current turn. DFTs are
         used for calculations in time and frequency domain (see classes below)
         """
 
-        if self.n_fft not in beam_spectrum_dict:
-            self.profile.beam_spectrum_generation(self.n_fft)
-            beam_spectrum_dict[self.n_fft] = self.profile.beam_spectrum
-
-        # self.profile.beam_spectrum_generation(self.n_fft)
-        beam_spectrum = beam_spectrum_dict[self.n_fft]
+        if beam_spectrum_dict is not None and self.n_fft in beam_spectrum_dict:
+            beam_spectrum = beam_spectrum_dict[self.n_fft]
+        else:
+            beam_spectrum = self.profile.get_beam_spectrum(self.n_fft)
 
         induced_voltage = - (self.beam.Particle.charge * e * self.beam.ratio
                              * bm.irfft(self.total_impedance.astype(dtype=bm.precision.complex_t, order='C', copy=False) * beam_spectrum))
@@ -328,7 +426,18 @@ class _InducedVoltage(object):
         self.induced_voltage = induced_voltage[:self.n_induced_voltage].astype(
             dtype=bm.precision.real_t, order='C', copy=False)
 
-    def induced_voltage_mtw(self, beam_spectrum_dict={}):
+    def _plain_dft(self):
+        """
+        True if the induced voltage is only calculated for the current turn,
+        by the DFT of induced_voltage_1turn above
+        """
+
+        return (type(self).induced_voltage_1turn
+                is _InducedVoltage.induced_voltage_1turn
+                and self.induced_voltage_generation
+                == self.induced_voltage_1turn)
+
+    def induced_voltage_mtw(self, beam_spectrum_dict=None):
         """
         Method to calculate the induced voltage taking into account the effect
         from previous passages (multi-turn wake)
@@ -351,6 +460,81 @@ class _InducedVoltage(object):
 
         self.induced_voltage = self.mtw_memory[:self.n_induced_voltage]
 
+    def process_mtw_resonator(self):
+        """
+        Method to set up the multi-turn wake of resonators. The wake of every
+        resonator is the real part of C exp(s t), so that the wake of all the
+        previous turns is stored in one complex number per resonator, the
+        state, referred to the last bin of the profile.
+        """
+
+        sources = getattr(self, 'wake_source_list', None)
+        if sources is None:
+            sources = getattr(self, 'impedance_source_list', [])
+        if len(sources) == 0 or not all(hasattr(source, 'omega_R')
+                                        for source in sources):
+            # MultiTurnWakeError
+            raise RuntimeError('Error: mtw_mode "resonator" can only be ' +
+                               'used with Resonators sources.')
+
+        R_S = np.concatenate([source.R_S for source in sources])
+        omega_R = np.concatenate([source.omega_R for source in sources])
+        Q = np.concatenate([source.Q for source in sources])
+        if np.any(Q <= 0.5):
+            # MultiTurnWakeError
+            raise RuntimeError('Error: mtw_mode "resonator" requires ' +
+                               'quality factors above 0.5.')
+
+        alpha = omega_R / (2 * Q)
+        omega_bar = np.sqrt(omega_R**2 - alpha**2)
+        s = -alpha + 1j * omega_bar
+
+        # Time of the bins from the first one, and to the last one
+        bin_centers = np.array(self.profile.bin_centers, dtype=float)
+        t_ref = bin_centers[-1]
+        self.mtw_frame = t_ref - bin_centers[0]
+        # The exponentials below never exceed one as long as the profile is
+        # shorter than a revolution period
+        self._mtw_evaluation = np.exp(np.outer(s, bin_centers
+                                               - bin_centers[0]))
+        self._mtw_accumulation = np.exp(np.outer(s, t_ref - bin_centers))
+
+        if (getattr(self, 'mtw_state', None) is not None
+                and len(self.mtw_state) == len(s)):
+            # Reprocessing: the state is referred to the new last bin
+            self.mtw_state *= np.exp(s * (t_ref - self._mtw_t_ref))
+        else:
+            self.mtw_state = np.zeros(len(s), dtype=complex)
+
+        self.mtw_s = s
+        self.mtw_coefficients = 2 * alpha * R_S * (1 + 1j * alpha / omega_bar)
+        self._mtw_t_ref = t_ref
+
+    def induced_voltage_mtw_resonator(self, beam_spectrum_dict=None):
+        """
+        Method to calculate the induced voltage taking into account the effect
+        from previous passages, propagating the ringing field of every
+        resonator over one revolution period
+        """
+
+        t_rev = self.RFParams.t_rev[self.RFParams.counter[0]]
+
+        # Induced voltage of the current turn calculation
+        self.induced_voltage_1turn(beam_spectrum_dict)
+        self.induced_voltage[self.n_induced_voltage -
+                             self.front_wake_buffer:] = 0
+
+        # Field of the previous turns in the bins of the profile
+        amplitudes = self.mtw_coefficients * self.mtw_state \
+            * np.exp(self.mtw_s * (t_rev - self.mtw_frame))
+        self.induced_voltage[:self.profile.n_slices] -= \
+            self.beam.Particle.charge * e * self.beam.ratio \
+            * np.dot(amplitudes, self._mtw_evaluation).real
+
+        # Add the current turn to the state, referred to its last bin
+        self.mtw_state = self.mtw_state * np.exp(self.mtw_s * t_rev) \
+            + np.dot(self._mtw_accumulation, self.profile.n_macroparticles)
+
     def shift_trev_freq(self):
         """
         Method to shift the induced voltage by a revolution period in the
@@ -366,16 +550,87 @@ class _InducedVoltage(object):
         # circular convolution
         self.mtw_memory[-int(self.buffer_size):] = 0
 
+    def process_mtw_time(self):
+        """
+        Method to set up the ring buffer of the multi-turn wake in time
+        domain. The memory is limited to the part of the induced voltage
+        where the wake is above mtw_tolerance times its maximum.
+        """
+
+        self.n_mtw_effective = self.n_mtw_memory
+        if self.mtw_tolerance > 0 and hasattr(self, 'total_impedance'):
+            # Wake from the (pseudo-)impedance, for both time and frequency
+            # domain objects
+            wake = np.abs(bm.irfft(self.total_impedance.astype(
+                dtype=bm.precision.complex_t, order='C', copy=False)))
+            above = np.nonzero(wake[:self.n_mtw_memory] > self.mtw_tolerance
+                               * np.max(wake))[0]
+            n_wake = int(above[-1]) + 1 if len(above) else 1
+            self.n_mtw_effective = min(self.n_mtw_memory,
+                                       int(self.profile.n_slices) + n_wake)
+
+        # Memory on the grid of the bins in absolute time: the bin of the
+        # first point of the current turn, and its fractional offset
+        self.mtw_memory = np.zeros(self.n_mtw_effective + 2)
+        self.mtw_start = 0
+        self.mtw_fraction = 0.
+        self._mtw_range = np.arange(self.n_mtw_effective + 1)
+
     def shift_trev_time(self):
         """
         Method to shift the induced voltage by a revolution period in the
-        time domain (linear interpolation)
+        time domain. The memory is a ring buffer, so that only the bins
+        leaving it are cleared.
         """
 
         t_rev = self.RFParams.t_rev[self.RFParams.counter[0]]
-        self.mtw_memory = bm.interp_const_space(self.time_mtw + t_rev,
-                                                self.time_mtw, self.mtw_memory,
-                                                left=0, right=0)
+        shift = self.mtw_fraction + t_rev / self.profile.bin_size
+        n_shift = int(np.floor(shift))
+        self.mtw_fraction = shift - n_shift
+
+        n_memory = len(self.mtw_memory)
+        if n_shift >= n_memory:
+            self.mtw_memory[:] = 0
+        else:
+            self.mtw_memory[(self.mtw_start + np.arange(n_shift))
+                            % n_memory] = 0
+        self.mtw_start = (self.mtw_start + n_shift) % n_memory
+
+    def induced_voltage_mtw_time(self, beam_spectrum_dict=None):
+        """
+        Method to calculate the induced voltage taking into account the effect
+        from previous passages (multi-turn wake), in time domain. Every turn
+        is interpolated once to the memory and once back to the profile.
+        """
+
+        if self.n_mtw_effective is None:
+            self.process_mtw_time()
+        n_effective = self.n_mtw_effective
+
+        # Shift of the memory wake field by the current revolution period
+        self.shift_trev()
+
+        # Induced voltage of the current turn calculation
+        self.induced_voltage_1turn(beam_spectrum_dict)
+        voltage = np.zeros(n_effective + 1)
+        voltage[:n_effective] = self.induced_voltage[:n_effective]
+
+        # Previous turns, at the points of the current turn lying at
+        # mtw_fraction after the bins of the memory
+        fraction = self.mtw_fraction
+        index = (self.mtw_start + self._mtw_range) % len(self.mtw_memory)
+        memory = self.mtw_memory[index]
+        previous = (1 - fraction) * memory[:-1] + fraction * memory[1:]
+
+        # Current turn, interpolated on the bins of the memory
+        self.mtw_memory[index[1:]] += \
+            fraction * voltage[:-1] + (1 - fraction) * voltage[1:]
+        self.mtw_memory[index[0]] += (1 - fraction) * voltage[0]
+
+        self.induced_voltage = np.zeros(self.n_induced_voltage,
+                                        dtype=bm.precision.real_t)
+        self.induced_voltage[:n_effective] = \
+            voltage[:n_effective] + previous
 
     def _track(self):
         """
@@ -384,11 +639,8 @@ class _InducedVoltage(object):
 
         self.induced_voltage_generation()
 
-        bm.linear_interp_kick(dt=self.beam.dt, dE=self.beam.dE,
-                              voltage=self.induced_voltage,
-                              bin_centers=self.profile.bin_centers,
-                              charge=self.beam.Particle.charge,
-                              acceleration_kick=0.)
+        _linear_interp_kick_bunches(self.beam, self.induced_voltage,
+                                    self.profile.bin_centers)
 
 
 class InducedVoltageTime(_InducedVoltage):
@@ -410,11 +662,24 @@ class InducedVoltageTime(_InducedVoltage):
     RFParams : object, optional
         RFStation object for turn counter and revolution period
     mtw_mode : boolean, optional
-        Multi-turn wake mode can be 'freq' or 'time' (default)
+        Multi-turn wake mode can be 'freq', 'time' (default) or 'resonator'
+        (Resonators sources only)
     use_regular_fft : boolean
         use the next_regular function to ensure regular number for FFT
         calculations (default is True for efficient calculations, for
         better control of the sampling frequency False is preferred)
+    convolution_method : str, optional
+        Convolution of the profile with the wake, 'fft' (default) on the
+        padded DFT grid, 'direct' in the time domain, 'overlap_save' by FFTs
+        of short blocks, or 'auto' to select the cheapest one from a cost
+        model at every process()
+    wake_threshold : float, optional
+        The direct and overlap-save convolutions use the wake only up to its
+        last point above wake_threshold times its maximum
+    mtw_tolerance : float, optional
+        In time domain multi-turn wake mode, the memory only covers the
+        wake above mtw_tolerance times its maximum (default 0, the whole
+        wake length)
 
     Attributes
     ----------
@@ -424,15 +689,40 @@ class InducedVoltageTime(_InducedVoltage):
         Total wake array of all sources in :math:`\Omega / s`
     use_regular_fft : boolean
         User set value to use (default) or not regular numbers for FFTs
+    convolution_method : str
+        Convolution method in use, 'fft', 'direct' or 'overlap_save'
+    n_wake_truncated : int
+        Number of points of the wake used by the direct and overlap-save
+        convolutions
+    n_fft_block : int
+        Number of points of the FFTs of the overlap-save blocks
     """
 
+    # Modelled costs, relative to one multiply-add of the direct
+    # convolution: per n log2(n) of a real FFT, per point of an overlap-save
+    # block (copies), and fixed costs of a call to the FFT and to the C++
+    # library
+    _cost_fft = 1.
+    _cost_block = 8.
+    _cost_fft_call = 5e3
+    _cost_call = 2e4
+
     def __init__(self, Beam, Profile, wake_source_list, wake_length=None,
                  multi_turn_wake=False, RFParams=None, mtw_mode=None,
-                 use_regular_fft=True):
+                 use_regular_fft=True, convolution_method='fft',
+                 wake_threshold=1e-12, mtw_tolerance=0.):
 
         # Wake sources list (e.g. list of Resonator objects)
         self.wake_source_list = wake_source_list
 
+        if convolution_method not in ['fft', 'direct', 'overlap_save',
+                                      'auto']:
+            # ConvolutionMethodError
+            raise RuntimeError('Error: convolution_method should be "fft", '
+                               + '"direct", "overlap_save" or "auto".')
+        self.convolution_method_input = convolution_method
+        self.wake_threshold = wake_threshold
+
         # Total wake array of all sources in :math:`\Omega / s`
         self.total_wake = 0
 
@@ -440,7 +730,8 @@ class InducedVoltageTime(_InducedVoltage):
         _InducedVoltage.__init__(self, Beam, Profile, frequency_resolution=None,
                                  wake_length=wake_length, multi_turn_wake=multi_turn_wake,
                                  RFParams=RFParams, mtw_mode=mtw_mode,
-                                 use_regular_fft=use_regular_fft)
+                                 use_regular_fft=use_regular_fft,
+                                 mtw_tolerance=mtw_tolerance)
 
     def process(self):
         """
@@ -486,6 +777,111 @@ class InducedVoltageTime(_InducedVoltage):
         # frequency domain (padding zeros)
         self.total_impedance = bm.rfft(self.total_wake, self.n_fft)
 
+        self.select_convolution()
+
+    def select_convolution(self):
+        """
+        Method to set up the convolution of the profile with the total wake,
+        selecting the cheapest method in 'auto' mode.
+        """
+
+        n_slices = int(self.profile.n_slices)
+
+        # Wake truncated after its decay
+        above = np.nonzero(np.abs(self.total_wake) > self.wake_threshold
+                           * np.max(np.abs(self.total_wake)))[0]
+        self.n_wake_truncated = int(above[-1]) + 1 if len(above) else 1
+        n_wake = self.n_wake_truncated
+
+        # Modelled cost of every method; the profile spectrum and the
+        # inverse FFT for the full FFT
+        n_output = n_slices + n_wake - 1
+        costs = {'fft': 2 * self._cost_fft * self.n_fft
+                 * np.log2(self.n_fft) + 2 * self._cost_fft_call,
+                 'direct': float(n_slices) * n_wake + self._cost_call}
+
+        # Blocks of the overlap-save convolution, a few times longer than
+        # the wake
+        self.n_fft_block = 0
+        for factor in [2, 4, 8, 16, 32]:
+            n_fft_block = next_regular(max(factor * n_wake, 16))
+            if n_fft_block >= self.n_fft:
+                break
+            n_blocks = -(-n_output // (n_fft_block - n_wake + 1))
+            cost = n_blocks * n_fft_block * (2 * self._cost_fft
+                                             * np.log2(n_fft_block)
+                                             + self._cost_block) \
+                + 6 * self._cost_fft_call
+            if cost < costs.get('overlap_save', np.inf):
+                costs['overlap_save'] = cost
+                self.n_fft_block = n_fft_block
+
+        if self.convolution_method_input == 'auto':
+            self.convolution_method = min(costs, key=costs.get)
+        elif (self.convolution_method_input == 'overlap_save'
+                and self.n_fft_block == 0):
+            # The wake is too long for blocks shorter than the full FFT
+            self.convolution_method = 'fft'
+        else:
+            self.convolution_method = self.convolution_method_input
+
+        self.truncated_wake = np.ascontiguousarray(
+            self.total_wake[:n_wake], dtype=bm.precision.real_t)
+        self._convolution = np.zeros(max(n_output, self.n_induced_voltage),
+                                     dtype=bm.precision.real_t, order='C')
+
+        if self.convolution_method == 'overlap_save':
+            n_step = self.n_fft_block - n_wake + 1
+            n_blocks = -(-n_output // n_step)
+            # Profile preceded by n_wake - 1 zeros, cut in n_blocks
+            # overlapping blocks of n_fft_block points
+            self._block_signal = np.zeros((n_blocks - 1) * n_step
+                                          + self.n_fft_block)
+            self._block_impedance = np.fft.rfft(self.truncated_wake,
+                                                self.n_fft_block)
+
+    def induced_voltage_1turn(self, beam_spectrum_dict=None):
+        """
+        Method to calculate the induced voltage at the current turn, through
+        the selected convolution method.
+        """
+
+        if self.convolution_method == 'fft':
+            _InducedVoltage.induced_voltage_1turn(self, beam_spectrum_dict)
+            return
+
+        n_slices = int(self.profile.n_slices)
+        n_wake = self.n_wake_truncated
+        n_output = n_slices + n_wake - 1
+
+        if self.convolution_method == 'direct':
+            bm.convolve(self.profile.n_macroparticles.astype(
+                dtype=bm.precision.real_t, order='C', copy=False),
+                self.truncated_wake, result=self._convolution[:n_output])
+        else:
+            n_step = self.n_fft_block - n_wake + 1
+            self._block_signal[n_wake-1:n_wake-1+n_slices] = \
+                self.profile.n_macroparticles
+            blocks = np.lib.stride_tricks.sliding_window_view(
+                self._block_signal, self.n_fft_block)[::n_step]
+            self._convolution[:n_output] = np.fft.irfft(
+                np.fft.rfft(blocks, axis=1) * self._block_impedance,
+                self.n_fft_block, axis=1)[:, n_wake-1:].ravel()[:n_output]
+
+        self.induced_voltage = - (self.beam.Particle.charge * e
+                                  * self.beam.ratio
+                                  * self._convolution[:self.n_induced_voltage])
+
+    def _plain_dft(self):
+        """
+        True if the induced voltage is only calculated for the current turn,
+        by the DFT of _InducedVoltage.induced_voltage_1turn
+        """
+
+        return (self.convolution_method == 'fft'
+                and self.induced_voltage_generation
+                == self.induced_voltage_1turn)
+
 
 class InducedVoltageFreq(_InducedVoltage):
     r"""
@@ -508,11 +904,16 @@ class InducedVoltageFreq(_InducedVoltage):
     RFParams : object, optional
         RFStation object for turn counter and revolution period
     mtw_mode : boolean, optional
-        Multi-turn wake mode can be 'freq' or 'time' (default)
+        Multi-turn wake mode can be 'freq', 'time' (default) or 'resonator'
+        (Resonators sources only)
     use_regular_fft : boolean
         use the next_regular function to ensure regular number for FFT
         calculations (default is True for efficient calculations, for
         better control of the sampling frequency False is preferred)
+    mtw_tolerance : float, optional
+        In time domain multi-turn wake mode, the memory only covers the
+        wake above mtw_tolerance times its maximum (default 0, the whole
+        wake length)
 
     Attributes
     ----------
@@ -529,7 +930,7 @@ class InducedVoltageFreq(_InducedVoltage):
     def __init__(self, Beam, Profile, impedance_source_list,
                  frequency_resolution=None, multi_turn_wake=False,
                  front_wake_length=0, RFParams=None, mtw_mode=None,
-                 use_regular_fft=True):
+                 use_regular_fft=True, mtw_tolerance=0.):
 
         # Impedance sources list (e.g. list of Resonator objects)
         self.impedance_source_list = impedance_source_list
@@ -547,7 +948,8 @@ class InducedVoltageFreq(_InducedVoltage):
         _InducedVoltage.__init__(self, Beam, Profile, wake_length=None,
                                  frequency_resolution=frequency_resolution,
                                  multi_turn_wake=multi_turn_wake, RFParams=RFParams,
-                                 mtw_mode=mtw_mode, use_regular_fft=use_regular_fft)
+                                 mtw_mode=mtw_mode, use_regular_fft=use_regular_fft,
+                                 mtw_tolerance=mtw_tolerance)
 
     def process(self):
         """
@@ -631,7 +1033,7 @@ class InductiveImpedance(_InducedVoltage):
         # Call the __init__ method of the parent class
         _InducedVoltage.__init__(self, Beam, Profile, RFParams=RFParams)
 
-    def induced_voltage_1turn(self, beam_spectrum_dict={}):
+    def induced_voltage_1turn(self, beam_spectrum_dict=None):
         """
         Method to calculate the induced voltage through the derivative of the
         profile. The impedance must be a constant Z/n.
@@ -736,19 +1138,10 @@ class InducedVoltageResonator(_InducedVoltage):
         self._reOmegaP = self.omega_r * self._Qtilde / self.Q
         self._imOmegaP = self.omega_r / (2.*self.Q)
 
-        # Each the 'n_resonator' rows of the matrix holds the induced voltage
-        # at the 'n_time' time-values of one cavity. For internal use.
-        self._tmp_matrix = np.ones(
-            (self.n_resonators, self.n_time), dtype=bm.precision.real_t, order='C')
-
         # Slopes of the line segments. For internal use.
         self._kappa1 = np.zeros(
             int(self.profile.n_slices-1), dtype=bm.precision.real_t, order='C')
 
-        # Matrix to hold n_times many tArray[t]-bin_centers arrays.
-        self._deltaT = np.zeros(
-            (self.n_time, self.profile.n_slices), dtype=bm.precision.real_t, order='C')
-
         # Call the __init__ method of the parent class [calls process()]
         _InducedVoltage.__init__(self, Beam, Profile, wake_length=None,
                                  frequency_resolution=None,
@@ -762,17 +1155,19 @@ class InducedVoltageResonator(_InducedVoltage):
         _InducedVoltage.process(self)
 
         # Since profile object changed, need to assign the proper dimensions to
-        # _kappa1 and _deltaT
+        # _kappa1
         self._kappa1 = np.zeros(
             int(self.profile.n_slices-1), dtype=bm.precision.real_t, order='C')
-        self._deltaT = np.zeros(
-            (self.n_time, self.profile.n_slices), dtype=bm.precision.real_t, order='C')
+        if self.atLineDensityTimes:
+            self.tArray = self.profile.bin_centers
+            self.n_time = len(self.tArray)
 
-    def induced_voltage_1turn(self, beam_spectrum_dict={}):
+    def induced_voltage_1turn(self, beam_spectrum_dict=None):
         r"""
         Method to calculate the induced voltage through linearily 
         interpolating the line density and applying the analytic equation
-        to the result.
+        to the result. The contributions of the line segments are summed
+        recursively for every resonator, in linear time.
         """
 
         # Compute the slopes of the line sections of the linearily interpolated
@@ -782,28 +1177,17 @@ class InducedVoltageResonator(_InducedVoltage):
             / (self.beam.n_macroparticles*self.profile.bin_size)
         # [:] makes kappa pass by reference
 
-        for t in range(self.n_time):
-            self._deltaT[t] = self.tArray[t]-self.profile.bin_centers
-
-        # For each cavity compute the induced voltage and store in the r-th row
-        for r in range(self.n_resonators):
-            tmp_sum = ((((2 *
-                          np.cos(self._reOmegaP[r] * self._deltaT)
-                          + np.sin(self._reOmegaP[r] * self._deltaT)/self._Qtilde[r]) *
-                         np.exp(-self._imOmegaP[r] * self._deltaT)) *
-                        self.Heaviside(self._deltaT)) -
-                       np.sign(self._deltaT))
-            # np.sum performs the sum over the points of the line density
-            self._tmp_matrix[r] = self.R[r]/(2*self.omega_r[r]*self.Q[r]) \
-                * np.sum(self._kappa1 * np.diff(tmp_sum), axis=1)
-
-        # To obtain the voltage, sum the contribution of each cavity...
-        self.induced_voltage = self._tmp_matrix.sum(axis=0)
-        # ... and multiply with bunch charge
+        # Change of slope at every point of the line density
+        coefficients = np.zeros(int(self.profile.n_slices), dtype=float)
+        coefficients[1:] += self._kappa1
+        coefficients[:-1] -= self._kappa1
+
+        # Sum of the resonators, multiplied with bunch charge
+        self.induced_voltage = bm.resonator_induced_voltage(
+            coefficients, self.profile.bin_centers, self.tArray, self.R,
+            self.omega_r, self.Q)
         self.induced_voltage *= -self.beam.Particle.charge*e \
             * self.beam.n_macroparticles*self.beam.ratio
-        self.induced_voltage = self.induced_voltage.astype(
-            dtype=bm.precision.real_t, order='C', copy=False)
 
     # Implementation of Heaviside function
     def Heaviside(self, x):
@@ -811,3 +1195,211 @@ class InducedVoltageResonator(_InducedVoltage):
         Heaviside function, which returns 1 if x>1, 0 if x<0, and 1/2 if x=0
         """
         return 0.5*(np.sign(x) + 1.)
+
+
+class InducedVoltageSparse(object):
+    r"""
+    Induced voltage of a sparse beam sliced with SparseSlices, computed from
+    the profiles of the filled buckets only, without a dense profile over the
+    whole train. The wake of a bunch on itself and on the bunches in the
+    next exact_buckets buckets is obtained from an exact convolution per
+    filled bucket. For the longer distances, the wake is sampled at the
+    bucket spacing and expanded in a Taylor series over the bucket; the
+    bunch-to-bunch voltage then follows from convolutions over the buckets
+    of the first taylor_order moments of the bunch profiles. The expansion
+    assumes that the long-range wake varies slowly over the bunch length;
+    otherwise exact_buckets has to be increased. The cost scales with the
+    number of filled buckets instead of the length of the train.
+
+    Parameters
+    ----------
+    Beam : object
+        Beam object
+    SparseSlices : object
+        SparseSlices object
+    wake_source_list : list
+        Wake sources list (e.g. list of Resonator objects)
+    exact_buckets : int, optional
+        Number of buckets following a bunch in which its wake is computed
+        exactly (default is 1)
+    taylor_order : int, optional
+        Order of the expansion of the wake beyond exact_buckets, from 0
+        (point-like bunches) to 2 (default)
+
+    Attributes
+    ----------
+    beam : object
+        Copy of the Beam object in order to access the beam info
+    sparse_slices : object
+        Copy of the SparseSlices object in order to access the profiles
+    wake_source_list : list
+        Wake sources list (e.g. list of Resonator objects)
+    exact_buckets : int
+        Number of buckets in which the wake is computed exactly
+    taylor_order : int
+        Order of the long-range wake expansion
+    bucket_length : float
+        Length of a bucket [s]
+    n_buckets : int
+        Number of buckets from the first to the last filled bucket
+    bucket_to_bunch : int32 array
+        Index of the filled bucket of every bucket, -1 if empty
+    induced_voltage : float array
+        Induced voltage on the bin centers of every filled bucket [V]
+    """
+
+    def __init__(self, Beam, SparseSlices, wake_source_list, exact_buckets=1,
+                 taylor_order=2):
+
+        if taylor_order not in [0, 1, 2]:
+            raise RuntimeError('taylor_order should be 0, 1 or 2')
+        if exact_buckets < 0:
+            raise RuntimeError('exact_buckets should not be negative')
+
+        # Beam object in order to access the beam info
+        self.beam = Beam
+
+        # SparseSlices object in order to access the profiles
+        self.sparse_slices = SparseSlices
+
+        # Wake sources list (e.g. list of Resonator objects)
+        self.wake_source_list = wake_source_list
+
+        self.exact_buckets = int(exact_buckets)
+        self.taylor_order = int(taylor_order)
+
+        self.process()
+
+    def process(self):
+        """
+        Reprocess the wake contributions. To be run when the slicing changes
+        """
+
+        n_slices = self.sparse_slices.n_slices_bucket
+        n_filled = self.sparse_slices.n_filled_buckets
+        cut_left = self.sparse_slices.cut_left_array
+
+        self.bucket_length = self.sparse_slices.cut_right_array[0] \
+            - cut_left[0]
+        bin_size = self.bucket_length / n_slices
+
+        # Position of the filled buckets from the first one
+        self._positions = np.round((cut_left - cut_left[0])
+                                   / self.bucket_length).astype(int)
+        self.n_buckets = int(self._positions[-1]) + 1
+        self.bucket_to_bunch = -np.ones(self.n_buckets, dtype=np.int32)
+        self.bucket_to_bunch[self._positions] = np.arange(n_filled)
+
+        # Exact part: every filled bucket and the exact_buckets buckets
+        # before it, one after the other; the empty buckets point to a row
+        # of zeros at the end of self._profiles
+        window = self._positions[:, np.newaxis] \
+            + np.arange(-self.exact_buckets, 1)
+        self._window = np.full(window.shape, n_filled, dtype=int)
+        inside = window >= 0
+        self._window[inside] = self.bucket_to_bunch[window[inside]]
+        self._window[self._window < 0] = n_filled
+        self._profiles = np.zeros((n_filled + 1, n_slices))
+
+        self._n_window = (self.exact_buckets + 1) * n_slices
+        # Only the last bucket of the circular convolution is used
+        self.n_fft = next_regular(self._n_window + n_slices - 1)
+        self._short_impedance = np.fft.rfft(
+            self.sum_wakes(np.arange(self._n_window) * bin_size), self.n_fft)
+
+        # Long-range part: wake and its derivatives (finite differences
+        # over one bin) at the distances beyond exact_buckets
+        distances = np.arange(self.n_buckets)
+        self._long_range = self.n_buckets > self.exact_buckets + 1
+        if self._long_range:
+            times = distances[:, np.newaxis] * self.bucket_length \
+                + np.array([-bin_size, 0, bin_size])
+            wake = self.sum_wakes(times.ravel()).reshape(times.shape)
+            derivatives = np.array([
+                wake[:, 1],
+                (wake[:, 2] - wake[:, 0]) / (2 * bin_size),
+                (wake[:, 2] - 2 * wake[:, 1] + wake[:, 0]) / bin_size**2
+            ])[:self.taylor_order + 1]
+            derivatives[:, distances <= self.exact_buckets] = 0
+            self.n_fft_long = next_regular(2 * self.n_buckets - 1)
+            self._long_impedance = np.fft.rfft(derivatives, self.n_fft_long,
+                                               axis=1)
+
+        # Powers of the bin centers from the bucket centers
+        x = (np.arange(n_slices) + 0.5) * bin_size - 0.5 * self.bucket_length
+        self._x_powers = x[np.newaxis, :] \
+            ** np.arange(self.taylor_order + 1)[:, np.newaxis]
+
+        self.induced_voltage = np.zeros((n_filled, n_slices),
+                                        dtype=bm.precision.real_t, order='C')
+
+    def sum_wakes(self, time_array):
+        """
+        Summing all the wake contributions in one total wake.
+        """
+
+        total_wake = np.zeros(time_array.shape)
+        for wake_object in self.wake_source_list:
+            wake_object.wake_calc(time_array)
+            total_wake += wake_object.wake
+
+        return total_wake
+
+    def induced_voltage_generation(self):
+        """
+        Method to calculate the induced voltage on all the filled buckets.
+        """
+
+        profiles = self.sparse_slices.n_macroparticles_array
+        n_filled, n_slices = profiles.shape
+        self._profiles[:n_filled] = profiles
+
+        # Exact convolution over the window of every filled bucket
+        source = self._profiles[self._window].reshape(n_filled, -1)
+        voltage = np.fft.irfft(np.fft.rfft(source, self.n_fft, axis=1)
+                               * self._short_impedance, self.n_fft,
+                               axis=1)[:, self._n_window - n_slices:
+                                       self._n_window]
+
+        if self._long_range:
+            # Moments of the profiles, convolved over the buckets with the
+            # wake derivatives; the k-th order term is
+            # W^(k) (x_a - x_b)^k / k!, expanded in powers of x_a and x_b
+            moments = np.zeros((self.taylor_order + 1, self.n_buckets))
+            moments[:, self._positions] = self._x_powers.dot(profiles.T)
+            moments = np.fft.rfft(moments, self.n_fft_long, axis=1)
+            for m in range(self.taylor_order + 1):
+                spectrum = 0
+                for n in range(self.taylor_order + 1 - m):
+                    k = m + n
+                    spectrum = spectrum + (-1)**n \
+                        / (factorial(m) * factorial(n)) \
+                        * self._long_impedance[k] * moments[n]
+                convolution = np.fft.irfft(spectrum, self.n_fft_long)
+                voltage += convolution[self._positions, np.newaxis] \
+                    * self._x_powers[m]
+
+        self.induced_voltage = (-self.beam.Particle.charge * e
+                                * self.beam.ratio * voltage).astype(
+            dtype=bm.precision.real_t, order='C', copy=False)
+
+    def track(self):
+        """
+        Track method to apply the induced voltage kick on the beam.
+        """
+
+        self.induced_voltage_generation()
+        bin_centers = self.sparse_slices.bin_centers_array
+        for start, stop, reference in self.beam.bunch_ranges():
+            # Arrival times relative to the reference time of their bunch in
+            # the compensated dt mode, see Beam.bunch_ranges()
+            if stop == start:
+                continue
+            if reference != 0:
+                bin_centers = (self.sparse_slices.bin_centers_array.astype(
+                    np.float64) - reference).astype(bm.precision.real_t)
+            bm.sparse_linear_interp_kick(
+                self.beam.dt[start:stop], self.beam.dE[start:stop],
+                self.induced_voltage, bin_centers, self.bucket_to_bunch,
+                self.sparse_slices.cut_left_array[0] - reference,
+                self.bucket_length, self.beam.Particle.charge, 0.)
@@ -0,0 +1,208 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+'''
+**Content-addressed on-disk cache of impedance and wake arrays. The arrays
+computed by the impedance sources are stored in .npy files named after a hash
+of the source parameters and of the frequency or time grid, and are loaded
+back as memory maps, so that repeated runs, MPI ranks and parameter scans
+share them. The cache is disabled until use_impedance_cache() is called.**
+'''
+
+from __future__ import division, print_function
+from builtins import object
+import os
+import tempfile
+import hashlib
+from functools import wraps
+import numpy as np
+from ..utils import bmath as bm
+
+_active_cache = None
+
+
+def use_impedance_cache(directory):
+    """
+    Enables the impedance cache in the given directory, created if needed;
+    None disables it.
+
+    Parameters
+    ----------
+    directory : str or None
+        Directory of the cache files
+
+    Returns
+    -------
+    cache : ImpedanceCache or None
+        The active cache
+    """
+
+    global _active_cache
+    if directory is None:
+        _active_cache = None
+    else:
+        _active_cache = ImpedanceCache(directory)
+    return _active_cache
+
+
+def active_cache():
+    """
+    Returns the active ImpedanceCache, None if the cache is disabled.
+    """
+
+    return _active_cache
+
+
+class ImpedanceCache(object):
+    r"""
+    Directory of arrays addressed by the hash of the inputs they were
+    computed from.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the cache files
+
+    Attributes
+    ----------
+    directory : str
+        Absolute path of the directory of the cache files
+    hits : int
+        Number of arrays loaded from the cache
+    misses : int
+        Number of arrays computed and stored in the cache
+    """
+
+    def __init__(self, directory):
+
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *items):
+        """
+        Hash of the items, which can be (nested tuples, lists and dicts of)
+        numbers, strings, None and numpy arrays.
+        """
+
+        digest = hashlib.sha256()
+        self._update(digest, items)
+        return digest.hexdigest()
+
+    def _update(self, digest, item):
+
+        if isinstance(item, np.ndarray) or isinstance(item, np.generic):
+            item = np.ascontiguousarray(item)
+            digest.update(('array%s%s' % (item.dtype.str, item.shape)).encode())
+            digest.update(item.tobytes())
+        elif isinstance(item, (tuple, list)):
+            digest.update(('seq%d' % len(item)).encode())
+            for element in item:
+                self._update(digest, element)
+        elif isinstance(item, dict):
+            self._update(digest, sorted(item.items()))
+        elif item is None or isinstance(item, (bool, int, float, complex,
+                                               str)):
+            digest.update(('%s:%r' % (type(item).__name__, item)).encode())
+        else:
+            # WrongCalcError
+            raise RuntimeError('ImpedanceCache: cannot hash an object of ' +
+                               'type %s' % type(item).__name__)
+
+    def path(self, key, name):
+        """
+        Path of the cache file of the array name under the key.
+        """
+
+        return os.path.join(self.directory, '%s.%s.npy' % (key, name))
+
+    def load(self, key, names):
+        """
+        Loads the arrays names under the key as copy-on-write memory maps,
+        i.e. they can be modified without changing the cache files. Returns
+        None if any of them is missing.
+        """
+
+        paths = [self.path(key, name) for name in names]
+        if not all(os.path.isfile(path) for path in paths):
+            return None
+        self.hits += 1
+        return [np.asarray(np.load(path, mmap_mode='c')) for path in paths]
+
+    def store(self, key, names, arrays):
+        """
+        Stores the arrays under the key. Every file is written under a
+        temporary name and renamed, so that concurrent writers (e.g. MPI
+        ranks) never expose partial files. Empty and non-numeric arrays are
+        not stored.
+        """
+
+        arrays = [np.asarray(array) for array in arrays]
+        if any(array.size == 0 or array.dtype.hasobject for array in arrays):
+            return
+        self.misses += 1
+        for name, array in zip(names, arrays):
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory,
+                                                     suffix='.tmp')
+            with os.fdopen(descriptor, 'wb') as output:
+                np.save(output, array)
+            os.replace(temporary, self.path(key, name))
+
+    def clear(self):
+        """
+        Removes all the cache files.
+        """
+
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy'):
+                os.remove(os.path.join(self.directory, name))
+
+
+def cached_calc(grid_name, *names):
+    r"""
+    Decorator of the imped_calc and wake_calc methods of the impedance
+    sources. The method is called with the grid as first argument and sets
+    the attributes names of the object; with the cache enabled, these are
+    loaded from the cache if the source parameters (returned by
+    _cache_parameters(), None if the source cannot be cached), the grid and
+    the other arguments of the call were already seen.
+
+    Parameters
+    ----------
+    grid_name : str or None
+        Attribute storing the grid, None if the method does not store it
+    \*names : str
+        Attributes set by the method
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrap(self, grid, *args, **kwargs):
+            cache = _active_cache
+            parameters = None if cache is None else self._cache_parameters()
+            if parameters is None:
+                return method(self, grid, *args, **kwargs)
+
+            key = cache.key(type(self).__name__, method.__name__, parameters,
+                            np.asarray(grid), args, kwargs,
+                            np.dtype(bm.precision.real_t).str)
+            arrays = cache.load(key, names)
+            if arrays is None:
+                method(self, grid, *args, **kwargs)
+                cache.store(key, names,
+                            [getattr(self, name) for name in names])
+            else:
+                if grid_name is not None:
+                    setattr(self, grid_name, grid)
+                for name, array in zip(names, arrays):
+                    setattr(self, name, array)
+        return wrap
+    return decorator
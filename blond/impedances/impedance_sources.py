@@ -24,8 +24,10 @@ from scipy.constants import c, physical_constants
 from scipy.special import gamma as gamma_func
 from scipy.special import kv, airy, polygamma
 from scipy import integrate
+from scipy.interpolate import CubicSpline
 import mpmath
 from ..utils import bmath as bm
+from .impedance_cache import cached_calc
 
 
 class _ImpedanceObject(object):
@@ -69,6 +71,15 @@ class _ImpedanceObject(object):
                                   'This object is probably meant to be used in the ' +
                                   'time domain')
 
+    def _cache_parameters(self):
+        """
+        Parameters identifying the wake and impedance of the object in the
+        impedance cache (see impedance_cache.py), None if the object is not
+        cached.
+        """
+
+        return None
+
 
 class InputTable(_ImpedanceObject):
     r"""
@@ -153,6 +164,15 @@ class InputTable(_ImpedanceObject):
                 self.Re_Z_array_loaded = np.hstack((0, self.Re_Z_array_loaded))
                 self.Im_Z_array_loaded = np.hstack((0, self.Im_Z_array_loaded))
 
+    def _cache_parameters(self):
+
+        if hasattr(self, 'wake_array'):
+            return (np.asarray(self.time_array), np.asarray(self.wake_array))
+        return (np.asarray(self.frequency_array_loaded),
+                np.asarray(self.Re_Z_array_loaded),
+                np.asarray(self.Im_Z_array_loaded))
+
+    @cached_calc('new_time_array', 'wake')
     def wake_calc(self, new_time_array):
         r"""
         The wake from the table is interpolated using the new time array.
@@ -174,6 +194,7 @@ class InputTable(_ImpedanceObject):
         self.wake = np.interp(self.new_time_array, self.time_array,
                               self.wake_array, right=0)
 
+    @cached_calc('frequency_array', 'impedance', 'Re_Z_array', 'Im_Z_array')
     def imped_calc(self, new_frequency_array):
         r"""
         The impedance from the table is interpolated using the new frequency
@@ -620,6 +641,12 @@ class ResistiveWall(_ImpedanceObject):
         self.__resistivity = 1 / conductivity
         self.__conductivity = conductivity
 
+    def _cache_parameters(self):
+
+        return (self.pipe_radius, self.pipe_length, float(self.conductivity),
+                self.Z0)
+
+    @cached_calc('frequency_array', 'impedance')
     def imped_calc(self, frequency_array):
         r"""
         Impedance calculation method as a function of frequency.
@@ -690,6 +717,13 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
     the kwarg `high_frequency_transition` sets the frequency (in units of the critical
     frequency) above which a simpler approximate expression is used.
 
+    The exact free-space impedance divided by :math:`Z_0 \gamma f/f_{\text{crit}}` is a
+    universal function of :math:`f/f_{\text{crit}}`. With the default `method` 'fast', it is
+    interpolated from a table computed once by Gauss-Legendre quadrature of its integral
+    representations (quadrature only outside of the table). The method 'mpmath' evaluates
+    the hypergeometric functions of eq. A4 with mpmath and the integrals of eq. A5 with
+    :func:`~scipy.integrate.quad_vec`; it is much slower and kept as reference.
+
     Note
     ----------
     The (incoherent) energy loss due to synchrotron radiation is *not* included. To include it,
@@ -737,7 +771,13 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
 
     """
 
-    def __init__(self, r_bend, gamma=None, chamber_height=np.inf):
+    # Range of f/f_crit and relative accuracy of the table of the free-space impedance
+    _fs_table_range = (1e-6, 100.)
+    _fs_table_tolerance = 1e-10
+    # Shared by all the objects, built at the first use
+    _fs_table = None
+
+    def __init__(self, r_bend, gamma=None, chamber_height=np.inf, method='fast'):
         r"""
 
 
@@ -758,6 +798,9 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
         parallel_plates : TYPE, optional
             If ture, the parallel plates impedance is computed. In this case, `chamber_height`
             must be specified. If false, the free-space impedance is computed. The default is False.
+        method : str, optional
+            Evaluation of the exact free-space impedance, 'fast' (tabulated universal function)
+            or 'mpmath' (reference implementation). The default is 'fast'.
 
         Raises
         ------
@@ -781,6 +824,13 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
         self.gamma = gamma
         self.chamber_height = chamber_height
 
+        if method not in ['fast', 'mpmath']:
+            # WrongCalcError
+            raise RuntimeError(
+                'method for impedance calculation in CoherentSynchrotronRadiation object '
+                + 'not recognized')
+        self.method = method
+
         # test for input consistency
         if self.r_bend <= 0.0:
             raise ValueError('bending radius must be greater 0')
@@ -823,6 +873,13 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
                 'method for impedance calculation in CoherentSynchrotronRadiation object '
                 + 'not recognized')
 
+    def _cache_parameters(self):
+
+        return (float(self.r_bend),
+                None if self.gamma is None else float(self.gamma),
+                float(self.chamber_height), self.Z0, self.method)
+
+    @cached_calc(None, 'impedance')
     def _pp_low_frequency(self, frequency_array, u_max=10, high_frequency_transition=np.inf):
         """
         Computes the parallel-plates impedance according to eq. 8 of [Chao2011]_. For frequencies
@@ -884,18 +941,16 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
 
         pMax = pMax_array[-1]  # maximum p; assumes largest frequency is at last array element
 
-        p_matrix = np.zeros(shape=(len(n_array), pMax), dtype=int)
+        p_range = np.arange(pMax)
+        p_matrix = np.where(p_range < pMax_array[:, np.newaxis], (2*p_range+1)**2, 0)
 
         # matrix to store the summands
         Z_matrix = np.zeros_like(p_matrix, dtype=complex)
 
-        for nit, n in enumerate(n_array):
-            # first element of p_matrix is 1 to ensure evaluation at u_min...
-            # ... if n is large enough so that u_min < 100, (i.e. airy(u_min) does not yield np.nan)
-            if pMax_array[nit] == 0 and n > (np.pi/self.Delta)**1.5 / np.sqrt(2) / 100**0.75:
-                p_matrix[nit,0] = 1
-            else:
-                p_matrix[nit,:pMax_array[nit]] = (2*np.arange(pMax_array[nit])+1)**2
+        # first element of p_matrix is 1 to ensure evaluation at u_min...
+        # ... if n is large enough so that u_min < 100, (i.e. airy(u_min) does not yield np.nan)
+        p_matrix[(pMax_array == 0)
+                 * (n_array > (np.pi/self.Delta)**1.5 / np.sqrt(2) / 100**0.75), 0] = 1
 
         # evaluate Airy functions only at these values of p
         indexes = p_matrix > 0
@@ -925,6 +980,7 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
         self.impedance[exact_indexes] *= self.Z0 * 4*np.pi**2 * 2**(1/3) \
             * 1/self.Delta / n_array**(1/3)
 
+    @cached_calc(None, 'impedance')
     def _pp_spectrum(self, frequency_array, zeta_max=9, **kwargs):
         """
         Computes the parallel-plates impedance, based on eq. B13 of [Murphy1997]_.
@@ -976,18 +1032,16 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
 
         pMax = pMax_array[-1]  # maximum p; assumes largest frequency is at last array element
 
-        p_matrix = np.zeros(shape=(len(n_array),pMax), dtype=int)
+        p_range = np.arange(pMax)
+        p_matrix = np.where(p_range < pMax_array[:, np.newaxis], (2*p_range+1)**2, 0)
 
         # matrix to store the summands
         Z_matrix = np.zeros_like(p_matrix, dtype=complex)
 
-        for nit, n in enumerate(n_array):
-            # first element of p_matrix is 1 to ensure evaluation at zeta_min...
-            # ... if n is large enough so that zeta_min < zeta_max
-            if pMax_array[nit] == 0 and n > 3**0.25 * (np.pi/(0.5*self.Delta))**1.5 / zeta_max**0.75:
-                p_matrix[nit,0] = 1
-            else:
-                p_matrix[nit,:pMax_array[nit]] = (2*np.arange(pMax_array[nit])+1)**2
+        # first element of p_matrix is 1 to ensure evaluation at zeta_min...
+        # ... if n is large enough so that zeta_min < zeta_max
+        p_matrix[(pMax_array == 0)
+                 * (n_array > 3**0.25 * (np.pi/(0.5*self.Delta))**1.5 / zeta_max**0.75), 0] = 1
 
         # evaluate h function only at these values of p
         indexes = p_matrix > 0
@@ -1038,6 +1092,7 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
             * (z * (airy_array[0]**2 + airy_array[2]**2) / 12**(1/3)
                - airy_array[1]**2 - airy_array[3]**2)
 
+    @cached_calc(None, 'impedance')
     def _fs_spectrum(self, frequency_array, epsilon=1e-6,
                      low_frequency_transition=1e-5, high_frequency_transition=10):
         """
@@ -1058,7 +1113,8 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
         epsilon : float, optional
             The first integral of eq. A5 has an integrable singularity at the upper limit 1,
             which is (currently) not handled by :func:`~scipy.integrate.quad_vec`.
-            Therefore, the integration is only up to 1-`epsilon`.
+            Therefore, the integration is only up to 1-`epsilon`. Only used by the 'mpmath'
+            method.
 
         Raises
         ------
@@ -1107,6 +1163,11 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
         if np.count_nonzero(exact_indexes) == 0:
             return
 
+        if self.method == 'fast':
+            self.impedance[exact_indexes] = self._fs_universal(l_array[exact_indexes]) \
+                * self.Z0 * self.gamma * l_array[exact_indexes]
+            return
+
         # Real part: eq. A4, is solved analytically with Mathematica 12.1.0.0 in terms of
         # generalized hypergeometric functions
         # Imaginary part: quad_vec can't handle the integrable singularity at y=1 for y<1, we need
@@ -1124,6 +1185,159 @@ class CoherentSynchrotronRadiation(_ImpedanceObject):
 
         self.impedance[exact_indexes] *= self.Z0 * self.gamma * l_array[exact_indexes]
 
+    def _fs_universal(self, l_array):
+        """
+        Exact free-space impedance divided by :math:`Z_0 \gamma f/f_{\text{crit}}`, interpolated
+        from the table inside of its range and integrated outside.
+
+        Parameters
+        ----------
+        l_array : float array
+            Frequencies in units of the critical frequency
+
+        Returns
+        -------
+        complex array
+            universal function
+        """
+
+        table = CoherentSynchrotronRadiation._fs_table_build()
+
+        l_array = np.asarray(l_array, dtype=float)
+        result = np.empty(l_array.shape, dtype=complex)
+
+        inside = (l_array >= self._fs_table_range[0]) * (l_array <= self._fs_table_range[1])
+        if np.count_nonzero(inside) > 0:
+            result[inside] = self._fs_table_eval(table, l_array[inside])
+        if np.count_nonzero(~inside) > 0:
+            result[~inside] = self._fs_quadrature(l_array[~inside])
+
+        return result
+
+    @staticmethod
+    def _fs_quadrature(l_array, n_nodes=16, max_size=1 << 20):
+        r"""
+        Exact free-space impedance divided by :math:`Z_0 \gamma f/f_{\text{crit}}`, by composite
+        Gauss-Legendre quadrature. With :math:`y=\cosh s` and :math:`y=\sin\theta` in the
+        integrals of eqs. A4 and A5, the integrands are smooth:
+
+        .. math::
+            \Re = \frac{\sqrt{3}}{4} \int_0^\infty e^{-l\cosh s}
+            \frac{\cosh(5s/3)}{\cosh s} ds
+
+            \Im = \int_0^{\pi/2} e^{-l\sin\theta}
+            \frac{\cos(5\theta/3) - \cos\theta}{2\sin\theta} d\theta
+            - \int_0^\infty e^{-l\cosh s} \frac{\sinh s - \sinh(5s/3)/4}{\cosh s} ds
+
+        The integrals are truncated where the exponential is below :math:`e^{-50}` times its
+        maximum, and split in at least 8 panels of at most unit length.
+
+        Parameters
+        ----------
+        l_array : float array
+            Frequencies in units of the critical frequency
+        n_nodes : int, optional
+            Nodes per panel. The default is 16.
+        max_size : int, optional
+            Maximum number of integrand values evaluated at once. The default is 2**20.
+
+        Returns
+        -------
+        complex array
+            universal function
+        """
+
+        l_array = np.asarray(l_array, dtype=float)
+        result = np.empty(l_array.shape, dtype=complex)
+        if l_array.size == 0:
+            return result
+
+        nodes, weights = np.polynomial.legendre.leggauss(n_nodes)
+        nodes = 0.5 * (nodes + 1)
+        weights = 0.5 * weights
+
+        s_max = np.arccosh(1 + 50 / l_array)
+        theta_max = np.arcsin(np.minimum(1, 50 / l_array))
+        n_panels = max(8, int(np.ceil(np.max(s_max))))
+        # Nodes on [0, 1] of all the panels
+        unit_nodes = ((np.arange(n_panels)[:, np.newaxis] + nodes) / n_panels).flatten()
+        unit_weights = np.tile(weights / n_panels, n_panels)
+
+        chunk = max(1, max_size // len(unit_nodes))
+        for start in range(0, len(l_array), chunk):
+            l = l_array[start:start+chunk, np.newaxis]
+
+            s = s_max[start:start+chunk, np.newaxis] * unit_nodes
+            exponential = np.exp(-l * np.cosh(s)) / np.cosh(s)
+            real = np.sqrt(3) / 4 * np.sum(exponential * np.cosh(5*s/3) * unit_weights, axis=1)
+            imag2 = np.sum(exponential * (np.sinh(s) - 0.25*np.sinh(5*s/3)) * unit_weights,
+                           axis=1)
+
+            theta = theta_max[start:start+chunk, np.newaxis] * unit_nodes
+            imag1 = np.sum(np.exp(-l * np.sin(theta)) * (np.cos(5*theta/3) - np.cos(theta))
+                           / (2 * np.sin(theta)) * unit_weights, axis=1)
+
+            result[start:start+chunk] = s_max[start:start+chunk] * real \
+                + 1j * (theta_max[start:start+chunk] * imag1 - s_max[start:start+chunk] * imag2)
+
+        return result
+
+    @staticmethod
+    def _fs_table_values(l_array):
+        # Smooth functions of log(l) interpolated in the table: the logarithm of the (positive)
+        # real part, and the imaginary part scaled by its asymptotes at low and high frequency
+        universal = CoherentSynchrotronRadiation._fs_quadrature(l_array)
+        return np.log(universal.real), universal.imag * l_array**(2/3) * (1 + l_array)**(4/3)
+
+    @staticmethod
+    def _fs_table_eval(table, l_array):
+        x = np.log(l_array)
+        return np.exp(table[0](x)) + 1j * table[1](x) / (l_array**(2/3) * (1 + l_array)**(4/3))
+
+    @staticmethod
+    def _fs_table_build():
+        """
+        Returns the cubic splines of the table of the free-space impedance, built at the first
+        call. The grid in log(f/f_crit) is refined until the interpolation error at the middle
+        of all the intervals is below the tolerance, relative to the real part and to the
+        modulus.
+
+        Returns
+        -------
+        tuple
+            splines of the real and imaginary parts
+        """
+
+        cls = CoherentSynchrotronRadiation
+        if cls._fs_table is not None:
+            return cls._fs_table
+
+        x = np.linspace(np.log(cls._fs_table_range[0]), np.log(cls._fs_table_range[1]), 129)
+        real, imag = cls._fs_table_values(np.exp(x))
+
+        while True:
+            table = (CubicSpline(x, real), CubicSpline(x, imag))
+
+            x_mid = 0.5 * (x[1:] + x[:-1])
+            real_mid, imag_mid = cls._fs_table_values(np.exp(x_mid))
+            l_mid = np.exp(x_mid)
+            reference = np.exp(real_mid) + 1j * imag_mid / (l_mid**(2/3) * (1 + l_mid)**(4/3))
+            interpolated = cls._fs_table_eval(table, l_mid)
+
+            error = max(np.max(np.abs(interpolated.real / reference.real - 1)),
+                        np.max(np.abs(interpolated - reference) / np.abs(reference)))
+            if error < cls._fs_table_tolerance or len(x) > 1 << 16:
+                break
+
+            # The midpoints become nodes of the refined grid
+            x = np.append(np.column_stack((x[:-1], x_mid)).ravel(), x[-1])
+            real = np.append(np.column_stack((real[:-1], real_mid)).ravel(), real[-1])
+            imag = np.append(np.column_stack((imag[:-1], imag_mid)).ravel(), imag[-1])
+
+        cls._fs_table = table
+        return table
+
+    @cached_calc(None, 'impedance')
     def _fs_low_frequency_wrapper(self, frequency_array):
         """
         Wrapper to compute the free-space low-frequency approximation of the synchrotron
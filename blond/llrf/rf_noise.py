@@ -17,7 +17,7 @@ amplitude as a function of bunch length**
 from __future__ import division, print_function
 from builtins import range, object
 import numpy as np
-import numpy.random as rnd
+from ..utils import bmath as bm
 from scipy.constants import c
 from ..plots.plot import *
 from ..plots.plot_llrf import *
@@ -90,11 +90,10 @@ class FlatSpectrum(object):
             raise RuntimeError('ERROR: The choice of Fourier transform for the\
              RF noise generation could not be recognized. Use "r" or "c".')
             
-        # Generate white noise in time domain
-        rnd.seed(self.seed1)
-        r1 = rnd.random_sample(nt)
-        rnd.seed(self.seed2)
-        r2 = rnd.random_sample(nt)
+        # Generate white noise in time domain, with the counter-based
+        # random number generator
+        r1 = bm.random_uniform(nt, self.seed1).astype(np.float64)
+        r2 = bm.random_uniform(nt, self.seed2).astype(np.float64)
         if transform==None or transform=='r':
             Gt = np.cos(2*np.pi*r1) * np.sqrt(-2*np.log(r2))     
         elif transform=='c':  
@@ -354,14 +353,14 @@ class LHCNoiseFB(object):
         bucket_min = (phi_RF + 2.*np.pi*self.bunch_pattern)/omega_RF
         bucket_max = bucket_min + 2.*np.pi/omega_RF
 
-        # Bunch-by-bunch FWHM bunch length
-        for i in range(len(self.bunch_pattern)):
-            
-            bind = np.where((self.profile.bin_centers - bucket_min[i])*
-                            (self.profile.bin_centers - bucket_max[i]) < 0)[0]
-            hheight = np.max(self.profile.n_macroparticles[bind])/2.
-            index = np.where(self.profile.n_macroparticles[bind] > hheight)[0]
-            self.bl_meas_bbb[i] = self.fwhm_interpolation(bind[index], hheight)
-            
+        # Bunch-by-bunch FWHM bunch length, bins strictly inside the buckets
+        first = np.searchsorted(self.profile.bin_centers, bucket_min,
+                                side='right').astype(np.int32)
+        last = np.searchsorted(self.profile.bin_centers, bucket_max,
+                               side='left').astype(np.int32)
+        left, right = bm.fwhm_batch(self.profile.n_macroparticles,
+                                    self.profile.bin_centers, first, last)
+        self.bl_meas_bbb[:] = cfwhm*(right - left)
+
         # Average FWHM bunch length            
         self.bl_meas = np.mean(self.bl_meas_bbb)
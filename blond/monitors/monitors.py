@@ -216,7 +216,7 @@ class BunchMonitor(object):
 
         i = self.i_turn % self.buffer_time
 
-        self.b_np_alive[i] = self.beam.n_macroparticles_alive
+        self.b_np_alive[i] = self.beam.n_alive_statistics
         self.b_mean_dt[i] = self.beam.mean_dt
         self.b_mean_dE[i] = self.beam.mean_dE
         self.b_sigma_dt[i] = self.beam.sigma_dt
@@ -371,9 +371,15 @@ class MultiBunchMonitor(object):
 
     ''' Class able to save multi-bunch profile, i.e. the histogram derived from
         the slicing.
+        With several bunches, the bunch-by-bunch mean and standard deviation
+        of dt and dE are saved as well if the filling pattern is given, by
+        bunch_spacing_buckets or by the bucket number of each bunch
+        (bunch_buckets). The RF bucket number 0 starts at dt_offset [s].
     '''
 
-    def __init__(self, filename, n_turns, profile, rf, Nbunches, buffer_size=100):
+    def __init__(self, filename, n_turns, profile, rf, Nbunches, buffer_size=100,
+                 bunch_spacing_buckets=None, bunch_buckets=None,
+                 dt_offset=0.):
 
         self.h5file = hp.File(filename + '.h5', 'w')
         self.n_turns = n_turns
@@ -411,24 +417,41 @@ class MultiBunchMonitor(object):
         self.b_fwhm_bunch_length = np.zeros(
             (self.buffer_size, self.Nbunches), dtype=float)
 
+        # The phase-space statistics are computed per bunch when the filling
+        # pattern is known
+        self.bunch_buckets = bunch_buckets
+        if bunch_buckets is None and bunch_spacing_buckets is not None:
+            self.bunch_buckets = bunch_spacing_buckets * \
+                np.arange(self.Nbunches)
+        self.phase_space_stats = (self.Nbunches == 1 or
+                                  self.bunch_buckets is not None)
+        self.dt_offset = dt_offset
+
         if self.Nbunches == 1:
             # All these can be calculated only when single bunch
             self.create_data(
-                'mean_dE', self.h5file['default'], (
+                'dE_norm', self.h5file['default'], (
                     self.n_turns, self.Nbunches),
                 dtype='float64')
+
             self.create_data(
-                'dE_norm', self.h5file['default'], (
+                'dt_norm', self.h5file['default'], (
                     self.n_turns, self.Nbunches),
                 dtype='float64')
 
+            self.b_dE_norm = np.zeros(
+                (self.buffer_size, self.Nbunches), dtype=float)
+            self.b_dt_norm = np.zeros(
+                (self.buffer_size, self.Nbunches), dtype=float)
+
+        if self.phase_space_stats:
             self.create_data(
-                'mean_dt', self.h5file['default'], (
+                'mean_dE', self.h5file['default'], (
                     self.n_turns, self.Nbunches),
                 dtype='float64')
 
             self.create_data(
-                'dt_norm', self.h5file['default'], (
+                'mean_dt', self.h5file['default'], (
                     self.n_turns, self.Nbunches),
                 dtype='float64')
 
@@ -445,11 +468,6 @@ class MultiBunchMonitor(object):
             self.b_mean_dt = np.zeros(
                 (self.buffer_size, self.Nbunches), dtype=float)
 
-            self.b_dE_norm = np.zeros(
-                (self.buffer_size, self.Nbunches), dtype=float)
-            self.b_dt_norm = np.zeros(
-                (self.buffer_size, self.Nbunches), dtype=float)
-
             self.b_std_dE = np.zeros(
                 (self.buffer_size, self.Nbunches), dtype=float)
             self.b_std_dt = np.zeros(
@@ -477,10 +495,19 @@ class MultiBunchMonitor(object):
 
         self.b_turns[idx] = turn
         self.b_profile[idx] = self.profile.n_macroparticles.astype(np.int32)
-        self.b_losses[idx] = self.beam.losses
+        self.b_losses[idx] = self.beam.n_macroparticles_lost
         self.b_fwhm_bunch_position[idx] = self.profile.bunchPosition
         self.b_fwhm_bunch_length[idx] = self.profile.bunchLength
 
+        if self.Nbunches > 1 and self.phase_space_stats:
+            self.beam.bunch_statistics(self.rf.t_rf[0, turn],
+                                       bunch_buckets=self.bunch_buckets,
+                                       dt_offset=self.dt_offset)
+            self.b_mean_dE[idx] = self.beam.bunch_mean_dE
+            self.b_mean_dt[idx] = self.beam.bunch_mean_dt
+            self.b_std_dE[idx] = self.beam.bunch_sigma_dE
+            self.b_std_dt[idx] = self.beam.bunch_sigma_dt
+
         if self.Nbunches == 1:
             self.b_mean_dE[idx] = self.beam.mean_dE
             self.b_mean_dt[idx] = self.beam.mean_dt
@@ -513,9 +540,11 @@ class MultiBunchMonitor(object):
         self.h5group['fwhm_bunch_length'][i1_h5:i2_h5] = self.b_fwhm_bunch_length[i1_b:i2_b]
 
         if self.Nbunches == 1:
-            self.h5group['mean_dE'][i1_h5:i2_h5] = self.b_mean_dE[i1_b:i2_b]
             self.h5group['dE_norm'][i1_h5:i2_h5] = self.b_dE_norm[i1_b:i2_b]
             self.h5group['dt_norm'][i1_h5:i2_h5] = self.b_dt_norm[i1_b:i2_b]
+
+        if self.phase_space_stats:
+            self.h5group['mean_dE'][i1_h5:i2_h5] = self.b_mean_dE[i1_b:i2_b]
             self.h5group['mean_dt'][i1_h5:i2_h5] = self.b_mean_dt[i1_b:i2_b]
             self.h5group['std_dE'][i1_h5:i2_h5] = self.b_std_dE[i1_b:i2_b]
             self.h5group['std_dt'][i1_h5:i2_h5] = self.b_std_dt[i1_b:i2_b]
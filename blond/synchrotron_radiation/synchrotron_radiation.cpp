@@ -14,21 +14,13 @@ Project website: http://blond.web.cern.ch/
 
 #include <math.h>
 #include <stdlib.h>
-#include <random>
-#include <thread>
-#include <chrono>
-#include "../cpp_routines/openmp.h"
-
-#ifdef BOOST
-#include <boost/random.hpp>
-#include <boost/random/normal_distribution.hpp>
-using namespace boost;
-
-#else
-using namespace std;
-
-#endif
+#include <time.h>
+#include "../cpp_routines/random.h"
 
+// Seed of the counter-based random number generator; the random numbers of
+// the quantum excitation depend on (seed, stream, turn, kick, particle id)
+// only, so that they do not depend on the number of threads, on how the beam
+// is split between MPI ranks or on the order of the particles
 long unsigned int seed = clock();
 
 // This function calculates and applies only the synchrotron radiation damping term
@@ -55,34 +47,37 @@ extern "C" void synchrotron_radiation(double * __restrict__ beam_dE, const doubl
 
 // This function calculates and applies synchrotron radiation damping and
 // quantum excitation terms
-extern "C" void synchrotron_radiation_full(double * __restrict__ beam_dE, const double U0,
+extern "C" void synchrotron_radiation_full(double * __restrict__ beam_dE,
+        const int64_t * __restrict__ beam_id, const double U0,
         const int n_macroparticles, const double sigma_dE,
         const double tau_z, const double energy,
-        const int n_kicks)
+        const int n_kicks, const int turn, const int stream)
 {
 
-    std::hash<std::thread::id> hash;
-
     // Quantum excitation constant
     const double const_quantum_exc = 2.0 * sigma_dE / sqrt(tau_z) * energy;
 
     // Adjusted SR damping constant
     const double const_synch_rad = 1.0 - 2.0 / tau_z;
 
-    // Random number generator for the quantum excitation term
-
     for (int j = 0; j < n_kicks; j++) {
         // Compute synchrotron radiation damping term and
-        // Applies the quantum excitation term
+        // Applies the quantum excitation term. The particle id selects one
+        // of the four random numbers of the block id / 4; the block is
+        // reused by the following particles while their ids are consecutive
+        const uint32_t counter = (uint32_t) turn * n_kicks + j;
         #pragma omp parallel
         {
-            static __thread mt19937_64 *gen = nullptr;
-            if (!gen) gen = new mt19937_64(seed + omp_get_thread_num());
-            static thread_local normal_distribution<> dist(0.0, 1.0);
+            double random[4];
+            int64_t block = -1;
             #pragma omp for
             for (int i = 0; i < n_macroparticles; i++) {
+                if ((beam_id[i] >> 2) != block) {
+                    block = beam_id[i] >> 2;
+                    philox_normal4(seed, stream, counter, block, random);
+                }
                 beam_dE[i] = beam_dE[i] * const_synch_rad
-                             + const_quantum_exc * dist(*gen)
+                             + const_quantum_exc * random[beam_id[i] & 3]
                              - U0;
             }
         }
@@ -114,34 +109,37 @@ extern "C" void synchrotron_radiationf(float * __restrict__ beam_dE, const float
 
 // This function calculates and applies synchrotron radiation damping and
 // quantum excitation terms
-extern "C" void synchrotron_radiation_fullf(float * __restrict__ beam_dE, const float U0,
+extern "C" void synchrotron_radiation_fullf(float * __restrict__ beam_dE,
+        const int64_t * __restrict__ beam_id, const float U0,
         const int n_macroparticles, const float sigma_dE,
         const float tau_z, const float energy,
-        const int n_kicks)
+        const int n_kicks, const int turn, const int stream)
 {
 
-    std::hash<std::thread::id> hash;
-
     // Quantum excitation constant
     const float const_quantum_exc = 2.0 * sigma_dE / sqrt(tau_z) * energy;
 
     // Adjusted SR damping constant
     const float const_synch_rad = 1.0 - 2.0 / tau_z;
 
-    // Random number generator for the quantum excitation term
-
     for (int j = 0; j < n_kicks; j++) {
         // Compute synchrotron radiation damping term and
-        // Applies the quantum excitation term
+        // Applies the quantum excitation term. The particle id selects one
+        // of the four random numbers of the block id / 4; the block is
+        // reused by the following particles while their ids are consecutive
+        const uint32_t counter = (uint32_t) turn * n_kicks + j;
         #pragma omp parallel
         {
-            static __thread mt19937_64 *gen = nullptr;
-            if (!gen) gen = new mt19937_64(seed + omp_get_thread_num());
-            static thread_local normal_distribution<> dist(0.0, 1.0);
+            double random[4];
+            int64_t block = -1;
             #pragma omp for
             for (int i = 0; i < n_macroparticles; i++) {
+                if ((beam_id[i] >> 2) != block) {
+                    block = beam_id[i] >> 2;
+                    philox_normal4(seed, stream, counter, block, random);
+                }
                 beam_dE[i] = beam_dE[i] * const_synch_rad
-                             + const_quantum_exc * dist(*gen)
+                             + const_quantum_exc * random[beam_id[i] & 3]
                              - U0;
             }
         }
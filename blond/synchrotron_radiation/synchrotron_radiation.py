@@ -166,6 +166,10 @@ class SynchrotronRadiation(object):
                 self.ring.energy[0, i_turn-1]):
             self.calculate_SR_params()
 
+        # The random numbers depend on the turn, the RF section and the
+        # particle id only
         bm.synchrotron_radiation_full(self.beam.dE, self.U0, self.n_kicks,
                                       self.tau_z, self.sigma_dE,
-                                      self.ring.energy[0, i_turn])
+                                      self.ring.energy[0, i_turn],
+                                      i_turn, self.rf_params.section_index,
+                                      self.beam.id)
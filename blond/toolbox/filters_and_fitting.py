@@ -19,6 +19,7 @@ import numpy as np
 from scipy.signal import cheb2ord, cheby2, filtfilt, freqz
 import matplotlib.pyplot as plt
 from scipy.optimize import curve_fit
+from ..utils import bmath as bm
 
 
 def beam_profile_filter_chebyshev(Y_array, X_array, filter_option):
@@ -107,6 +108,65 @@ def gaussian_fit(Y_array, X_array, p0):
     return curve_fit(gauss, X_array, Y_array, p0)[0]
 
 
+def gaussian_fit_batch(Y_array, X_array, first, last, p0=None,
+                       max_iterations=50, tolerance=1e-10):
+    """
+    Gaussian fits of several bunches in one call, the bunch i being in the
+    bins first[i] to last[i] - 1 of the profile. Returns the parameters
+    [A, x0, sigma] of every bunch, in units of s. The initial guesses p0
+    (e.g. the parameters of the previous turn) are optional; without them,
+    or for the bunches with a non-positive sigma, the fit starts from the
+    moments of the bunch profile.
+    """
+
+    first = np.ascontiguousarray(first, dtype=np.int32)
+    last = np.ascontiguousarray(last, dtype=np.int32)
+    if p0 is None:
+        params = np.zeros((len(first), 3))
+    else:
+        params = np.array(p0, dtype=np.float64, order='C').reshape(-1, 3)
+        params[~np.isfinite(params).all(axis=1), 2] = 0
+
+    return bm.gaussian_fit_batch(Y_array, X_array, first, last, params,
+                                 max_iterations, tolerance)
+
+
+def fwhm_batch(Y_array, X_array, first, last, shift=0):
+    """
+    Computation of the bunch lengths and positions from the FWHM assuming
+    Gaussian line densities, for several bunches in one call, the bunch i
+    being in the bins first[i] to last[i] - 1 of the profile.
+    """
+
+    left, right = bm.fwhm_batch(Y_array, X_array,
+                                np.ascontiguousarray(first, dtype=np.int32),
+                                np.ascontiguousarray(last, dtype=np.int32),
+                                shift)
+
+    bl_fwhm = 4 * (right - left) / (2 * np.sqrt(2 * np.log(2)))
+    bp_fwhm = (left + right) / 2
+
+    return bp_fwhm, bl_fwhm
+
+
+def bunch_windows(X_array, n_bunches, bunch_spacing_buckets, bucket_size_tau,
+                  bucket_tolerance=0.40):
+    """
+    First and last + 1 indexes of the bins of every bunch for the multibunch
+    routines, the bunch i being in the bucket i * bunch_spacing_buckets
+    extended on both sides by bucket_tolerance buckets.
+    """
+
+    left_edge = (np.arange(n_bunches) * bunch_spacing_buckets
+                 - bucket_tolerance) * bucket_size_tau
+    right_edge = left_edge + (1 + 2 * bucket_tolerance) * bucket_size_tau
+
+    first = np.searchsorted(X_array, left_edge, side='right')
+    last = np.searchsorted(X_array, right_edge, side='left')
+
+    return first.astype(np.int32), last.astype(np.int32)
+
+
 def gauss(x, *p):
     """
     Defined as:
@@ -176,22 +236,24 @@ def fwhm_multibunch(Y_array, X_array, n_bunches,
     assuming Gaussian line density for multibunch case.
     """
 
-    bl_fwhm = np.zeros(n_bunches)
-    bp_fwhm = np.zeros(n_bunches)
+    first, last = bunch_windows(X_array, n_bunches, bunch_spacing_buckets,
+                                bucket_size_tau, bucket_tolerance)
 
-    for indexBunch in range(0, n_bunches):
+    return fwhm_batch(Y_array, X_array, first, last, shift)
 
-        left_edge = indexBunch * bunch_spacing_buckets * bucket_size_tau -\
-            bucket_tolerance * bucket_size_tau
-        right_edge = indexBunch * bunch_spacing_buckets * bucket_size_tau +\
-            bucket_size_tau + bucket_tolerance * bucket_size_tau
-        indexes_bucket = np.where((X_array > left_edge) *
-                                  (X_array < right_edge))[0]
 
-        bl_fwhm[indexBunch], bp_fwhm[indexBunch] = fwhm(
-            Y_array[indexes_bucket], X_array[indexes_bucket], shift)
+def gaussian_fit_multibunch(Y_array, X_array, n_bunches,
+                            bunch_spacing_buckets, bucket_size_tau,
+                            bucket_tolerance=0.40, p0=None):
+    """
+    Gaussian fit of every bunch for the multibunch case. Returns the
+    parameters [A, x0, sigma] of every bunch, in units of s.
+    """
+
+    first, last = bunch_windows(X_array, n_bunches, bunch_spacing_buckets,
+                                bucket_size_tau, bucket_tolerance)
 
-    return bl_fwhm, bp_fwhm
+    return gaussian_fit_batch(Y_array, X_array, first, last, p0)
 
 
 def rms_multibunch(Y_array, X_array, n_bunches,
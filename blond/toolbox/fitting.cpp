@@ -0,0 +1,282 @@
+/*
+Copyright 2016 CERN. This software is distributed under the
+terms of the GNU General Public Licence version 3 (GPL Version 3),
+copied verbatim in the file LICENCE.md.
+In applying this licence, CERN does not waive the privileges and immunities
+granted to it by virtue of its status as an Intergovernmental Organization or
+submit itself to any jurisdiction.
+Project website: http://blond.web.cern.ch/
+*/
+
+// Batched bunch profile fitting. Every bunch is a range [first, last) of the
+// bins of a profile, so that the windows of a dense multi-bunch profile and
+// the rows of a sparse profile are handled in the same way. The bunches are
+// processed in parallel.
+//
+// gaussian_fit_batch fits A exp(-(x - x0)^2 / (2 sigma^2)) with a
+// Levenberg-Marquardt iteration. The parameters [A, x0, sigma] of every bunch
+// are read as the initial guess (e.g. the result of the previous turn) and
+// overwritten by the fit; a non-positive sigma requests an initial guess from
+// the moments of the profile.
+//
+// fwhm_batch finds the first and last bins above half maximum and
+// interpolates linearly the crossings with the neighbouring bins.
+
+#include <math.h>
+#include "../cpp_routines/openmp.h"
+
+
+template <typename real_t>
+static void gaussian_moments(const real_t * __restrict__ profile,
+                             const real_t * __restrict__ bin_centers,
+                             const int first, const int last,
+                             double * __restrict__ p)
+{
+    double sum = 0., sum_x = 0., max = 0.;
+    for (int i = first; i < last; i++) {
+        sum += profile[i];
+        sum_x += profile[i] * bin_centers[i];
+        if (profile[i] > max) max = profile[i];
+    }
+    const double mean = sum_x / sum;
+    double sum_xx = 0.;
+    for (int i = first; i < last; i++)
+        sum_xx += profile[i] * (bin_centers[i] - mean) * (bin_centers[i] - mean);
+    p[0] = max;
+    p[1] = mean;
+    p[2] = sqrt(sum_xx / sum);
+}
+
+
+// Sum of squared residuals, and optionally the normal equations
+template <typename real_t>
+static double gaussian_residuals(const real_t * __restrict__ profile,
+                                 const real_t * __restrict__ bin_centers,
+                                 const int first, const int last,
+                                 const double * __restrict__ p,
+                                 double * __restrict__ JtJ,
+                                 double * __restrict__ Jtr)
+{
+    const double inv_sigma = 1. / p[2];
+    double cost = 0.;
+    if (JtJ != NULL)
+        for (int k = 0; k < 6; k++) JtJ[k] = 0.;
+    if (Jtr != NULL)
+        for (int k = 0; k < 3; k++) Jtr[k] = 0.;
+
+    for (int i = first; i < last; i++) {
+        const double u = (bin_centers[i] - p[1]) * inv_sigma;
+        const double g = exp(-0.5 * u * u);
+        const double r = profile[i] - p[0] * g;
+        cost += r * r;
+        if (JtJ == NULL)
+            continue;
+        // Derivatives of the model by A, x0 and sigma
+        const double J[3] = {g, p[0] * g * u * inv_sigma,
+                             p[0] * g * u * u * inv_sigma};
+        // Upper triangle: 00 01 02 11 12 22
+        JtJ[0] += J[0] * J[0];
+        JtJ[1] += J[0] * J[1];
+        JtJ[2] += J[0] * J[2];
+        JtJ[3] += J[1] * J[1];
+        JtJ[4] += J[1] * J[2];
+        JtJ[5] += J[2] * J[2];
+        Jtr[0] += J[0] * r;
+        Jtr[1] += J[1] * r;
+        Jtr[2] += J[2] * r;
+    }
+    return cost;
+}
+
+
+// Solves the symmetric 3x3 system (upper triangle of M) by Cramer's rule;
+// returns false if it is singular
+static bool solve3(const double * __restrict__ M, const double * __restrict__ b,
+                   double * __restrict__ x)
+{
+    const double a00 = M[0], a01 = M[1], a02 = M[2];
+    const double a11 = M[3], a12 = M[4], a22 = M[5];
+    const double c00 = a11 * a22 - a12 * a12;
+    const double c01 = a02 * a12 - a01 * a22;
+    const double c02 = a01 * a12 - a02 * a11;
+    const double det = a00 * c00 + a01 * c01 + a02 * c02;
+    if (!(fabs(det) > 0.))
+        return false;
+    const double c11 = a00 * a22 - a02 * a02;
+    const double c12 = a01 * a02 - a00 * a12;
+    const double c22 = a00 * a11 - a01 * a01;
+    x[0] = (c00 * b[0] + c01 * b[1] + c02 * b[2]) / det;
+    x[1] = (c01 * b[0] + c11 * b[1] + c12 * b[2]) / det;
+    x[2] = (c02 * b[0] + c12 * b[1] + c22 * b[2]) / det;
+    return true;
+}
+
+
+template <typename real_t>
+static void gaussian_fit_batch_impl(const real_t * __restrict__ profile,
+                                    const real_t * __restrict__ bin_centers,
+                                    const int * __restrict__ first,
+                                    const int * __restrict__ last,
+                                    const int n_bunches,
+                                    double * __restrict__ params,
+                                    const int max_iterations,
+                                    const double tolerance)
+{
+    #pragma omp parallel for schedule(dynamic)
+    for (int b = 0; b < n_bunches; b++) {
+        double *p = params + 3 * b;
+        if (!(p[2] > 0.))
+            gaussian_moments(profile, bin_centers, first[b], last[b], p);
+        if (!(p[2] > 0.))
+            continue;
+
+        double JtJ[6], Jtr[3], step[3], trial[3], damped[6];
+        double lambda = 1e-3;
+        double cost = gaussian_residuals(profile, bin_centers, first[b],
+                                         last[b], p, JtJ, Jtr);
+
+        for (int it = 0; it < max_iterations; it++) {
+            bool accepted = false;
+            // Increase the damping until the cost decreases
+            while (!accepted && lambda < 1e10) {
+                for (int k = 0; k < 6; k++) damped[k] = JtJ[k];
+                damped[0] *= 1. + lambda;
+                damped[3] *= 1. + lambda;
+                damped[5] *= 1. + lambda;
+                if (!solve3(damped, Jtr, step)) {
+                    lambda *= 10.;
+                    continue;
+                }
+                for (int k = 0; k < 3; k++) trial[k] = p[k] + step[k];
+                if (!(trial[2] > 0.)) {
+                    lambda *= 10.;
+                    continue;
+                }
+                const double trial_cost = gaussian_residuals(
+                    profile, bin_centers, first[b], last[b], trial,
+                    (double *) NULL, (double *) NULL);
+                if (trial_cost <= cost) {
+                    accepted = true;
+                    cost = trial_cost;
+                    lambda = lambda > 1e-7 ? 0.1 * lambda : lambda;
+                } else {
+                    lambda *= 10.;
+                }
+            }
+            if (!accepted)
+                break;
+
+            for (int k = 0; k < 3; k++) p[k] = trial[k];
+            if (fabs(step[0]) <= tolerance * fabs(p[0])
+                    && fabs(step[1]) <= tolerance * p[2]
+                    && fabs(step[2]) <= tolerance * p[2])
+                break;
+            cost = gaussian_residuals(profile, bin_centers, first[b], last[b],
+                                      p, JtJ, Jtr);
+        }
+    }
+}
+
+
+extern "C" void gaussian_fit_batch(const double * __restrict__ profile,
+                                   const double * __restrict__ bin_centers,
+                                   const int * __restrict__ first,
+                                   const int * __restrict__ last,
+                                   const int n_bunches,
+                                   double * __restrict__ params,
+                                   const int max_iterations,
+                                   const double tolerance)
+{
+    gaussian_fit_batch_impl<double>(profile, bin_centers, first, last,
+                                    n_bunches, params, max_iterations,
+                                    tolerance);
+}
+
+
+extern "C" void gaussian_fit_batchf(const float * __restrict__ profile,
+                                    const float * __restrict__ bin_centers,
+                                    const int * __restrict__ first,
+                                    const int * __restrict__ last,
+                                    const int n_bunches,
+                                    double * __restrict__ params,
+                                    const int max_iterations,
+                                    const double tolerance)
+{
+    gaussian_fit_batch_impl<float>(profile, bin_centers, first, last,
+                                   n_bunches, params, max_iterations,
+                                   tolerance);
+}
+
+
+// The crossings of every bunch are stored in left and right, NaN if the
+// bins above half maximum touch the edges of the profile
+template <typename real_t>
+static void fwhm_batch_impl(const real_t * __restrict__ profile,
+                            const real_t * __restrict__ bin_centers,
+                            const int * __restrict__ first,
+                            const int * __restrict__ last,
+                            const int n_bunches,
+                            const int n_slices,
+                            const double shift,
+                            double * __restrict__ left,
+                            double * __restrict__ right)
+{
+    #pragma omp parallel for schedule(dynamic)
+    for (int b = 0; b < n_bunches; b++) {
+        if (last[b] <= first[b]) {
+            left[b] = NAN;
+            right[b] = NAN;
+            continue;
+        }
+        double max = profile[first[b]];
+        for (int i = first[b] + 1; i < last[b]; i++)
+            if (profile[i] > max) max = profile[i];
+        const double half_max = shift + 0.5 * (max - shift);
+
+        int t1 = first[b];
+        while (t1 < last[b] && profile[t1] < half_max) t1++;
+        int t2 = last[b] - 1;
+        while (t2 > t1 && profile[t2] < half_max) t2--;
+
+        if (t1 >= last[b] || t1 == 0 || t2 + 1 >= n_slices) {
+            left[b] = NAN;
+            right[b] = NAN;
+            continue;
+        }
+        const double bin_size = bin_centers[t1] - bin_centers[t1 - 1];
+        left[b] = bin_centers[t1] - bin_size * (profile[t1] - half_max)
+                  / (profile[t1] - profile[t1 - 1]);
+        right[b] = bin_centers[t2] + bin_size * (profile[t2] - half_max)
+                   / (profile[t2] - profile[t2 + 1]);
+    }
+}
+
+
+extern "C" void fwhm_batch(const double * __restrict__ profile,
+                           const double * __restrict__ bin_centers,
+                           const int * __restrict__ first,
+                           const int * __restrict__ last,
+                           const int n_bunches,
+                           const int n_slices,
+                           const double shift,
+                           double * __restrict__ left,
+                           double * __restrict__ right)
+{
+    fwhm_batch_impl<double>(profile, bin_centers, first, last, n_bunches,
+                            n_slices, shift, left, right);
+}
+
+
+extern "C" void fwhm_batchf(const float * __restrict__ profile,
+                            const float * __restrict__ bin_centers,
+                            const int * __restrict__ first,
+                            const int * __restrict__ last,
+                            const int n_bunches,
+                            const int n_slices,
+                            const double shift,
+                            double * __restrict__ left,
+                            double * __restrict__ right)
+{
+    fwhm_batch_impl<float>(profile, bin_centers, first, last, n_bunches,
+                           n_slices, shift, left, right);
+}
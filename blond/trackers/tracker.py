@@ -28,13 +28,44 @@ class FullRingAndRF(object):
     """
     *Definition of the full ring and RF parameters in order to be able to have
     a full turn information (used in the hamiltonian for example).*
+
+    With fused_sections=True, the track method applies the kicks and drifts of
+    all the sections in a single pass over the particles; this requires all
+    the sections to track the same Beam with the same solver, without
+    feedbacks, periodicity, interpolation or tabulated kick.
     """
 
-    def __init__(self, RingAndRFSection_list):
+    def __init__(self, RingAndRFSection_list, fused_sections=False):
 
         #: *List of the total RingAndRFSection objects*
         self.RingAndRFSection_list = RingAndRFSection_list
 
+        #: *Option to track all the sections in a single pass*
+        self.fused_sections = bool(fused_sections)
+        if self.fused_sections:
+            first = self.RingAndRFSection_list[0]
+            for RingAndRFSectionElement in self.RingAndRFSection_list:
+                if (RingAndRFSectionElement.beam is not first.beam) or \
+                        (RingAndRFSectionElement.solver != first.solver):
+                    # FusedSectionsError
+                    raise RuntimeError("ERROR in FullRingAndRF: The fused" +
+                                       " sections need the same Beam and" +
+                                       " solver in all the sections")
+                if (RingAndRFSectionElement.beamFB is not None) or \
+                        (RingAndRFSectionElement.cavityFB is not None) or \
+                        (RingAndRFSectionElement.beam.dt_reference
+                         is not None) or \
+                        RingAndRFSectionElement.periodicity or \
+                        RingAndRFSectionElement.interpolation or \
+                        RingAndRFSectionElement.slice_in_drift or \
+                        (RingAndRFSectionElement.kick_table_points is not None):
+                    # FusedSectionsError
+                    raise RuntimeError("ERROR in FullRingAndRF: The fused" +
+                                       " sections are only available" +
+                                       " without feedbacks, periodicity," +
+                                       " interpolation, tabulated kick and" +
+                                       " compensated dt")
+
         #: *Total potential well in [V]*
         self.potential_well = 0
 
@@ -126,8 +157,70 @@ class FullRingAndRF(object):
         """Function to loop over all the RingAndRFSection.track methods
         """
 
-        for RingAndRFSectionElement in self.RingAndRFSection_list:
-            RingAndRFSectionElement.track()
+        if self.fused_sections:
+            self.track_fused_sections()
+        else:
+            for RingAndRFSectionElement in self.RingAndRFSection_list:
+                RingAndRFSectionElement.track()
+
+    def track_fused_sections(self):
+        """Function tracking one turn through all the RingAndRFSection
+        objects, as the track method, with the kicks and drifts of all the
+        sections applied in a single pass over the particles.
+        """
+
+        voltages = []
+        omega_rf = []
+        phi_rf = []
+        acceleration_kick = []
+        drift_parameters = []
+
+        for section in self.RingAndRFSection_list:
+            turn = section.counter[0]
+            section.rf_program_update(turn)
+
+            if section.rf_params.empty is False:
+                voltages.append(section.voltage[:, turn])
+                omega_rf.append(section.omega_rf[:, turn])
+                phi_rf.append(section.phi_rf[:, turn])
+                acceleration_kick.append(section.acceleration_kick[turn])
+            else:
+                voltages.append(np.zeros(0))
+                omega_rf.append(np.zeros(0))
+                phi_rf.append(np.zeros(0))
+                acceleration_kick.append(0.)
+
+            drift_parameters.append(
+                [section.t_rev[turn+1], section.length_ratio,
+                 section.eta_0[turn+1], section.eta_1[turn+1],
+                 section.eta_2[turn+1], section.alpha_0[turn+1],
+                 section.alpha_1[turn+1], section.alpha_2[turn+1],
+                 section.rf_params.beta[turn+1],
+                 section.rf_params.energy[turn+1]])
+
+        t_rev, length_ratio, eta_0, eta_1, eta_2, alpha_0, alpha_1, alpha_2, \
+            beta, energy = np.array(drift_parameters).T
+
+        first = self.RingAndRFSection_list[0]
+        first.beam.sliced_profile = None
+        if len(first.beam.dt) > 0:
+            bm.kick_drift_multi_section(
+                first.beam.dt, first.beam.dE, voltages, omega_rf, phi_rf,
+                first.charge, acceleration_kick, first.solver, t_rev,
+                length_ratio, first.alpha_order, eta_0, eta_1, eta_2,
+                alpha_0, alpha_1, alpha_2, beta, energy)
+
+        for section in self.RingAndRFSection_list:
+            turn = section.counter[0]
+
+            # Updating the beam synchronous momentum etc.
+            section.beam.beta = section.rf_params.beta[turn+1]
+            section.beam.gamma = section.rf_params.gamma[turn+1]
+            section.beam.energy = section.rf_params.energy[turn+1]
+            section.beam.momentum = section.rf_params.momentum[turn+1]
+
+            # Increment by one the turn counter
+            section.counter[0] += 1
 
 
 class RingAndRFTracker(object):
@@ -233,12 +326,32 @@ class RingAndRFTracker(object):
     interpolation : bool (optional)
         Option to use sliced and interpolated voltage for the kicker; default
         is False
+    interp_kick_drift : bool (optional)
+        Option to apply the interpolated kick and the drift in a single pass
+        over the particles; requires interpolation; default is False
+    slice_in_drift : bool (optional)
+        Option to compute the Profile of the next turn while drifting the
+        particles, so that the next Profile.track() does not need to slice
+        the beam again; requires a Profile with constant frame and standard
+        slicing; default is False
+    kick_table_points : int (optional)
+        Option to apply the RF kick with the total RF voltage tabulated once
+        per turn on a regular time grid of kick_table_points points and
+        linearly interpolated, in a single pass over the particles whatever
+        the number of RF systems; the grid spans the Profile frame if a
+        Profile is given, the first RF period of the main harmonic otherwise,
+        and the particles outside of the grid get the exact kick; if a
+        TotalInducedVoltage is given, the induced voltage is included in the
+        table and should then not be tracked separately; default is None
+        (exact kick)
 
     """
 
     def __init__(self, RFStation, Beam, solver='simple', BeamFeedback=None,
                  NoiseFeedback=None, CavityFeedback=None, periodicity=False,
-                 interpolation=False, Profile=None, TotalInducedVoltage=None):
+                 interpolation=False, Profile=None, TotalInducedVoltage=None,
+                 interp_kick_drift=False, slice_in_drift=False,
+                 kick_table_points=None):
 
         # Set up logging
         # self.logger = logging.getLogger(__class__.__name__)
@@ -315,6 +428,52 @@ class RingAndRFTracker(object):
             self.interpolation = True
             warnings.warn('Setting interpolation to TRUE')
             # self.logger.warning("Setting interpolation to TRUE")
+        self.interp_kick_drift = bool(interp_kick_drift)
+        if (self.interp_kick_drift is True) and (self.interpolation is False):
+            # InterpolationError
+            raise RuntimeError("ERROR in RingAndRFTracker: The fused" +
+                               " interpolated kick and drift requires the" +
+                               " interpolation option")
+        if (self.interp_kick_drift is True) and \
+                (self.profile.deposition != 'ngp'):
+            # InterpolationError
+            raise RuntimeError("ERROR in RingAndRFTracker: The fused" +
+                               " interpolated kick and drift requires a" +
+                               " Profile with 'ngp' deposition")
+        self.slice_in_drift = bool(slice_in_drift)
+        if self.slice_in_drift is True:
+            if self.profile is None or \
+                    self.profile.operations[0] != self.profile._slice:
+                # ProfileError
+                raise RuntimeError("ERROR in RingAndRFTracker: Slicing in" +
+                                   " the drift requires a Profile with" +
+                                   " standard slicing")
+            if self.interp_kick_drift is True:
+                # InterpolationError
+                raise RuntimeError("ERROR in RingAndRFTracker: Slicing in" +
+                                   " the drift is not compatible with the" +
+                                   " fused interpolated kick and drift")
+        self.kick_table_points = kick_table_points
+        if (self.beam.dt_reference is not None) and \
+                (self.periodicity or self.interp_kick_drift or
+                 self.slice_in_drift or
+                 (self.kick_table_points is not None)):
+            # PrecisionError
+            raise RuntimeError("ERROR in RingAndRFTracker: The compensated" +
+                               " dt mode of the Beam is not compatible with" +
+                               " periodicity, the fused drift options and" +
+                               " the tabulated kick")
+        if self.kick_table_points is not None:
+            self.kick_table_points = int(self.kick_table_points)
+            if self.kick_table_points < 2:
+                # KickTableError
+                raise RuntimeError("ERROR in RingAndRFTracker: The RF" +
+                                   " voltage table needs at least two points")
+            if self.interpolation is True or self.periodicity is True:
+                # InterpolationError
+                raise RuntimeError("ERROR in RingAndRFTracker: The tabulated" +
+                                   " kick is not compatible with the" +
+                                   " interpolation and periodicity options")
 
     def kick(self, beam_dt, beam_dE, index):
         """Function updating the particle energy due to the RF kick in a given
@@ -337,6 +496,42 @@ class RingAndRFTracker(object):
                 self.omega_rf[:, index], self.phi_rf[:, index],
                 self.charge, self.n_rf, self.acceleration_kick[index])
 
+    def tabulated_kick(self, beam_dt, beam_dE, index):
+        """Function updating the particle energy due to the RF kick, as the
+        kick method, with the total RF voltage evaluated once on a regular
+        time grid of kick_table_points points and linearly interpolated at
+        the particle arrival times. The induced voltage of the
+        TotalInducedVoltage object, if any, is added to the table. The
+        particles outside of the grid get the exact RF kick.
+
+        """
+        if self.profile is not None:
+            table_left = self.profile.cut_left
+            table_right = self.profile.cut_right
+        else:
+            table_left = 0.
+            table_right = 2*np.pi / self.omega_rf[0, index]
+
+        self.kick_table_time = np.linspace(table_left, table_right,
+                                           self.kick_table_points,
+                                           dtype=bm.precision.real_t)
+        self.kick_table_voltage = bm.rf_volt_comp(self.voltage[:, index],
+                                                  self.omega_rf[:, index],
+                                                  self.phi_rf[:, index],
+                                                  self.kick_table_time)
+        if self.totalInducedVoltage is not None:
+            self.kick_table_voltage += np.interp(
+                self.kick_table_time,
+                self.totalInducedVoltage.profile.bin_centers,
+                self.totalInducedVoltage.induced_voltage,
+                left=0., right=0.).astype(bm.precision.real_t)
+
+        bm.tabulated_kick(beam_dt, beam_dE, self.kick_table_voltage,
+                          table_left, table_right, self.voltage[:, index],
+                          self.omega_rf[:, index], self.phi_rf[:, index],
+                          self.charge, self.n_rf,
+                          self.acceleration_kick[index])
+
     def drift(self, beam_dt, beam_dE, index):
         """Function updating the particle arrival time to the RF station
         (drift). If only the zeroth order slippage factor is given, 'simple'
@@ -370,6 +565,63 @@ class RingAndRFTracker(object):
                  self.alpha_1[index], self.alpha_2[index],
                  self.rf_params.beta[index], self.rf_params.energy[index])
 
+    def kick_compensated(self, index):
+        """Function applying the RF kick to the whole beam, as the kick
+        method, for a Beam in the compensated dt mode: the RF phase of the
+        reference time of every bunch is computed in double precision, and
+        the kick in single precision from the offsets dt.
+
+        """
+        bm.kick_compensated(self.beam.dt, self.beam.dE,
+                            self.beam.dt_reference, self.beam.bunch_bounds,
+                            self.voltage[:, index],
+                            self.omega_rf[:, index], self.phi_rf[:, index],
+                            self.charge, self.n_rf,
+                            self.acceleration_kick[index])
+
+    def drift_compensated(self, index):
+        """Function applying the drift to the whole beam, as the drift
+        method, for a Beam in the compensated dt mode: the drift is
+        accumulated in double precision on the offsets dt, and the reference
+        times of the bunches follow their centre.
+
+        """
+        bm.drift_compensated(self.beam.dt, self.beam.dE,
+                             self.beam.dt_reference, self.beam.bunch_bounds,
+                             self.beam._dt_shift, self.solver,
+                             self.t_rev[index],
+                             self.length_ratio, self.alpha_order,
+                             self.eta_0[index], self.eta_1[index],
+                             self.eta_2[index], self.alpha_0[index],
+                             self.alpha_1[index], self.alpha_2[index],
+                             self.rf_params.beta[index],
+                             self.rf_params.energy[index])
+
+    def _bunch_bin_centers(self, reference):
+        # Bin centers of the profile relative to the reference time of a
+        # bunch, see Beam.bunch_ranges()
+        if reference == 0:
+            return self.profile.bin_centers
+        return (self.profile.bin_centers.astype(np.float64) -
+                reference).astype(bm.precision.real_t)
+
+    def drift_n_slice(self, index):
+        """Function applying the drift to the whole beam, as the drift
+        method, and computing at the same time the beam profile of the
+        Profile object from the drifted particles.
+
+        """
+        bm.drift_n_slice(self.beam.dt, self.beam.dE, self.solver,
+                         self.t_rev[index], self.length_ratio,
+                         self.alpha_order, self.eta_0[index],
+                         self.eta_1[index], self.eta_2[index],
+                         self.alpha_0[index], self.alpha_1[index],
+                         self.alpha_2[index], self.rf_params.beta[index],
+                         self.rf_params.energy[index],
+                         self.profile.n_macroparticles,
+                         self.profile.cut_left, self.profile.cut_right)
+        self.beam.sliced_profile = self.profile
+
     def rf_voltage_calculation(self):
         """Function calculating the total, discretised RF voltage seen by the
         beam at a given turn. Requires a Profile object.
@@ -385,19 +637,26 @@ class RingAndRFTracker(object):
                        phi_rf[0] + self.cavityFB.phi_corr) + \
                 bm.rf_volt_comp(voltages[1:], omega_rf[1:], phi_rf[1:],
                                 self.profile.bin_centers)
+        elif self.beam.dt_reference is not None:
+            # RF phase in double precision, as for the kick of a Beam in the
+            # compensated dt mode
+            bin_centers = self.profile.bin_centers.astype(np.float64)
+            self.rf_voltage = np.sum(
+                voltages[:, np.newaxis] *
+                np.sin(omega_rf[:, np.newaxis] * bin_centers +
+                       phi_rf[:, np.newaxis]),
+                axis=0).astype(bm.precision.real_t)
         else:
             self.rf_voltage = bm.rf_volt_comp(voltages, omega_rf, phi_rf,
                                               self.profile.bin_centers)
 
-    def track(self):
-        """Tracking method for the section. Applies first the kick, then the
-        drift. Calls also RF/beam feedbacks if applicable. Updates the counter
-        of the corresponding RFStation class and the energy-related variables
-        of the Beam class.
+    def rf_program_update(self, turn):
+        """Function applying to the RF programs of the given turn the phase
+        noise, the phase modulation and the beam phase loop correction, and
+        updating the RF phase of the next turn with the accumulated phase
+        offset.
 
         """
-        turn = self.counter[0]
-
         # Add phase noise directly to the cavity RF phase
         if self.phi_noise is not None:
             if self.noiseFB is not None:
@@ -428,55 +687,43 @@ class RingAndRFTracker(object):
         # Total phase offset
         self.rf_params.phi_rf[:,turn+1] += self.rf_params.dphi_rf
 
-        if self.periodicity:
-
-            # Distinguish the particles inside the frame from the particles on
-            # the right-hand side of the frame.
-            self.indices_right_outside = \
-                np.where(self.beam.dt > self.t_rev[turn + 1])[0]
-            self.indices_inside_frame = \
-                np.where(self.beam.dt < self.t_rev[turn + 1])[0]
-
-            if len(self.indices_right_outside) > 0:
-                # Change reference of all the particles on the right of the
-                # current frame; these particles skip one kick and drift
-                self.beam.dt[self.indices_right_outside] -= \
-                    self.t_rev[turn + 1]
-                # Synchronize the bunch with the particles that are on the
-                # RHS of the current frame applying kick and drift to the
-                # bunch
-                # After that all the particles are in the new updated frame
-                self.insiders_dt = np.ascontiguousarray(
-                    self.beam.dt[self.indices_inside_frame])
-                self.insiders_dE = np.ascontiguousarray(
-                    self.beam.dE[self.indices_inside_frame])
-                self.kick(self.insiders_dt, self.insiders_dE, turn)
-                self.drift(self.insiders_dt, self.insiders_dE, turn+1)
-                self.beam.dt[self.indices_inside_frame] = self.insiders_dt
-                self.beam.dE[self.indices_inside_frame] = self.insiders_dE
-                # Check all the particles on the left of the just updated
-                # frame and apply a second kick and drift to them with the
-                # previous wave after having changed reference.
-                self.indices_left_outside = np.where(self.beam.dt < 0)[0]
+    def track(self):
+        """Tracking method for the section. Applies first the kick, then the
+        drift. Calls also RF/beam feedbacks if applicable. Updates the counter
+        of the corresponding RFStation class and the energy-related variables
+        of the Beam class.
 
-            else:
-                self.kick(self.beam.dt, self.beam.dE, turn)
-                self.drift(self.beam.dt, self.beam.dE, turn + 1)
-                # Check all the particles on the left of the just updated
-                # frame and apply a second kick and drift to them with the
-                # previous wave after having changed reference.
-                self.indices_left_outside = np.where(self.beam.dt < 0)[0]
-
-            if len(self.indices_left_outside) > 0:
-                left_outsiders_dt = np.ascontiguousarray(
-                    self.beam.dt[self.indices_left_outside])
-                left_outsiders_dE = np.ascontiguousarray(
-                    self.beam.dE[self.indices_left_outside])
-                left_outsiders_dt += self.t_rev[turn+1]
-                self.kick(left_outsiders_dt, left_outsiders_dE, turn)
-                self.drift(left_outsiders_dt, left_outsiders_dE, turn+1)
-                self.beam.dt[self.indices_left_outside] = left_outsiders_dt
-                self.beam.dE[self.indices_left_outside] = left_outsiders_dE
+        """
+        turn = self.counter[0]
+
+        self.rf_program_update(turn)
+
+        # The drift below moves the arrival times of the last slicing in
+        # the drift, if any
+        self.beam.sliced_profile = None
+
+        if len(self.beam.dt) == 0:
+            # All the particles lost in the compaction mode of the Beam
+            pass
+
+        elif self.periodicity:
+
+            # Particles on the right-hand side of the frame change reference
+            # and skip one kick and drift, particles drifting to the left of
+            # the frame change reference and get a second kick and drift;
+            # done in place, in a single pass over the particles.
+            bm.kick_drift_periodic(self.beam.dt, self.beam.dE,
+                                   self.voltage[:, turn],
+                                   self.omega_rf[:, turn],
+                                   self.phi_rf[:, turn], self.charge,
+                                   self.n_rf, self.acceleration_kick[turn],
+                                   self.solver, self.t_rev[turn+1],
+                                   self.length_ratio, self.alpha_order,
+                                   self.eta_0[turn+1], self.eta_1[turn+1],
+                                   self.eta_2[turn+1], self.alpha_0[turn+1],
+                                   self.alpha_1[turn+1], self.alpha_2[turn+1],
+                                   self.rf_params.beta[turn+1],
+                                   self.rf_params.energy[turn+1])
 
         else:
 
@@ -489,33 +736,77 @@ class RingAndRFTracker(object):
                     else:
                         self.total_voltage = self.rf_voltage
 
-                    bm.linear_interp_kick(dt=self.beam.dt, dE=self.beam.dE,
-                                          voltage=self.total_voltage,
-                                          bin_centers=self.profile.bin_centers,
-                                          charge=self.beam.Particle.charge,
-                                          acceleration_kick=self.acceleration_kick[turn])
-
-                    # self.drift(self.beam.dt, self.beam.dE, turn + 1)
-
-                    # bm.LIKick_n_drift(self.beam.dt,
-                    #                   self.beam.dE,
-                    #                   self.total_voltage,
-                    #                   self.profile.bin_centers,
-                    #                   self.beam.Particle.charge,
-                    #                   self.acceleration_kick[turn],
-                    #                   self.solver,
-                    #                   self.t_rev[turn],
-                    #                   self.length_ratio,
-                    #                   self.alpha_order,
-                    #                   self.eta_0[turn],
-                    #                   self.eta_1[turn],
-                    #                   self.eta_2[turn],
-                    #                   self.rf_params.beta[turn],
-                    #                   self.rf_params.energy[turn])
+                    if self.interp_kick_drift:
+                        bm.LIKick_n_drift(self.beam.dt,
+                                          self.beam.dE,
+                                          self.total_voltage,
+                                          self.profile.bin_centers,
+                                          self.beam.Particle.charge,
+                                          self.acceleration_kick[turn],
+                                          self.solver,
+                                          self.t_rev[turn+1],
+                                          self.length_ratio,
+                                          self.alpha_order,
+                                          self.eta_0[turn+1],
+                                          self.eta_1[turn+1],
+                                          self.eta_2[turn+1],
+                                          self.alpha_0[turn+1],
+                                          self.alpha_1[turn+1],
+                                          self.alpha_2[turn+1],
+                                          self.rf_params.beta[turn+1],
+                                          self.rf_params.energy[turn+1])
+                    elif self.profile.deposition == 'tsc':
+                        # Gather matching the TSC deposition of the profile
+                        for start, stop, reference in \
+                                self.beam.bunch_ranges():
+                            if stop == start:
+                                continue
+                            bm.tsc_interp_kick(
+                                self.beam.dt[start:stop],
+                                self.beam.dE[start:stop], self.total_voltage,
+                                self._bunch_bin_centers(reference),
+                                self.beam.Particle.charge,
+                                self.acceleration_kick[turn])
+                    elif self.profile.bin_cache_filled and \
+                            self.profile.bin_cache_generation == \
+                            self.beam.generation:
+                        # Bins of the particles stored by the last slicing,
+                        # unless the particles were changed since then
+                        bm.linear_interp_kick_cached(
+                            self.beam.dE, self.total_voltage,
+                            self.profile.bin_index, self.profile.bin_fraction,
+                            self.beam.Particle.charge,
+                            self.acceleration_kick[turn])
+                    else:
+                        for start, stop, reference in \
+                                self.beam.bunch_ranges():
+                            if stop == start:
+                                continue
+                            bm.linear_interp_kick(
+                                dt=self.beam.dt[start:stop],
+                                dE=self.beam.dE[start:stop],
+                                voltage=self.total_voltage,
+                                bin_centers=self._bunch_bin_centers(reference),
+                                charge=self.beam.Particle.charge,
+                                acceleration_kick=self.acceleration_kick[turn])
+                    # The drift invalidates the stored bins
+                    self.profile.bin_cache_filled = False
+                elif self.kick_table_points is not None:
+                    self.tabulated_kick(self.beam.dt, self.beam.dE, turn)
+                elif self.beam.dt_reference is not None:
+                    self.kick_compensated(turn)
                 else:
                     self.kick(self.beam.dt, self.beam.dE, turn)
 
-            self.drift(self.beam.dt, self.beam.dE, turn + 1)
+            if self.interp_kick_drift and self.rf_params.empty is False:
+                # Drift already applied together with the kick
+                pass
+            elif self.slice_in_drift:
+                self.drift_n_slice(turn + 1)
+            elif self.beam.dt_reference is not None:
+                self.drift_compensated(turn + 1)
+            else:
+                self.drift(self.beam.dt, self.beam.dE, turn + 1)
 
         # Updating the beam synchronous momentum etc.
         self.beam.beta = self.rf_params.beta[turn+1]
@@ -525,3 +816,84 @@ class RingAndRFTracker(object):
 
         # Increment by one the turn counter
         self.counter[0] += 1
+
+    def track_turns(self, n_turns):
+        """Tracking method for several turns in a single call, for stretches
+        of the cycle without intensity effects, feedbacks or periodicity.
+        Kick and drift of all the turns are applied in one pass over the
+        particles, so that the particle coordinates stay in cache between
+        turns. Phase noise, phase modulation and the accumulated RF phase
+        offset are applied to the RF programs as in the track method.
+
+        Parameters
+        ----------
+        n_turns : int
+            Number of turns to track
+
+        """
+
+        if (self.beamFB is not None) or (self.noiseFB is not None) or \
+                (self.cavityFB is not None) or self.interpolation or \
+                self.periodicity or (self.beam.dt_reference is not None) \
+                or self.slice_in_drift or (self.kick_table_points is not None):
+            # TrackTurnsError
+            raise RuntimeError("ERROR in RingAndRFTracker: track_turns is" +
+                               " only available without feedbacks," +
+                               " interpolation, periodicity, compensated" +
+                               " dt, slicing in the drift and tabulated" +
+                               " kick!")
+
+        n_turns = int(n_turns)
+        turn = self.counter[0]
+        if n_turns < 1 or turn + n_turns > self.rf_params.n_turns:
+            # TrackTurnsError
+            raise RuntimeError("ERROR in RingAndRFTracker: Number of turns" +
+                               " to track out of range!")
+
+        turns = slice(turn, turn + n_turns)
+        next_turns = slice(turn + 1, turn + n_turns + 1)
+
+        # Accumulated phase offset due to frequency offset, turn by turn
+        dphi_rf = self.rf_params.dphi_rf[:, np.newaxis] + \
+            np.cumsum(2.*np.pi*self.rf_params.harmonic[:, next_turns] *
+                      (self.rf_params.omega_rf[:, next_turns] -
+                       self.rf_params.omega_rf_d[:, next_turns]) /
+                      self.rf_params.omega_rf_d[:, next_turns], axis=1)
+        self.rf_params.dphi_rf[:] = dphi_rf[:, -1]
+        self.rf_params.phi_rf[:, next_turns] += dphi_rf
+
+        # Add phase noise and modulation directly to the cavity RF phase
+        if self.phi_noise is not None:
+            self.phi_rf[:, turns] += self.phi_noise[:, turns]
+        if self.phi_modulation is not None:
+            self.phi_rf[:, turns] += self.phi_modulation[0][:, turns]
+            self.omega_rf[:, turns] += self.phi_modulation[1][:, turns]
+
+        if self.rf_params.empty is False:
+            rf_systems = slice(0, self.n_rf)
+            acceleration_kick = self.acceleration_kick[turns]
+        else:
+            rf_systems = slice(0, 0)
+            acceleration_kick = np.zeros(n_turns)
+
+        self.beam.sliced_profile = None
+        if len(self.beam.dt) > 0:
+            bm.kick_drift_multi_turn(
+                self.beam.dt, self.beam.dE, self.voltage[rf_systems, turns],
+                self.omega_rf[rf_systems, turns],
+                self.phi_rf[rf_systems, turns], self.charge,
+                acceleration_kick, self.solver, self.t_rev[next_turns],
+                self.length_ratio, self.alpha_order, self.eta_0[next_turns],
+                self.eta_1[next_turns], self.eta_2[next_turns],
+                self.alpha_0[next_turns], self.alpha_1[next_turns],
+                self.alpha_2[next_turns], self.rf_params.beta[next_turns],
+                self.rf_params.energy[next_turns])
+
+        # Updating the beam synchronous momentum etc.
+        self.beam.beta = self.rf_params.beta[turn+n_turns]
+        self.beam.gamma = self.rf_params.gamma[turn+n_turns]
+        self.beam.energy = self.rf_params.energy[turn+n_turns]
+        self.beam.momentum = self.rf_params.momentum[turn+n_turns]
+
+        # Increment the turn counter
+        self.counter[0] += n_turns
@@ -40,18 +40,39 @@ _CPU_func_dict = {
     'mul': butils_wrap.mul,
     'beam_phase': butils_wrap.beam_phase,
     'fast_resonator': butils_wrap.fast_resonator,
+    'resonator_induced_voltage': butils_wrap.resonator_induced_voltage,
     'kick': butils_wrap.kick,
+    'kick_compensated': butils_wrap.kick_compensated,
+    'tabulated_kick': butils_wrap.tabulated_kick,
     'rf_volt_comp': butils_wrap.rf_volt_comp,
     'drift': butils_wrap.drift,
+    'drift_compensated': butils_wrap.drift_compensated,
+    'kick_drift_multi_turn': butils_wrap.kick_drift_multi_turn,
+    'kick_drift_multi_section': butils_wrap.kick_drift_multi_section,
+    'drift_n_slice': butils_wrap.drift_n_slice,
+    'kick_drift_periodic': butils_wrap.kick_drift_periodic,
     'linear_interp_kick': butils_wrap.linear_interp_kick,
+    'linear_interp_kick_cached': butils_wrap.linear_interp_kick_cached,
+    'tsc_interp_kick': butils_wrap.tsc_interp_kick,
+    'sparse_linear_interp_kick': butils_wrap.sparse_linear_interp_kick,
     'LIKick_n_drift': butils_wrap.linear_interp_kick_n_drift,
     'synchrotron_radiation': butils_wrap.synchrotron_radiation,
     'synchrotron_radiation_full': butils_wrap.synchrotron_radiation_full,
     'set_random_seed': butils_wrap.set_random_seed,
+    'random_normal': butils_wrap.random_normal,
+    'random_uniform': butils_wrap.random_uniform,
     'sparse_histogram': butils_wrap.sparse_histogram,
+    'beam_statistics': butils_wrap.beam_statistics,
+    'beam_statistics_merge': butils_wrap.beam_statistics_merge,
+    'bunch_statistics': butils_wrap.bunch_statistics,
+    'gaussian_fit_batch': butils_wrap.gaussian_fit_batch,
+    'fwhm_batch': butils_wrap.fwhm_batch,
     # 'linear_interp_time_translation': butils_wrap.linear_interp_time_translation,
     'slice': butils_wrap.slice,
+    'slice_n_cache': butils_wrap.slice_n_cache,
     'slice_smooth': butils_wrap.slice_smooth,
+    'slice_cic': butils_wrap.slice_cic,
+    'slice_tsc': butils_wrap.slice_tsc,
     'music_track': butils_wrap.music_track,
     'music_track_multiturn': butils_wrap.music_track_multiturn,
     'diff': np.diff,
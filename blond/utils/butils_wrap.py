@@ -280,10 +280,17 @@ def convolve(signal, kernel, mode='full', result=None):
         # ConvolutionError
         raise RuntimeError('[convolve] Only full mode is supported')
     if result is None:
-        result = np.empty(len(signal) + len(kernel) - 1, dtype=float)
-    __lib.convolution(__getPointer(signal), __getLen(signal),
-                      __getPointer(kernel), __getLen(kernel),
-                      __getPointer(result))
+        result = np.empty(len(signal) + len(kernel) - 1, dtype=signal.dtype)
+    if isinstance(signal[0], np.float32):
+        assert isinstance(kernel[0], np.float32)
+        assert isinstance(result[0], np.float32)
+        __lib.convolutionf(__getPointer(signal), __getLen(signal),
+                           __getPointer(kernel), __getLen(kernel),
+                           __getPointer(result))
+    else:
+        __lib.convolution(__getPointer(signal), __getLen(signal),
+                          __getPointer(kernel), __getLen(kernel),
+                          __getPointer(result))
     return result
 
 
@@ -424,9 +431,9 @@ def interp_const_space(x, xp, yp, left=None, right=None, result=None):
 
 def rfft(a, n=0, result=None):
     a = a.astype(dtype=precision.real_t, order='C', copy=False)
-    if (n == 0) and (result == None):
+    if (n == 0) and (result is None):
         result = np.empty(len(a)//2 + 1, dtype=precision.complex_t, order='C')
-    elif (n != 0) and (result == None):
+    elif (n != 0) and (result is None):
         result = np.empty(n//2 + 1, dtype=precision.complex_t, order='C')
 
     if precision.num == 1:
@@ -448,9 +455,9 @@ def rfft(a, n=0, result=None):
 def irfft(a, n=0, result=None):
     a = a.astype(dtype=precision.complex_t, order='C', copy=False)
 
-    if (n == 0) and (result == None):
+    if (n == 0) and (result is None):
         result = np.empty(2*(len(a)-1), dtype=precision.real_t, order='C')
-    elif (n != 0) and (result == None):
+    elif (n != 0) and (result is None):
         result = np.empty(n, dtype=precision.real_t, order='C')
 
     if precision.num == 1:
@@ -495,9 +502,9 @@ def irfft_packed(signal, fftsize=0, result=None):
     signal = np.ascontiguousarray(np.reshape(
         signal, -1), dtype=precision.complex_t)
 
-    if (fftsize == 0) and (result == None):
+    if (fftsize == 0) and (result is None):
         result = np.empty(howmany * 2*(n0-1), dtype=precision.real_t)
-    elif (fftsize != 0) and (result == None):
+    elif (fftsize != 0) and (result is None):
         result = np.empty(howmany * fftsize, dtype=precision.real_t)
 
     if precision.num == 1:
@@ -645,6 +652,74 @@ def kick(dt, dE, voltage, omega_rf, phi_rf, charge, n_rf, acceleration_kick):
                    __c_real(acceleration_kick))
 
 
+# The arrival times dt are float32 offsets from the float64 references of
+# their bunch, the particles of the bunch b being bunch_bounds[b] to
+# bunch_bounds[b + 1]
+def kick_compensated(dt, dE, dt_reference, bunch_bounds, voltage, omega_rf,
+                     phi_rf, charge, n_rf, acceleration_kick):
+    assert precision.num == 1
+    assert isinstance(dt[0], np.float32)
+    assert isinstance(dE[0], np.float32)
+    assert dt_reference.dtype == np.float64
+    assert bunch_bounds.dtype == np.int32
+
+    voltage_kick = charge * np.ascontiguousarray(voltage, dtype=np.float64)
+    omegarf_kick = np.ascontiguousarray(omega_rf, dtype=np.float64)
+    phirf_kick = np.ascontiguousarray(phi_rf, dtype=np.float64)
+
+    __lib.kick_compensatedf(__getPointer(dt),
+                            __getPointer(dE),
+                            __getPointer(dt_reference),
+                            __getPointer(bunch_bounds),
+                            __getLen(dt_reference),
+                            ct.c_int(n_rf),
+                            __getPointer(voltage_kick),
+                            __getPointer(omegarf_kick),
+                            __getPointer(phirf_kick),
+                            ct.c_double(acceleration_kick))
+
+
+def tabulated_kick(dt, dE, voltage_table, table_left, table_right, voltage,
+                   omega_rf, phi_rf, charge, n_rf, acceleration_kick):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+
+    voltage_table = charge * \
+        voltage_table.astype(dtype=precision.real_t, order='C', copy=False)
+    voltage_kick = charge * \
+        voltage.astype(dtype=precision.real_t, order='C', copy=False)
+    omegarf_kick = omega_rf.astype(
+        dtype=precision.real_t, order='C', copy=False)
+    phirf_kick = phi_rf.astype(dtype=precision.real_t, order='C', copy=False)
+
+    if precision.num == 1:
+        __lib.tabulated_kickf(__getPointer(dt),
+                              __getPointer(dE),
+                              __getPointer(voltage_table),
+                              __c_real(table_left),
+                              __c_real(table_right),
+                              __getLen(voltage_table),
+                              ct.c_int(n_rf),
+                              __getPointer(voltage_kick),
+                              __getPointer(omegarf_kick),
+                              __getPointer(phirf_kick),
+                              __getLen(dt),
+                              __c_real(acceleration_kick))
+    else:
+        __lib.tabulated_kick(__getPointer(dt),
+                             __getPointer(dE),
+                             __getPointer(voltage_table),
+                             __c_real(table_left),
+                             __c_real(table_right),
+                             __getLen(voltage_table),
+                             ct.c_int(n_rf),
+                             __getPointer(voltage_kick),
+                             __getPointer(omegarf_kick),
+                             __getPointer(phirf_kick),
+                             __getLen(dt),
+                             __c_real(acceleration_kick))
+
+
 def drift(dt, dE, solver, t_rev, length_ratio, alpha_order, eta_0,
           eta_1, eta_2, alpha_0, alpha_1, alpha_2, beta, energy):
     assert isinstance(dt[0], precision.real_t)
@@ -686,6 +761,279 @@ def drift(dt, dE, solver, t_rev, length_ratio, alpha_order, eta_0,
                     __getLen(dt))
 
 
+# Same layout as kick_compensated; the references are moved by dt_shift,
+# which is then set to the shift to apply at the next call
+def drift_compensated(dt, dE, dt_reference, bunch_bounds, dt_shift, solver,
+                      t_rev, length_ratio, alpha_order, eta_0, eta_1, eta_2,
+                      alpha_0, alpha_1, alpha_2, beta, energy):
+    assert precision.num == 1
+    assert isinstance(dt[0], np.float32)
+    assert isinstance(dE[0], np.float32)
+    assert dt_reference.dtype == np.float64
+    assert dt_shift.dtype == np.float64
+    assert bunch_bounds.dtype == np.int32
+
+    __lib.drift_compensatedf(__getPointer(dt),
+                             __getPointer(dE),
+                             __getPointer(dt_reference),
+                             __getPointer(bunch_bounds),
+                             __getPointer(dt_shift),
+                             __getLen(dt_reference),
+                             ct.c_char_p(solver),
+                             ct.c_double(t_rev),
+                             ct.c_double(length_ratio),
+                             ct.c_double(alpha_order),
+                             ct.c_double(eta_0),
+                             ct.c_double(eta_1),
+                             ct.c_double(eta_2),
+                             ct.c_double(alpha_0),
+                             ct.c_double(alpha_1),
+                             ct.c_double(alpha_2),
+                             ct.c_double(beta),
+                             ct.c_double(energy))
+
+
+def kick_drift_multi_turn(dt, dE, voltage, omega_rf, phi_rf, charge,
+                          acceleration_kick, solver, t_rev, length_ratio,
+                          alpha_order, eta_0, eta_1, eta_2, alpha_0, alpha_1,
+                          alpha_2, beta, energy):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+
+    # RF programs as (n_rf, n_turns), stored turn by turn for the kernel
+    n_rf, n_turns = voltage.shape
+    voltage_kick = np.ascontiguousarray(
+        charge * voltage.T, dtype=precision.real_t)
+    omegarf_kick = np.ascontiguousarray(omega_rf.T, dtype=precision.real_t)
+    phirf_kick = np.ascontiguousarray(phi_rf.T, dtype=precision.real_t)
+
+    # Drift parameters, one value per turn
+    acc_kick, t_rev, eta_0, eta_1, eta_2, alpha_0, alpha_1, alpha_2, beta, \
+        energy = [np.ascontiguousarray(x, dtype=precision.real_t)
+                  for x in (acceleration_kick, t_rev, eta_0, eta_1, eta_2,
+                            alpha_0, alpha_1, alpha_2, beta, energy)]
+
+    if precision.num == 1:
+        __lib.kick_drift_multi_turnf(__getPointer(dt),
+                                     __getPointer(dE),
+                                     ct.c_int(n_turns),
+                                     ct.c_int(n_rf),
+                                     __getPointer(voltage_kick),
+                                     __getPointer(omegarf_kick),
+                                     __getPointer(phirf_kick),
+                                     __getPointer(acc_kick),
+                                     ct.c_char_p(solver),
+                                     __getPointer(t_rev),
+                                     __c_real(length_ratio),
+                                     __c_real(alpha_order),
+                                     __getPointer(eta_0),
+                                     __getPointer(eta_1),
+                                     __getPointer(eta_2),
+                                     __getPointer(alpha_0),
+                                     __getPointer(alpha_1),
+                                     __getPointer(alpha_2),
+                                     __getPointer(beta),
+                                     __getPointer(energy),
+                                     __getLen(dt))
+    else:
+        __lib.kick_drift_multi_turn(__getPointer(dt),
+                                    __getPointer(dE),
+                                    ct.c_int(n_turns),
+                                    ct.c_int(n_rf),
+                                    __getPointer(voltage_kick),
+                                    __getPointer(omegarf_kick),
+                                    __getPointer(phirf_kick),
+                                    __getPointer(acc_kick),
+                                    ct.c_char_p(solver),
+                                    __getPointer(t_rev),
+                                    __c_real(length_ratio),
+                                    __c_real(alpha_order),
+                                    __getPointer(eta_0),
+                                    __getPointer(eta_1),
+                                    __getPointer(eta_2),
+                                    __getPointer(alpha_0),
+                                    __getPointer(alpha_1),
+                                    __getPointer(alpha_2),
+                                    __getPointer(beta),
+                                    __getPointer(energy),
+                                    __getLen(dt))
+
+
+def kick_drift_multi_section(dt, dE, voltage, omega_rf, phi_rf, charge,
+                             acceleration_kick, solver, t_rev, length_ratio,
+                             alpha_order, eta_0, eta_1, eta_2, alpha_0,
+                             alpha_1, alpha_2, beta, energy):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+
+    # RF programs as one array per section, concatenated for the kernel
+    n_rf = np.array([len(v) for v in voltage], dtype=np.int32)
+    voltage_kick = charge * np.ascontiguousarray(
+        np.concatenate(voltage), dtype=precision.real_t)
+    omegarf_kick = np.ascontiguousarray(
+        np.concatenate(omega_rf), dtype=precision.real_t)
+    phirf_kick = np.ascontiguousarray(
+        np.concatenate(phi_rf), dtype=precision.real_t)
+
+    # Drift parameters, one value per section
+    acc_kick, t_rev, length_ratio, eta_0, eta_1, eta_2, alpha_0, alpha_1, \
+        alpha_2, beta, energy = [
+            np.ascontiguousarray(x, dtype=precision.real_t)
+            for x in (acceleration_kick, t_rev, length_ratio, eta_0, eta_1,
+                      eta_2, alpha_0, alpha_1, alpha_2, beta, energy)]
+
+    if precision.num == 1:
+        __lib.kick_drift_multi_sectionf(__getPointer(dt),
+                                        __getPointer(dE),
+                                        ct.c_int(len(n_rf)),
+                                        __getPointer(n_rf),
+                                        __getPointer(voltage_kick),
+                                        __getPointer(omegarf_kick),
+                                        __getPointer(phirf_kick),
+                                        __getPointer(acc_kick),
+                                        ct.c_char_p(solver),
+                                        __getPointer(t_rev),
+                                        __getPointer(length_ratio),
+                                        __c_real(alpha_order),
+                                        __getPointer(eta_0),
+                                        __getPointer(eta_1),
+                                        __getPointer(eta_2),
+                                        __getPointer(alpha_0),
+                                        __getPointer(alpha_1),
+                                        __getPointer(alpha_2),
+                                        __getPointer(beta),
+                                        __getPointer(energy),
+                                        __getLen(dt))
+    else:
+        __lib.kick_drift_multi_section(__getPointer(dt),
+                                       __getPointer(dE),
+                                       ct.c_int(len(n_rf)),
+                                       __getPointer(n_rf),
+                                       __getPointer(voltage_kick),
+                                       __getPointer(omegarf_kick),
+                                       __getPointer(phirf_kick),
+                                       __getPointer(acc_kick),
+                                       ct.c_char_p(solver),
+                                       __getPointer(t_rev),
+                                       __getPointer(length_ratio),
+                                       __c_real(alpha_order),
+                                       __getPointer(eta_0),
+                                       __getPointer(eta_1),
+                                       __getPointer(eta_2),
+                                       __getPointer(alpha_0),
+                                       __getPointer(alpha_1),
+                                       __getPointer(alpha_2),
+                                       __getPointer(beta),
+                                       __getPointer(energy),
+                                       __getLen(dt))
+
+
+def drift_n_slice(dt, dE, solver, t_rev, length_ratio, alpha_order, eta_0,
+                  eta_1, eta_2, alpha_0, alpha_1, alpha_2, beta, energy,
+                  profile, cut_left, cut_right):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+    assert isinstance(profile[0], precision.real_t)
+
+    if precision.num == 1:
+        __lib.drift_n_histogramf(__getPointer(dt),
+                                 __getPointer(dE),
+                                 ct.c_char_p(solver),
+                                 __c_real(t_rev),
+                                 __c_real(length_ratio),
+                                 __c_real(alpha_order),
+                                 __c_real(eta_0),
+                                 __c_real(eta_1),
+                                 __c_real(eta_2),
+                                 __c_real(alpha_0),
+                                 __c_real(alpha_1),
+                                 __c_real(alpha_2),
+                                 __c_real(beta),
+                                 __c_real(energy),
+                                 __getPointer(profile),
+                                 __c_real(cut_left),
+                                 __c_real(cut_right),
+                                 __getLen(profile),
+                                 __getLen(dt))
+    else:
+        __lib.drift_n_histogram(__getPointer(dt),
+                                __getPointer(dE),
+                                ct.c_char_p(solver),
+                                __c_real(t_rev),
+                                __c_real(length_ratio),
+                                __c_real(alpha_order),
+                                __c_real(eta_0),
+                                __c_real(eta_1),
+                                __c_real(eta_2),
+                                __c_real(alpha_0),
+                                __c_real(alpha_1),
+                                __c_real(alpha_2),
+                                __c_real(beta),
+                                __c_real(energy),
+                                __getPointer(profile),
+                                __c_real(cut_left),
+                                __c_real(cut_right),
+                                __getLen(profile),
+                                __getLen(dt))
+
+
+def kick_drift_periodic(dt, dE, voltage, omega_rf, phi_rf, charge, n_rf,
+                        acceleration_kick, solver, t_rev, length_ratio,
+                        alpha_order, eta_0, eta_1, eta_2, alpha_0, alpha_1,
+                        alpha_2, beta, energy):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+
+    voltage_kick = charge * \
+        voltage.astype(dtype=precision.real_t, order='C', copy=False)
+    omegarf_kick = omega_rf.astype(
+        dtype=precision.real_t, order='C', copy=False)
+    phirf_kick = phi_rf.astype(dtype=precision.real_t, order='C', copy=False)
+
+    if precision.num == 1:
+        __lib.kick_drift_periodicf(__getPointer(dt),
+                                   __getPointer(dE),
+                                   ct.c_int(n_rf),
+                                   __getPointer(voltage_kick),
+                                   __getPointer(omegarf_kick),
+                                   __getPointer(phirf_kick),
+                                   __c_real(acceleration_kick),
+                                   ct.c_char_p(solver),
+                                   __c_real(t_rev),
+                                   __c_real(length_ratio),
+                                   __c_real(alpha_order),
+                                   __c_real(eta_0),
+                                   __c_real(eta_1),
+                                   __c_real(eta_2),
+                                   __c_real(alpha_0),
+                                   __c_real(alpha_1),
+                                   __c_real(alpha_2),
+                                   __c_real(beta),
+                                   __c_real(energy),
+                                   __getLen(dt))
+    else:
+        __lib.kick_drift_periodic(__getPointer(dt),
+                                  __getPointer(dE),
+                                  ct.c_int(n_rf),
+                                  __getPointer(voltage_kick),
+                                  __getPointer(omegarf_kick),
+                                  __getPointer(phirf_kick),
+                                  __c_real(acceleration_kick),
+                                  ct.c_char_p(solver),
+                                  __c_real(t_rev),
+                                  __c_real(length_ratio),
+                                  __c_real(alpha_order),
+                                  __c_real(eta_0),
+                                  __c_real(eta_1),
+                                  __c_real(eta_2),
+                                  __c_real(alpha_0),
+                                  __c_real(alpha_1),
+                                  __c_real(alpha_2),
+                                  __c_real(beta),
+                                  __c_real(energy),
+                                  __getLen(dt))
+
+
 def linear_interp_kick(dt, dE, voltage,
                        bin_centers, charge,
                        acceleration_kick):
@@ -721,9 +1069,99 @@ def linear_interp_kick(dt, dE, voltage,
                                  __c_real(acceleration_kick))
 
 
+def linear_interp_kick_cached(dE, voltage, bin_index, bin_fraction, charge,
+                              acceleration_kick):
+    assert isinstance(dE[0], precision.real_t)
+    assert isinstance(voltage[0], precision.real_t)
+    assert len(bin_index) == len(dE) and len(bin_fraction) == len(dE)
+
+    if precision.num == 1:
+        __lib.linear_interp_kick_cachedf(__getPointer(dE),
+                                         __getPointer(voltage),
+                                         __getPointer(bin_index),
+                                         __getPointer(bin_fraction),
+                                         __c_real(charge),
+                                         __getLen(voltage),
+                                         __getLen(dE),
+                                         __c_real(acceleration_kick))
+    else:
+        __lib.linear_interp_kick_cached(__getPointer(dE),
+                                        __getPointer(voltage),
+                                        __getPointer(bin_index),
+                                        __getPointer(bin_fraction),
+                                        __c_real(charge),
+                                        __getLen(voltage),
+                                        __getLen(dE),
+                                        __c_real(acceleration_kick))
+
+
+def tsc_interp_kick(dt, dE, voltage, bin_centers, charge, acceleration_kick):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+    assert isinstance(voltage[0], precision.real_t)
+    assert isinstance(bin_centers[0], precision.real_t)
+
+    if precision.num == 1:
+        __lib.tsc_interp_kickf(__getPointer(dt),
+                               __getPointer(dE),
+                               __getPointer(voltage),
+                               __getPointer(bin_centers),
+                               __c_real(charge),
+                               __getLen(bin_centers),
+                               __getLen(dt),
+                               __c_real(acceleration_kick))
+    else:
+        __lib.tsc_interp_kick(__getPointer(dt),
+                              __getPointer(dE),
+                              __getPointer(voltage),
+                              __getPointer(bin_centers),
+                              __c_real(charge),
+                              __getLen(bin_centers),
+                              __getLen(dt),
+                              __c_real(acceleration_kick))
+
+
+def sparse_linear_interp_kick(dt, dE, voltage, bin_centers, bucket_to_bunch,
+                              cut_left, bucket_length, charge,
+                              acceleration_kick):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+    assert isinstance(voltage[0][0], precision.real_t)
+    assert isinstance(bin_centers[0][0], precision.real_t)
+    assert voltage.shape == bin_centers.shape
+    assert bucket_to_bunch.dtype == np.int32
+
+    if precision.num == 1:
+        __lib.sparse_linear_interp_kickf(__getPointer(dt),
+                                         __getPointer(dE),
+                                         __getPointer(voltage),
+                                         __getPointer(bin_centers),
+                                         __getPointer(bucket_to_bunch),
+                                         __c_real(cut_left),
+                                         __c_real(bucket_length),
+                                         __c_real(charge),
+                                         ct.c_int(voltage.shape[1]),
+                                         __getLen(bucket_to_bunch),
+                                         __getLen(dt),
+                                         __c_real(acceleration_kick))
+    else:
+        __lib.sparse_linear_interp_kick(__getPointer(dt),
+                                        __getPointer(dE),
+                                        __getPointer(voltage),
+                                        __getPointer(bin_centers),
+                                        __getPointer(bucket_to_bunch),
+                                        __c_real(cut_left),
+                                        __c_real(bucket_length),
+                                        __c_real(charge),
+                                        ct.c_int(voltage.shape[1]),
+                                        __getLen(bucket_to_bunch),
+                                        __getLen(dt),
+                                        __c_real(acceleration_kick))
+
+
 def linear_interp_kick_n_drift(dt, dE, total_voltage, bin_centers, charge, acc_kick,
                                solver, t_rev, length_ratio, alpha_order, eta_0, eta_1,
-                               eta_2, beta, energy):
+                               eta_2, alpha_0, alpha_1, alpha_2, beta, energy):
     assert isinstance(dt[0], precision.real_t)
     assert isinstance(dE[0], precision.real_t)
     assert isinstance(total_voltage[0], precision.real_t)
@@ -750,6 +1188,9 @@ def linear_interp_kick_n_drift(dt, dE, total_voltage, bin_centers, charge, acc_k
                                           __c_real(eta_0),
                                           __c_real(eta_1),
                                           __c_real(eta_2),
+                                          __c_real(alpha_0),
+                                          __c_real(alpha_1),
+                                          __c_real(alpha_2),
                                           __c_real(beta),
                                           __c_real(energy),
                                           __c_real(charge))
@@ -768,12 +1209,26 @@ def linear_interp_kick_n_drift(dt, dE, total_voltage, bin_centers, charge, acc_k
                                          __c_real(eta_0),
                                          __c_real(eta_1),
                                          __c_real(eta_2),
+                                         __c_real(alpha_0),
+                                         __c_real(alpha_1),
+                                         __c_real(alpha_2),
                                          __c_real(beta),
                                          __c_real(energy),
                                          __c_real(charge))
 
 
-def slice(dt, profile, cut_left, cut_right):
+# Histogram strategies of histogram.h, 'auto' selects 'private' or 'atomic'
+# from the number of slices, particles and threads
+histogram_strategies = {'auto': 0, 'private': 1, 'atomic': 2, 'sort': 3}
+
+
+def slice(dt, profile, cut_left, cut_right, strategy='auto'):
+    '''Histogram of dt in profile, between cut_left and cut_right.
+
+    strategy is one of histogram_strategies. 'auto' chooses between
+    'private' and 'atomic' and never picks 'sort', which has no measured
+    regime where it is faster: it is only used when requested.
+    '''
     assert isinstance(dt[0], precision.real_t)
     assert isinstance(profile[0], precision.real_t)
 
@@ -786,14 +1241,42 @@ def slice(dt, profile, cut_left, cut_right):
                          __c_real(cut_left),
                          __c_real(cut_right),
                          __getLen(profile),
-                         __getLen(dt))
+                         __getLen(dt),
+                         ct.c_int(histogram_strategies[strategy]))
     else:
         __lib.histogram(__getPointer(dt),
                         __getPointer(profile),
                         __c_real(cut_left),
                         __c_real(cut_right),
                         __getLen(profile),
-                        __getLen(dt))
+                        __getLen(dt),
+                        ct.c_int(histogram_strategies[strategy]))
+
+
+def slice_n_cache(dt, profile, cut_left, cut_right, bin_index, bin_fraction):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(profile[0], precision.real_t)
+    assert bin_index.dtype == np.int32 and len(bin_index) == len(dt)
+    assert bin_fraction.dtype == np.float32 and len(bin_fraction) == len(dt)
+
+    if precision.num == 1:
+        __lib.histogram_n_cachef(__getPointer(dt),
+                                 __getPointer(profile),
+                                 __c_real(cut_left),
+                                 __c_real(cut_right),
+                                 __getLen(profile),
+                                 __getLen(dt),
+                                 __getPointer(bin_index),
+                                 __getPointer(bin_fraction))
+    else:
+        __lib.histogram_n_cache(__getPointer(dt),
+                                __getPointer(profile),
+                                __c_real(cut_left),
+                                __c_real(cut_right),
+                                __getLen(profile),
+                                __getLen(dt),
+                                __getPointer(bin_index),
+                                __getPointer(bin_fraction))
 
 
 def slice_smooth(dt, profile, cut_left, cut_right):
@@ -819,6 +1302,28 @@ def slice_smooth(dt, profile, cut_left, cut_right):
                                __getLen(dt))
 
 
+def __slice_deposit(name, dt, profile, cut_left, cut_right):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(profile[0], precision.real_t)
+
+    if precision.num == 1:
+        name += 'f'
+    getattr(__lib, name)(__getPointer(dt),
+                         __getPointer(profile),
+                         __c_real(cut_left),
+                         __c_real(cut_right),
+                         __getLen(profile),
+                         __getLen(dt))
+
+
+def slice_cic(dt, profile, cut_left, cut_right):
+    __slice_deposit('histogram_cic', dt, profile, cut_left, cut_right)
+
+
+def slice_tsc(dt, profile, cut_left, cut_right):
+    __slice_deposit('histogram_tsc', dt, profile, cut_left, cut_right)
+
+
 def sparse_histogram(dt, profile, cut_left, cut_right, bunch_indexes, n_slices_bucket):
     assert isinstance(dt[0], precision.real_t)
     assert isinstance(profile[0][0], precision.real_t)
@@ -843,6 +1348,143 @@ def sparse_histogram(dt, profile, cut_left, cut_right, bunch_indexes, n_slices_b
                                __getLen(dt))
 
 
+# Layout of the arrays returned by beam_statistics:
+# [n_alive, mean_dt, m2_dt, min_dt, max_dt, mean_dE, m2_dE, min_dE, max_dE]
+# with m2 the sum of the squared deviations from the mean
+def beam_statistics(dt, dE, id=None, stats=None):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+
+    if stats is None:
+        stats = np.empty(9, dtype=np.float64)
+    if id is None:
+        id_pointer = None
+    else:
+        id = id.astype(dtype=np.int64, order='C', copy=False)
+        id_pointer = __getPointer(id)
+
+    if precision.num == 1:
+        __lib.beam_statisticsf(__getPointer(dt),
+                               __getPointer(dE),
+                               id_pointer,
+                               __getLen(dt),
+                               __getPointer(stats))
+    else:
+        __lib.beam_statistics(__getPointer(dt),
+                              __getPointer(dE),
+                              id_pointer,
+                              __getLen(dt),
+                              __getPointer(stats))
+    return stats
+
+
+# Same layout as beam_statistics, one row per bunch. bucket_to_bunch gives
+# the bunch index of each RF bucket, -1 for the empty buckets
+def bunch_statistics(dt, dE, t_rf, bucket_to_bunch, n_bunches, id=None,
+                     dt_offset=0., stats=None):
+    assert isinstance(dt[0], precision.real_t)
+    assert isinstance(dE[0], precision.real_t)
+
+    bucket_to_bunch = bucket_to_bunch.astype(dtype=np.int32, order='C',
+                                             copy=False)
+    if stats is None:
+        stats = np.empty((int(n_bunches), 9), dtype=np.float64)
+    if id is None:
+        id_pointer = None
+    else:
+        id = id.astype(dtype=np.int64, order='C', copy=False)
+        id_pointer = __getPointer(id)
+
+    if precision.num == 1:
+        func = __lib.bunch_statisticsf
+    else:
+        func = __lib.bunch_statistics
+    func(__getPointer(dt),
+         __getPointer(dE),
+         id_pointer,
+         __getLen(dt),
+         ct.c_double(t_rf),
+         ct.c_double(dt_offset),
+         __getPointer(bucket_to_bunch),
+         __getLen(bucket_to_bunch),
+         ct.c_int(int(n_bunches)),
+         __getPointer(stats))
+    return stats
+
+
+def beam_statistics_merge(partials, stats=None):
+    partials = np.ascontiguousarray(partials, dtype=np.float64)
+    if stats is None:
+        stats = np.empty(9, dtype=np.float64)
+    __lib.beam_statistics_merge(__getPointer(partials),
+                                ct.c_int(partials.size // 9),
+                                __getPointer(stats))
+    return stats
+
+
+# Gaussian fits [A, x0, sigma] of the bunches in the ranges [first, last) of
+# the bins; params is the initial guess, fitted in place, and a non-positive
+# sigma starts from the moments of the profile
+def gaussian_fit_batch(profile, bin_centers, first, last, params,
+                       max_iterations=50, tolerance=1e-10):
+    assert isinstance(profile[0], precision.real_t)
+    assert isinstance(bin_centers[0], precision.real_t)
+    assert first.dtype == np.int32 and last.dtype == np.int32
+    assert params.dtype == np.float64 and params.shape == (len(first), 3)
+
+    if precision.num == 1:
+        __lib.gaussian_fit_batchf(__getPointer(profile),
+                                  __getPointer(bin_centers),
+                                  __getPointer(first),
+                                  __getPointer(last),
+                                  __getLen(first),
+                                  __getPointer(params),
+                                  ct.c_int(max_iterations),
+                                  ct.c_double(tolerance))
+    else:
+        __lib.gaussian_fit_batch(__getPointer(profile),
+                                 __getPointer(bin_centers),
+                                 __getPointer(first),
+                                 __getPointer(last),
+                                 __getLen(first),
+                                 __getPointer(params),
+                                 ct.c_int(max_iterations),
+                                 ct.c_double(tolerance))
+    return params
+
+
+# Half-maximum crossings (left, right) of the bunches in the ranges
+# [first, last) of the bins
+def fwhm_batch(profile, bin_centers, first, last, shift=0.):
+    assert isinstance(profile[0], precision.real_t)
+    assert isinstance(bin_centers[0], precision.real_t)
+    assert first.dtype == np.int32 and last.dtype == np.int32
+
+    left = np.empty(len(first), dtype=np.float64)
+    right = np.empty(len(first), dtype=np.float64)
+    if precision.num == 1:
+        __lib.fwhm_batchf(__getPointer(profile),
+                          __getPointer(bin_centers),
+                          __getPointer(first),
+                          __getPointer(last),
+                          __getLen(first),
+                          __getLen(profile),
+                          ct.c_double(shift),
+                          __getPointer(left),
+                          __getPointer(right))
+    else:
+        __lib.fwhm_batch(__getPointer(profile),
+                         __getPointer(bin_centers),
+                         __getPointer(first),
+                         __getPointer(last),
+                         __getLen(first),
+                         __getLen(profile),
+                         ct.c_double(shift),
+                         __getPointer(left),
+                         __getPointer(right))
+    return left, right
+
+
 def music_track(dt, dE, induced_voltage, array_parameters,
                 alpha, omega_bar,
                 const, coeff1, coeff2, coeff3, coeff4):
@@ -953,35 +1595,68 @@ def synchrotron_radiation(dE, U0, n_kicks, tau_z):
             ct.c_int(n_kicks))
 
 
-def synchrotron_radiation_full(dE, U0, n_kicks, tau_z, sigma_dE, energy):
+def synchrotron_radiation_full(dE, U0, n_kicks, tau_z, sigma_dE, energy,
+                               turn=0, stream=0, id=None):
     assert isinstance(dE[0], precision.real_t)
 
+    if id is None:
+        id = np.arange(1, len(dE) + 1, dtype=np.int64)
+    else:
+        id = id.astype(dtype=np.int64, order='C', copy=False)
+
     # dE = dE.astype(dtype=precision.real_t, order='C', copy=False)
 
     if precision.num == 1:
         __lib.synchrotron_radiation_fullf(
             __getPointer(dE),
+            __getPointer(id),
             __c_real(U0 / n_kicks),
             __getLen(dE),
             __c_real(sigma_dE),
             __c_real(tau_z * n_kicks),
             __c_real(energy),
-            ct.c_int(n_kicks))
+            ct.c_int(n_kicks),
+            ct.c_int(turn),
+            ct.c_int(stream))
     else:
         __lib.synchrotron_radiation_full(
             __getPointer(dE),
+            __getPointer(id),
             __c_real(U0 / n_kicks),
             __getLen(dE),
             __c_real(sigma_dE),
             __c_real(tau_z * n_kicks),
             __c_real(energy),
-            ct.c_int(n_kicks))
+            ct.c_int(n_kicks),
+            ct.c_int(turn),
+            ct.c_int(stream))
 
 
 def set_random_seed(seed):
     __lib.set_random_seed(ct.c_int(seed))
 
 
+def __random(name, n, seed, stream, counter, offset):
+    output = np.empty(int(n), dtype=precision.real_t)
+    if precision.num == 1:
+        name += 'f'
+    getattr(__lib, name)(__getPointer(output),
+                         ct.c_int(len(output)),
+                         ct.c_uint64(int(seed) % 2**64),
+                         ct.c_uint32(int(stream) % 2**32),
+                         ct.c_uint32(int(counter) % 2**32),
+                         ct.c_uint64(int(offset)))
+    return output
+
+
+def random_normal(n, seed, stream=0, counter=0, offset=0):
+    return __random('random_normal', n, seed, stream, counter, offset)
+
+
+def random_uniform(n, seed, stream=0, counter=0, offset=0):
+    return __random('random_uniform', n, seed, stream, counter, offset)
+
+
 def fast_resonator(R_S, Q, frequency_array, frequency_R, impedance=None):
     R_S = R_S.astype(dtype=precision.real_t, order='C', copy=False)
     Q = Q.astype(dtype=precision.real_t, order='C', copy=False)
@@ -1018,6 +1693,48 @@ def fast_resonator(R_S, Q, frequency_array, frequency_R, impedance=None):
     return impedance
 
 
+def resonator_induced_voltage(coefficients, bin_centers, time_array, R_S,
+                              omega_R, Q, result=None):
+    coefficients = coefficients.astype(dtype=precision.real_t, order='C',
+                                       copy=False)
+    bin_centers = bin_centers.astype(dtype=precision.real_t, order='C',
+                                     copy=False)
+    time_array = time_array.astype(dtype=precision.real_t, order='C',
+                                   copy=False)
+    R_S = np.ascontiguousarray(R_S, dtype=np.float64)
+    omega_R = np.ascontiguousarray(omega_R, dtype=np.float64)
+    Q = np.ascontiguousarray(Q, dtype=np.float64)
+    if result is None:
+        result = np.empty(len(time_array), dtype=precision.real_t)
+
+    if precision.num == 1:
+        __lib.resonator_induced_voltagef(
+            __getPointer(coefficients),
+            __getPointer(bin_centers),
+            __getLen(bin_centers),
+            __getPointer(time_array),
+            __getLen(time_array),
+            __getPointer(R_S),
+            __getPointer(omega_R),
+            __getPointer(Q),
+            __getLen(R_S),
+            __getPointer(result))
+    else:
+        __lib.resonator_induced_voltage(
+            __getPointer(coefficients),
+            __getPointer(bin_centers),
+            __getLen(bin_centers),
+            __getPointer(time_array),
+            __getLen(time_array),
+            __getPointer(R_S),
+            __getPointer(omega_R),
+            __getPointer(Q),
+            __getLen(R_S),
+            __getPointer(result))
+
+    return result
+
+
 # def mean(x):
 #     __lib.mean.restype = ct.c_double
 #     return __lib.mean(__getPointer(x), __getLen(x))
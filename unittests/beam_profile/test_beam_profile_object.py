@@ -27,6 +27,8 @@ import os
 from blond.beam.beam import Beam
 from blond.input_parameters.ring import Ring
 import blond.beam.profile as profileModule
+import blond.toolbox.filters_and_fitting as ffroutines
+from blond.utils import bmath as bm
 from blond.beam.beam import Proton
 from blond.input_parameters.rf_parameters import RFStation
 
@@ -278,6 +280,163 @@ class testProfileClass(unittest.TestCase):
             rtol=rtol, atol=atol,
             err_msg='Bunch length values not correct')
 
+    def test_deposition(self):
+        CutOptions = profileModule.CutOptions(
+            cut_left=0, cut_right=self.ring.t_rev[0], n_slices=100,
+            cuts_unit='s')
+        ngp = profileModule.Profile(
+            self.profile1.Beam, CutOptions=CutOptions,
+            FitOptions=profileModule.FitOptions(fit_option='rms'),
+            OtherSlicesOptions=profileModule.OtherSlicesOptions(
+                direct_slicing=True))
+
+        for deposition in ['cic', 'tsc']:
+            profile = profileModule.Profile(
+                self.profile1.Beam, CutOptions=CutOptions,
+                FitOptions=profileModule.FitOptions(fit_option='rms'),
+                OtherSlicesOptions=profileModule.OtherSlicesOptions(
+                    direct_slicing=True, deposition=deposition))
+            self.assertEqual(profile.deposition, deposition)
+            # All the particles are well inside the profile
+            self.assertAlmostEqual(np.sum(profile.n_macroparticles),
+                                   np.sum(ngp.n_macroparticles), delta=1e-6)
+            self.assertAlmostEqual(profile.bunchPosition, ngp.bunchPosition,
+                                   delta=1e-3 * ngp.bunchLength)
+
+        with self.assertRaises(RuntimeError):
+            profileModule.OtherSlicesOptions(deposition='pic')
+
+    def test_deposition_weights(self):
+        beam = Beam(self.ring, 2, 1e9)
+        # 3.25 and -0.3 bins from the center of the first bin; the weights
+        # outside of the profile are lost
+        beam.dt[:] = [3.75e-9, 0.2e-9]
+        expected = {'cic': {3: 0.75, 4: 0.25, 0: 0.7},
+                    'tsc': {2: 0.03125, 3: 0.6875, 4: 0.28125,
+                            0: 0.75 - 0.3**2, 1: 0.5 * 0.2**2}}
+
+        for deposition in ['cic', 'tsc']:
+            profile = profileModule.Profile(
+                beam, CutOptions=profileModule.CutOptions(
+                    cut_left=0, cut_right=10e-9, n_slices=10),
+                OtherSlicesOptions=profileModule.OtherSlicesOptions(
+                    direct_slicing=True, deposition=deposition))
+            reference = np.zeros(10)
+            for bin, weight in expected[deposition].items():
+                reference[bin] += weight
+            np.testing.assert_allclose(profile.n_macroparticles, reference,
+                                       rtol=0, atol=1e-12)
+
+    def test_bin_cache(self):
+        CutOptions = profileModule.CutOptions(
+            cut_left=0, cut_right=self.ring.t_rev[0], n_slices=100,
+            cuts_unit='s')
+        reference = profileModule.Profile(
+            self.profile1.Beam, CutOptions=CutOptions,
+            OtherSlicesOptions=profileModule.OtherSlicesOptions(
+                direct_slicing=True))
+        profile = profileModule.Profile(
+            self.profile1.Beam, CutOptions=CutOptions,
+            OtherSlicesOptions=profileModule.OtherSlicesOptions(
+                direct_slicing=True, bin_cache=True))
+
+        self.assertTrue(profile.bin_cache_filled)
+        np.testing.assert_array_equal(profile.n_macroparticles,
+                                      reference.n_macroparticles)
+
+        # Bin and position in the bin of every particle
+        position = (profile.Beam.dt - profile.cut_left) / profile.bin_size
+        np.testing.assert_array_equal(profile.bin_index,
+                                      np.floor(position).astype(np.int32))
+        np.testing.assert_allclose(profile.bin_fraction,
+                                   position - np.floor(position),
+                                   rtol=0, atol=1e-6)
+
+        # New cuts invalidate the stored bins
+        profile.set_slices_parameters()
+        self.assertFalse(profile.bin_cache_filled)
+
+    def test_beam_spectrum(self):
+        profile = self.profile1
+        ffts = bm.rfft, bm.irfft, bm.rfftfreq
+        try:
+            for use_fftw in [False, True]:
+                if use_fftw:
+                    bm.use_fftw()
+                    try:
+                        bm.rfft(np.zeros(4))
+                    except AttributeError:
+                        self.skipTest('Not compiled with FFTW')
+                for n_fft in [profile.n_slices, 4 * profile.n_slices]:
+                    spectrum = profile.get_beam_spectrum(n_fft)
+                    np.testing.assert_allclose(
+                        spectrum, np.fft.rfft(profile.n_macroparticles, n_fft),
+                        atol=1e-9 * np.sum(profile.n_macroparticles))
+                    # Computed once and shared until the profile changes
+                    self.assertIs(profile.get_beam_spectrum(n_fft), spectrum)
+                    stamp = profile.spectrum_stamp
+                    profile.beam_spectrum_generation(n_fft)
+                    self.assertIs(profile.beam_spectrum, spectrum)
+
+                    profile.n_macroparticles[::2] += 1
+                    spectrum = profile.get_beam_spectrum(n_fft)
+                    self.assertEqual(profile.spectrum_stamp, stamp + 1)
+                    np.testing.assert_allclose(
+                        spectrum, np.fft.rfft(profile.n_macroparticles, n_fft),
+                        atol=1e-9 * np.sum(profile.n_macroparticles))
+                    profile.n_macroparticles[::2] -= 1
+        finally:
+            bm.rfft, bm.irfft, bm.rfftfreq = ffts
+
+
+class testMultiBunchFit(unittest.TestCase):
+
+    def setUp(self):
+        # Ten noisy Gaussian bunches, one every two buckets of 5 ns
+        np.random.seed(1)
+        self.bucket = 5e-9
+        self.n_bunches = 10
+        self.bin_centers = (np.arange(2000) + 0.5) * 0.05e-9
+        self.positions = (2 * np.arange(self.n_bunches) + 0.5) * self.bucket \
+            + np.random.uniform(-0.2e-9, 0.2e-9, self.n_bunches)
+        self.sigmas = np.random.uniform(0.3e-9, 0.6e-9, self.n_bunches)
+        self.profile = np.zeros(len(self.bin_centers))
+        for position, sigma in zip(self.positions, self.sigmas):
+            self.profile += 1e3 * np.exp(
+                -(self.bin_centers - position)**2 / (2 * sigma**2))
+        self.profile += np.random.normal(0, 5, len(self.profile))
+
+    def test_gaussian_fit(self):
+        params = ffroutines.gaussian_fit_multibunch(
+            self.profile, self.bin_centers, self.n_bunches, 2, self.bucket,
+            bucket_tolerance=0.4)
+        first, last = ffroutines.bunch_windows(
+            self.bin_centers, self.n_bunches, 2, self.bucket, 0.4)
+
+        for i in range(self.n_bunches):
+            reference = ffroutines.gaussian_fit(
+                self.profile[first[i]:last[i]],
+                self.bin_centers[first[i]:last[i]],
+                [1e3, self.positions[i], self.sigmas[i]])
+            np.testing.assert_allclose(params[i], reference, rtol=1e-6)
+
+        # Warm start from the previous parameters
+        np.testing.assert_allclose(
+            ffroutines.gaussian_fit_batch(self.profile, self.bin_centers,
+                                          first, last, params),
+            params, rtol=1e-8)
+
+    def test_fwhm(self):
+        bp, bl = ffroutines.fwhm_multibunch(
+            self.profile, self.bin_centers, self.n_bunches, 2, self.bucket)
+        first, last = ffroutines.bunch_windows(
+            self.bin_centers, self.n_bunches, 2, self.bucket)
+
+        for i in range(self.n_bunches):
+            reference = ffroutines.fwhm(self.profile[first[i]:last[i]],
+                                        self.bin_centers[first[i]:last[i]])
+            np.testing.assert_allclose([bp[i], bl[i]], reference, rtol=1e-12)
+
 
 if __name__ == '__main__':
 
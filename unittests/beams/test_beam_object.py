@@ -30,6 +30,7 @@ from blond.beam.beam import Beam
 from blond.beam.distributions import matched_from_distribution_function
 from blond.trackers.tracker import FullRingAndRF, RingAndRFTracker
 import blond.utils.exceptions as blExcept
+from blond.utils import bmath as bm
 
 
 class testParticleClass(unittest.TestCase):
@@ -189,6 +190,71 @@ class testBeamClass(unittest.TestCase):
         self.assertAlmostEqual(self.beam.mean_dE, 0., delta=1e-2,
                                msg='Beam: Failed statistic mean_dE')
 
+    def test_beam_statistic_lost_particles(self):
+        np = numpy
+        self.beam.dt = np.random.randn(self.beam.n_macroparticles)
+        self.beam.dE = 1e6 + 1e3*np.random.randn(self.beam.n_macroparticles)
+        self.beam.id[::3] = 0
+        alive = self.beam.id != 0
+
+        self.beam.statistics()
+
+        for coord in ['dt', 'dE']:
+            values = getattr(self.beam, coord)[alive]
+            self.assertAlmostEqual(getattr(self.beam, 'mean_' + coord),
+                                   np.mean(values),
+                                   delta=1e-12*np.abs(np.mean(values)))
+            self.assertAlmostEqual(getattr(self.beam, 'sigma_' + coord),
+                                   np.std(values),
+                                   delta=1e-10*np.std(values))
+            self.assertEqual(getattr(self.beam, 'min_' + coord),
+                             np.min(values))
+            self.assertEqual(getattr(self.beam, 'max_' + coord),
+                             np.max(values))
+        self.assertEqual(self.beam.n_alive_statistics,
+                         np.count_nonzero(alive))
+
+    def test_beam_statistic_merge(self):
+        np = numpy
+        dt = np.random.randn(1000)
+        dE = np.random.randn(1000)
+        partials = np.concatenate([bm.beam_statistics(dt[:100], dE[:100]),
+                                   bm.beam_statistics(dt[100:], dE[100:])])
+        stats = bm.beam_statistics_merge(partials)
+        np.testing.assert_allclose(stats, bm.beam_statistics(dt, dE),
+                                   rtol=1e-12, atol=1e-12)
+
+    def test_bunch_statistics(self):
+        np = numpy
+        t_rf = 2.5e-9
+        bunch_buckets = np.array([0, 4, 5, 12])
+        n_per_bunch = 1000
+        beam = Beam(self.general_params, 4*n_per_bunch, 1e9)
+        for i, bucket in enumerate(bunch_buckets):
+            s = slice(i*n_per_bunch, (i+1)*n_per_bunch)
+            beam.dt[s] = (bucket + 0.5)*t_rf + \
+                0.2*t_rf*(i+1)*(np.random.rand(n_per_bunch) - 0.5)
+            beam.dE[s] = 1e6*i + 1e5*np.random.randn(n_per_bunch)
+        beam.id[::7] = 0
+
+        beam.bunch_statistics(t_rf, bunch_buckets=bunch_buckets)
+
+        for i in range(len(bunch_buckets)):
+            s = slice(i*n_per_bunch, (i+1)*n_per_bunch)
+            alive = beam.id[s] != 0
+            dt = beam.dt[s][alive]
+            dE = beam.dE[s][alive]
+            self.assertEqual(beam.bunch_n_alive[i], len(dt))
+            self.assertAlmostEqual(beam.bunch_mean_dt[i], np.mean(dt),
+                                   delta=1e-20)
+            self.assertAlmostEqual(beam.bunch_sigma_dt[i], np.std(dt),
+                                   delta=1e-20)
+            self.assertAlmostEqual(beam.bunch_mean_dE[i], np.mean(dE),
+                                   delta=1e-6)
+            self.assertAlmostEqual(beam.bunch_sigma_dE[i], np.std(dE),
+                                   delta=1e-6)
+            self.assertEqual(beam.bunch_max_dE[i], np.max(dE))
+
     def test_losses_separatrix(self):
 
         longitudinal_tracker = RingAndRFTracker(self.rf_params, self.beam)
@@ -326,6 +392,168 @@ class testBeamClass(unittest.TestCase):
         with self.assertRaises(TypeError, msg='Wrong type should raise exception'):
             self.beam.add_beam(([1], [2]))
 
+    def test_reserved_capacity(self):
+        np = numpy
+        beam = Beam(self.general_params, 100, 1e9, capacity=1000)
+        self.assertEqual(beam.capacity, 1000)
+        buffer_address = beam.dt.ctypes.data
+
+        for i in range(9):
+            beam.add_particles([np.full(100, i + 1.), np.full(100, -i - 1.)])
+        self.assertEqual(beam.dt.ctypes.data, buffer_address,
+                         msg="Particles added within capacity should not " +
+                         "reallocate the coordinates")
+        self.assertEqual(beam.n_macroparticles, 1000)
+        np.testing.assert_array_equal(beam.id, np.arange(1, 1001))
+        np.testing.assert_array_equal(beam.dt[100:], -beam.dE[100:])
+
+        other = Beam(self.general_params, 50, 0)
+        other.id[::2] = 0
+        beam.add_beam(other)
+        self.assertGreaterEqual(beam.capacity, 2000,
+                                msg="The capacity should grow geometrically")
+        np.testing.assert_array_equal(
+            beam.id[1000:], np.where(other.id != 0, np.arange(1001, 1051), 0))
+        self.assertIn('int', type(beam.id[0]).__name__)
+
+        # Assigned coordinates are copied into new buffers when particles
+        # are added
+        beam.dt = np.zeros(len(beam.dt))
+        beam.add_particles([np.ones(10), np.ones(10)])
+        self.assertEqual(len(beam.dt), 1060)
+        self.assertEqual(len(beam.id), 1060)
+
+    def test_compensated_dt(self):
+        np = numpy
+        bm.use_precision('single')
+        try:
+            beam = Beam(self.general_params, 1000, 1e9, compensated_dt=True)
+            dt = 1e-3 + np.concatenate((np.linspace(0, 1e-9, 600),
+                                        1e-6 + np.linspace(0, 1e-9, 400)))
+            beam.set_dt(dt, bunch_bounds=[0, 600, 1000])
+            np.testing.assert_allclose(beam.dt_reference,
+                                       [1e-3 + 0.5e-9, 1e-3 + 1e-6 + 0.5e-9],
+                                       rtol=0, atol=1e-18)
+            self.assertLess(np.max(np.abs(beam.dt)), 0.6e-9)
+            np.testing.assert_allclose(beam.absolute_dt(), dt, rtol=0,
+                                       atol=1e-16)
+
+            beam.add_particles([np.full(100, 2e-3), np.zeros(100)])
+            other = Beam(self.general_params, 200, 0)
+            other.dt[:] = np.linspace(0, 1e-9, 200)
+            beam.add_beam(other)
+            np.testing.assert_array_equal(beam.bunch_bounds,
+                                          [0, 600, 1000, 1100, 1300])
+            self.assertEqual(len(beam.absolute_dt()), 1300)
+            self.assertAlmostEqual(beam.absolute_dt()[1050], 2e-3, delta=1e-18)
+
+            # The particles stay in their bunch when the lost ones are
+            # removed
+            dt = beam.absolute_dt()
+            beam.id[::2] = 0
+            beam.eliminate_lost_particles()
+            np.testing.assert_array_equal(beam.bunch_bounds,
+                                          [0, 300, 500, 550, 650])
+            np.testing.assert_allclose(beam.absolute_dt(), dt[1::2], rtol=0,
+                                       atol=1e-16)
+
+            beam.statistics()
+            self.assertAlmostEqual(beam.mean_dt, np.mean(dt[1::2]),
+                                   delta=1e-15)
+            self.assertAlmostEqual(beam.max_dt, 2e-3, delta=1e-15)
+        finally:
+            bm.use_precision('double')
+
+    def test_compensated_dt_compaction(self):
+        np = numpy
+        bm.use_precision('single')
+        try:
+            beam = Beam(self.general_params, 1000, 1e9, compensated_dt=True,
+                        compaction=True)
+            dt = 1e-3 + np.concatenate((np.linspace(0, 1e-9, 500),
+                                        1e-6 + np.linspace(0, 1e-9, 500)))
+            beam.set_dt(dt, bunch_bounds=[0, 500, 1000])
+
+            beam.losses_longitudinal_cut(1e-3 + 0.2e-9, 1e-3 + 1e-6 + 0.8e-9)
+            alive = (dt > 1e-3 + 0.2e-9) & (dt < 1e-3 + 1e-6 + 0.8e-9)
+            self.assertEqual(len(beam.dt), np.count_nonzero(alive))
+            np.testing.assert_array_equal(
+                beam.bunch_bounds, [0, np.count_nonzero(alive[:500]),
+                                    np.count_nonzero(alive)])
+            np.testing.assert_allclose(beam.absolute_dt(), dt[alive],
+                                       rtol=0, atol=1e-16)
+        finally:
+            bm.use_precision('double')
+
+    def test_compaction(self):
+        np = numpy
+        beam = Beam(self.general_params, 1000, 1e9, compaction=True)
+        beam.dt[:] = np.linspace(0, 10e-9, 1000)
+        beam.dE[:] = np.linspace(-1e6, 1e6, 1000)
+        reference = Beam(self.general_params, 1000, 1e9)
+        reference.dt[:] = beam.dt
+        reference.dE[:] = beam.dE
+
+        beam.losses_longitudinal_cut(1e-9, 9e-9)
+        reference.losses_longitudinal_cut(1e-9, 9e-9)
+        beam.losses_energy_cut(-0.5e6, 0.8e6)
+        reference.losses_energy_cut(-0.5e6, 0.8e6)
+
+        alive = reference.id != 0
+        self.assertEqual(len(beam.dt), np.count_nonzero(alive),
+                         msg="Only the alive particles should be tracked")
+        self.assertEqual(np.count_nonzero(beam.id == 0), 0)
+        self.assertEqual(beam.n_macroparticles_lost,
+                         reference.n_macroparticles_lost)
+        self.assertEqual(beam.n_macroparticles_alive,
+                         reference.n_macroparticles_alive)
+        self.assertIsInstance(beam.n_macroparticles_lost, int)
+
+        # The particles keep their IDs and coordinates
+        order = np.argsort(beam.id)
+        np.testing.assert_array_equal(beam.id[order], reference.id[alive])
+        np.testing.assert_array_equal(beam.dt[order], reference.dt[alive])
+        np.testing.assert_array_equal(beam.dE[order], reference.dE[alive])
+
+        beam.statistics()
+        reference.statistics()
+        self.assertAlmostEqual(beam.mean_dt, reference.mean_dt, delta=1e-20)
+        self.assertAlmostEqual(beam.sigma_dE, reference.sigma_dE, delta=1e-6)
+
+        # Direct id writes are taken into account after compact()
+        beam.id[:10] = 0
+        self.assertEqual(beam.n_macroparticles_lost,
+                         reference.n_macroparticles_lost + 10)
+        beam.compact()
+        self.assertEqual(beam.n_macroparticles_lost,
+                         reference.n_macroparticles_lost + 10)
+
+    def test_compaction_all_lost(self):
+        np = numpy
+        from blond.beam.profile import CutOptions, Profile
+
+        beam = Beam(self.general_params, 1000, 1e9, compaction=True)
+        beam.dt[:] = np.linspace(0, 10e-9, 1000)
+        profile = Profile(beam, CutOptions(cut_left=0, cut_right=10e-9,
+                                           n_slices=20))
+        tracker = RingAndRFTracker(self.rf_params, beam)
+
+        beam.losses_longitudinal_cut(1, 2)
+        self.assertEqual(len(beam.dt), 0)
+        self.assertEqual(beam.n_macroparticles_lost, 1000)
+
+        # The tracking goes on without particles
+        beam.statistics()
+        self.assertEqual(beam.n_alive_statistics, 0)
+        self.assertTrue(np.isnan(beam.mean_dt))
+        self.assertTrue(np.isnan(beam.sigma_dE))
+        beam.bunch_statistics(self.rf_params.t_rf[0, 0], n_bunches=2)
+        np.testing.assert_array_equal(beam.bunch_n_alive, [0, 0])
+
+        tracker.track()
+        self.assertEqual(tracker.counter[0], 1)
+        profile.track()
+        np.testing.assert_array_equal(profile.n_macroparticles, 0)
 
 if __name__ == '__main__':
 
@@ -15,10 +15,17 @@ Unittest for impedances.impedance
 
 import unittest
 import numpy as np
+from scipy.constants import e
 
 from blond.beam.profile import Profile, CutOptions
-from blond.impedances.impedance import InducedVoltageFreq, InducedVoltageTime
-from blond.impedances.impedance_sources import Resonators
+from blond.beam.beam import Beam, Proton
+from blond.beam.sparse_slices import SparseSlices
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.impedances.impedance import InducedVoltageFreq, InducedVoltageTime, \
+    InducedVoltageSparse, InducedVoltageResonator, InductiveImpedance, \
+    TotalInducedVoltage
+from blond.impedances.impedance_sources import Resonators, InputTable
 
 class TestInducedVoltageFreq(unittest.TestCase):
 
@@ -120,6 +127,410 @@ class TestInducedVoltageTime(unittest.TestCase):
         np.testing.assert_allclose(test_object.wake_length_input, 11e-9)
 
 
+class TestConvolutionMethod(unittest.TestCase):
+
+    def setUp(self):
+        ring = Ring(6911.5038, 1/17.95**2, 25.92e9, Proton(), 1)
+        np.random.seed(1)
+        self.beam = Beam(ring, 100000, 1e11)
+        self.beam.dt[:] = np.random.normal(2.5e-9, 0.3e-9, 100000)
+
+    def compare(self, n_slices, resonators, wake_length=None):
+        profile = Profile(self.beam, CutOptions(cut_left=0, cut_right=5e-9,
+                                                n_slices=n_slices))
+        profile.track()
+        reference = InducedVoltageTime(self.beam, profile, [resonators],
+                                       wake_length=wake_length)
+        reference.induced_voltage_generation()
+
+        methods = {}
+        for method in ['direct', 'overlap_save', 'auto']:
+            test_object = InducedVoltageTime(
+                self.beam, profile, [resonators], wake_length=wake_length,
+                convolution_method=method)
+            test_object.induced_voltage_generation()
+            methods[method] = test_object.convolution_method
+            self.assertEqual(len(test_object.induced_voltage),
+                             len(reference.induced_voltage))
+            np.testing.assert_allclose(
+                test_object.induced_voltage, reference.induced_voltage,
+                rtol=0, atol=1e-10 * np.max(np.abs(reference.induced_voltage)))
+        return methods
+
+    def test_short_wake(self):
+        # Broadband resonator decaying within a few slices
+        methods = self.compare(1000, Resonators([5e3], [200e9], [1]))
+        self.assertEqual(methods['overlap_save'], 'overlap_save')
+        self.assertEqual(methods['auto'], 'direct')
+
+    def test_long_profile(self):
+        methods = self.compare(4096, Resonators([5e3], [20e9], [1]),
+                               wake_length=20e-9)
+        self.assertEqual(methods['auto'], 'overlap_save')
+
+    def test_long_wake(self):
+        # Blocks would be longer than the full FFT
+        methods = self.compare(256, Resonators([1e6], [20e6], [100]),
+                               wake_length=20e-9)
+        self.assertEqual(methods['overlap_save'], 'fft')
+        self.assertEqual(methods['auto'], 'fft')
+
+    def test_wrong_method(self):
+        with self.assertRaises(RuntimeError):
+            profile = Profile(self.beam, CutOptions(cut_left=0,
+                                                    cut_right=5e-9))
+            InducedVoltageTime(self.beam, profile,
+                               [Resonators([5e3], [2e9], [1])],
+                               convolution_method='fftw')
+
+
+class TestResonatorMultiTurnWake(unittest.TestCase):
+
+    def setUp(self):
+        # Revolution period of about 100 ns
+        ring = Ring(30, 1/4.4**2, 25.92e9, Proton(), 10)
+        self.rf = RFStation(ring, 20, 1e5, 0)
+        self.t_rev = ring.t_rev[0]
+
+        np.random.seed(1)
+        self.beam = Beam(ring, 100000, 1e11)
+        self.beam.dt[:] = np.random.normal(2.5e-9, 0.3e-9, 100000)
+        self.profile = Profile(self.beam, CutOptions(cut_left=0,
+                                                     cut_right=5e-9,
+                                                     n_slices=64))
+        self.profile.track()
+
+        # Long-range modes ringing over many turns
+        self.resonators = Resonators([1e6, 2e5], [200e6, 53e6], [1000, 500])
+        self.n_turns = 5
+
+    def test_previous_turns(self):
+        induced_voltage = InducedVoltageTime(
+            self.beam, self.profile, [self.resonators],
+            multi_turn_wake=True, RFParams=self.rf, mtw_mode='resonator')
+        for turn in range(self.n_turns):
+            induced_voltage.induced_voltage_generation()
+
+        # Current turn, plus the wake of the same profile in the previous
+        # turns
+        reference = InducedVoltageTime(self.beam, self.profile,
+                                       [self.resonators])
+        reference.induced_voltage_generation()
+        reference = reference.induced_voltage.copy()
+        t = self.profile.bin_centers
+        for turn in range(1, self.n_turns):
+            self.resonators.wake_calc(
+                (t[:, None] - t[None, :] + turn * self.t_rev).ravel())
+            reference -= self.beam.Particle.charge * e * self.beam.ratio \
+                * np.dot(self.resonators.wake.reshape(len(t), len(t)),
+                         self.profile.n_macroparticles)
+
+        np.testing.assert_allclose(
+            induced_voltage.induced_voltage, reference, rtol=0,
+            atol=1e-9 * np.max(np.abs(reference)))
+
+    def test_frequency_domain(self):
+        # Same previous turns, whatever the current turn calculation
+        previous = []
+        for InducedVoltage, options in [
+                (InducedVoltageTime, {}),
+                (InducedVoltageFreq, {'frequency_resolution': 1e6})]:
+            induced_voltage = InducedVoltage(
+                self.beam, self.profile, [self.resonators],
+                multi_turn_wake=True, RFParams=self.rf, mtw_mode='resonator',
+                **options)
+            for turn in range(self.n_turns):
+                induced_voltage.induced_voltage_generation()
+            total = induced_voltage.induced_voltage.copy()
+            induced_voltage.induced_voltage_1turn()
+            previous.append((total - induced_voltage.induced_voltage)
+                            [:self.profile.n_slices])
+
+        np.testing.assert_allclose(previous[1], previous[0], rtol=1e-9)
+
+    def test_wrong_source(self):
+        table = InputTable(np.array([0, 1e9]), np.array([0, 1.]),
+                           np.array([0, 0.]))
+        with self.assertRaises(RuntimeError):
+            InducedVoltageFreq(self.beam, self.profile, [table],
+                               multi_turn_wake=True, RFParams=self.rf,
+                               mtw_mode='resonator')
+
+
+class TestTimeMultiTurnWake(unittest.TestCase):
+
+    def setUp(self):
+        # Revolution period of about 100 ns
+        ring = Ring(30, 1/4.4**2, 25.92e9, Proton(), 10)
+        self.rf = RFStation(ring, 20, 1e5, 0)
+        self.t_rev = ring.t_rev[0]
+
+        np.random.seed(1)
+        self.beam = Beam(ring, 100000, 1e11)
+        self.beam.dt[:] = np.random.normal(2.5e-9, 0.3e-9, 100000)
+        # Revolution period multiple of the bin size
+        self.profile = Profile(self.beam, CutOptions(
+            cut_left=0, cut_right=self.t_rev / 20, n_slices=64))
+        self.profile.track()
+        self.n_turns = 6
+
+    def test_memory(self):
+        resonators = Resonators([1e6, 2e5], [200e6, 53e6], [1000, 500])
+        induced_voltage = InducedVoltageTime(
+            self.beam, self.profile, [resonators], wake_length=3.5*self.t_rev,
+            multi_turn_wake=True, RFParams=self.rf)
+
+        # Memory shifted by interpolation over its whole length
+        single_turn = InducedVoltageTime(self.beam, self.profile,
+                                         [resonators],
+                                         wake_length=3.5*self.t_rev)
+        time = induced_voltage.time_mtw
+        memory = np.zeros(len(time))
+        for turn in range(self.n_turns):
+            induced_voltage.induced_voltage_generation()
+            single_turn.induced_voltage_1turn()
+            memory = np.interp(time + self.t_rev, time, memory, left=0,
+                               right=0) + single_turn.induced_voltage
+
+        np.testing.assert_allclose(
+            induced_voltage.induced_voltage, memory, rtol=0,
+            atol=1e-10 * np.max(np.abs(memory)))
+
+    def test_tolerance(self):
+        # Wake decaying after about two turns
+        resonators = Resonators([1e6], [200e6], [10])
+        induced_voltage = []
+        for tolerance in [0, 1e-7]:
+            induced_voltage.append(InducedVoltageTime(
+                self.beam, self.profile, [resonators],
+                wake_length=3.5*self.t_rev, multi_turn_wake=True,
+                RFParams=self.rf, mtw_tolerance=tolerance))
+            for turn in range(self.n_turns):
+                induced_voltage[-1].induced_voltage_generation()
+
+        self.assertEqual(induced_voltage[0].n_mtw_effective,
+                         induced_voltage[0].n_mtw_memory)
+        self.assertLess(induced_voltage[1].n_mtw_effective,
+                        0.8 * induced_voltage[1].n_mtw_memory)
+        np.testing.assert_allclose(
+            induced_voltage[1].induced_voltage,
+            induced_voltage[0].induced_voltage, rtol=0,
+            atol=1e-6 * np.max(np.abs(induced_voltage[0].induced_voltage)))
+
+
+class TestInducedVoltageResonator(unittest.TestCase):
+
+    def setUp(self):
+        ring = Ring(6911.5038, 1/17.95**2, 25.92e9, Proton(), 1)
+        np.random.seed(1)
+        self.beam = Beam(ring, 100000, 1e11)
+        self.beam.dt[:] = np.random.normal(2.5e-9, 0.3e-9, 100000)
+        self.profile = Profile(self.beam, CutOptions(cut_left=0,
+                                                     cut_right=5e-9,
+                                                     n_slices=100))
+        self.profile.track()
+        self.resonators = Resonators([1e6, 5e3, 2e4], [20e6, 2e9, 500e6],
+                                     [100, 1, 10])
+
+    def reference(self, time_array):
+        # Analytic sum over the line segments with dense matrices
+        bin_centers = self.profile.bin_centers
+        kappa = np.diff(self.profile.n_macroparticles) \
+            / np.diff(bin_centers) \
+            / (self.beam.n_macroparticles * self.profile.bin_size)
+        delta_t = time_array[:, None] - bin_centers[None, :]
+        voltage = 0
+        for R, omega_r, Q in zip(self.resonators.R_S,
+                                 self.resonators.omega_R, self.resonators.Q):
+            q_tilde = Q * np.sqrt(1 - 1 / (4 * Q**2))
+            omega_bar = omega_r * q_tilde / Q
+            wake = (2 * np.cos(omega_bar * delta_t)
+                    + np.sin(omega_bar * delta_t) / q_tilde) \
+                * np.exp(-omega_r / (2 * Q) * delta_t) \
+                * 0.5 * (np.sign(delta_t) + 1) - np.sign(delta_t)
+            voltage = voltage + R / (2 * omega_r * Q) \
+                * np.sum(kappa * np.diff(wake), axis=1)
+        return -self.beam.Particle.charge * e \
+            * self.beam.n_macroparticles * self.beam.ratio * voltage
+
+    def test_line_density_times(self):
+        induced_voltage = InducedVoltageResonator(self.beam, self.profile,
+                                                  self.resonators)
+        induced_voltage.induced_voltage_generation()
+
+        reference = self.reference(self.profile.bin_centers)
+        np.testing.assert_allclose(
+            induced_voltage.induced_voltage, reference, rtol=0,
+            atol=1e-9 * np.max(np.abs(reference)))
+
+    def test_time_array(self):
+        # Unsorted times, also outside of the profile
+        time_array = np.random.uniform(-1e-9, 8e-9, 300)
+        induced_voltage = InducedVoltageResonator(
+            self.beam, self.profile, self.resonators, timeArray=time_array)
+        induced_voltage.induced_voltage_generation()
+
+        reference = self.reference(time_array)
+        np.testing.assert_allclose(
+            induced_voltage.induced_voltage, reference, rtol=0,
+            atol=1e-9 * np.max(np.abs(reference)))
+
+
+class TestInducedVoltageSparse(unittest.TestCase):
+
+    def setUp(self):
+        ring = Ring(6911.5038, 1/17.95**2, 25.92e9, Proton(), 1)
+        rf = RFStation(ring, 4620, 3.5e6, 0)
+        t_rf = rf.t_rf[0, 0]
+
+        filling_pattern = np.zeros(12)
+        filling_pattern[[0, 1, 2, 5, 6, 11]] = 1
+        self.filled = np.where(filling_pattern)[0]
+        n_macroparticles_pb = 10000
+
+        np.random.seed(1)
+        self.beam = Beam(ring, len(self.filled) * n_macroparticles_pb,
+                         len(self.filled) * 1e11)
+        for i, bucket in enumerate(self.filled):
+            self.beam.dt[i*n_macroparticles_pb:(i+1)*n_macroparticles_pb] = \
+                (bucket + 0.5) * t_rf \
+                + np.random.normal(0, 0.2e-9, n_macroparticles_pb)
+        self.beam.dE[:] = np.random.normal(0, 1e6, len(self.beam.dE))
+
+        self.n_slices = 32
+        self.sparse_slices = SparseSlices(rf, self.beam, self.n_slices,
+                                          filling_pattern, direct_slicing=True)
+        self.profile = Profile(self.beam, CutOptions(
+            cut_left=0, cut_right=len(filling_pattern) * t_rf,
+            n_slices=len(filling_pattern) * self.n_slices))
+        self.profile.track()
+
+        # Long-range resonator and broadband impedance
+        self.resonators = Resonators([1e6, 5e3], [20e6, 2e9], [100, 1])
+        self.total_induced_voltage = TotalInducedVoltage(
+            self.beam, self.profile,
+            [InducedVoltageTime(self.beam, self.profile, [self.resonators])])
+        self.total_induced_voltage.induced_voltage_sum()
+        self.reference = self.total_induced_voltage.induced_voltage.reshape(
+            -1, self.n_slices)[self.filled]
+
+    def test_exact(self):
+        # All the wakes within the exact buckets: same as the dense profile
+        induced_voltage = InducedVoltageSparse(
+            self.beam, self.sparse_slices, [self.resonators],
+            exact_buckets=11)
+        induced_voltage.induced_voltage_generation()
+
+        np.testing.assert_allclose(
+            induced_voltage.induced_voltage, self.reference, rtol=0,
+            atol=1e-12 * np.max(np.abs(self.reference)))
+
+    def test_taylor_order(self):
+        errors = []
+        for order in [0, 1, 2]:
+            induced_voltage = InducedVoltageSparse(
+                self.beam, self.sparse_slices, [self.resonators],
+                taylor_order=order)
+            induced_voltage.induced_voltage_generation()
+            errors.append(np.max(np.abs(induced_voltage.induced_voltage
+                                        - self.reference)))
+
+        self.assertLess(errors[2], errors[1])
+        self.assertLess(errors[1], errors[0])
+        self.assertLess(errors[2], 1e-2 * np.max(np.abs(self.reference)))
+
+    def test_track(self):
+        induced_voltage = InducedVoltageSparse(
+            self.beam, self.sparse_slices, [self.resonators],
+            exact_buckets=11)
+        dE = self.beam.dE.copy()
+        induced_voltage.track()
+        sparse_dE = self.beam.dE.copy()
+
+        self.beam.dE[:] = dE
+        self.total_induced_voltage.track()
+
+        np.testing.assert_allclose(sparse_dE, self.beam.dE, rtol=0, atol=1e-6)
+
+    def test_wrong_order(self):
+        with self.assertRaises(RuntimeError):
+            InducedVoltageSparse(self.beam, self.sparse_slices,
+                                 [self.resonators], taylor_order=3)
+
+
+class TestTotalInducedVoltageMerged(unittest.TestCase):
+
+    def setUp(self):
+        ring = Ring(6911.5038, 1/17.95**2, 25.92e9, Proton(), 1)
+        self.rf = RFStation(ring, 4620, 3.5e6, 0)
+
+        np.random.seed(1)
+        self.beam = Beam(ring, 100000, 1e11)
+        self.beam.dt[:] = np.random.normal(2.5e-9, 0.3e-9, 100000)
+        self.beam.dE[:] = np.random.normal(0, 1e6, 100000)
+
+        self.profile = Profile(self.beam, CutOptions(
+            cut_left=0, cut_right=5e-9, n_slices=64))
+        self.profile.track()
+
+    def induced_voltage_list(self):
+        resonators = [Resonators([1e6], [20e6], [100]),
+                      Resonators([5e3], [2e9], [1]),
+                      Resonators([2e4], [500e6], [10])]
+        return [InducedVoltageTime(self.beam, self.profile, resonators[:1]),
+                InducedVoltageTime(self.beam, self.profile, resonators[1:2]),
+                InducedVoltageFreq(self.beam, self.profile, resonators[2:],
+                                   frequency_resolution=20e6),
+                InducedVoltageFreq(self.beam, self.profile, resonators[:1],
+                                   frequency_resolution=20e6),
+                InductiveImpedance(self.beam, self.profile, [0.1] * 2,
+                                   self.rf)]
+
+    def test_merged(self):
+        reference = TotalInducedVoltage(self.beam, self.profile,
+                                        self.induced_voltage_list())
+        merged = TotalInducedVoltage(self.beam, self.profile,
+                                     self.induced_voltage_list(), merged=True)
+
+        # One group per frequency grid, the inductive impedance apart
+        self.assertEqual(len(merged.merged_impedances), 2)
+        self.assertEqual(len(merged.unmerged_list), 1)
+
+        for it in range(2):
+            reference.induced_voltage_sum()
+            merged.induced_voltage_sum()
+            np.testing.assert_allclose(
+                merged.induced_voltage, reference.induced_voltage, rtol=0,
+                atol=1e-12 * np.max(np.abs(reference.induced_voltage)))
+
+            # Also after a change of the slicing
+            self.profile.cut_options.n_slices = 128
+            self.profile.set_slices_parameters()
+            self.profile.n_macroparticles = np.zeros(128)
+            self.profile.track()
+            reference.reprocess()
+            merged.reprocess()
+
+    def test_profile_beam_spectrum(self):
+        # The spectrum used by the induced voltage stays available in the
+        # profile, e.g. for plot_impedance_vs_frequency
+        frequency = InducedVoltageFreq(self.beam, self.profile,
+                                       [Resonators([1e6], [20e6], [100])],
+                                       frequency_resolution=20e6)
+        for merged in [False, True]:
+            self.profile.beam_spectrum = np.array([])
+            total = TotalInducedVoltage(self.beam, self.profile, [frequency],
+                                        merged=merged)
+            total.track()
+
+            self.assertEqual(len(self.profile.beam_spectrum),
+                             frequency.n_fft // 2 + 1)
+            np.testing.assert_allclose(
+                self.profile.beam_spectrum,
+                np.fft.rfft(self.profile.n_macroparticles, frequency.n_fft),
+                atol=1e-9 * np.sum(self.profile.n_macroparticles))
+
+
 if __name__ == '__main__':
 
     unittest.main()
@@ -0,0 +1,152 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for impedances.impedance_cache
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from blond.beam.profile import CutOptions, Profile
+from blond.impedances.impedance import InducedVoltageFreq, InducedVoltageTime
+from blond.impedances.impedance_cache import ImpedanceCache, \
+    use_impedance_cache, active_cache
+from blond.impedances.impedance_sources import InputTable, ResistiveWall, \
+    CoherentSynchrotronRadiation, Resonators
+
+
+class TestImpedanceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = use_impedance_cache(self.directory.name)
+        self.freq = np.linspace(0, 2e9, 101)
+
+    def tearDown(self):
+        use_impedance_cache(None)
+        self.directory.cleanup()
+
+    def test_disabled(self):
+        use_impedance_cache(None)
+        self.assertIsNone(active_cache())
+
+        source = ResistiveWall(0.05, 10, resistivity=1e-7)
+        source.imped_calc(self.freq)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_key(self):
+        cache = ImpedanceCache(self.directory.name)
+        key = cache.key('a', 1., np.arange(3.), {'b': None})
+
+        self.assertEqual(key, cache.key('a', 1., np.arange(3.), {'b': None}))
+        self.assertNotEqual(key, cache.key('a', 1., np.arange(4.),
+                                           {'b': None}))
+        self.assertNotEqual(key, cache.key('a', 1., np.arange(3.),
+                                           {'b': 0}))
+        self.assertNotEqual(key, cache.key('a', 1., np.arange(3, dtype=int),
+                                           {'b': None}))
+        with self.assertRaises(RuntimeError):
+            cache.key(object())
+
+    def test_resistive_wall(self):
+        source = ResistiveWall(0.05, 10, resistivity=1e-7)
+        source.imped_calc(self.freq)
+        reference = np.array(source.impedance)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+        other = ResistiveWall(0.05, 10, resistivity=1e-7)
+        other.imped_calc(self.freq)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        np.testing.assert_array_equal(other.impedance, reference)
+        np.testing.assert_array_equal(other.frequency_array, self.freq)
+
+        # Other parameters or grid are not hits
+        ResistiveWall(0.05, 10, resistivity=2e-7).imped_calc(self.freq)
+        other.imped_calc(self.freq[:-1])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 3))
+
+    def test_copy_on_write(self):
+        source = ResistiveWall(0.05, 10, resistivity=1e-7)
+        source.imped_calc(self.freq)
+        reference = np.array(source.impedance)
+
+        source.imped_calc(self.freq)
+        source.impedance *= 2
+
+        source.imped_calc(self.freq)
+        np.testing.assert_array_equal(source.impedance, reference)
+
+    def test_input_table(self):
+        table = InputTable(np.linspace(0, 3e9, 31), np.linspace(0, 1e3, 31),
+                           np.linspace(0, -1e3, 31))
+        table.imped_calc(self.freq)
+        reference = np.array(table.impedance)
+
+        other = InputTable(np.linspace(0, 3e9, 31), np.linspace(0, 1e3, 31),
+                           np.linspace(0, -1e3, 31))
+        other.imped_calc(self.freq)
+        self.assertEqual(self.cache.hits, 1)
+        np.testing.assert_array_equal(other.impedance, reference)
+        np.testing.assert_array_equal(other.Re_Z_array, reference.real)
+        np.testing.assert_array_equal(other.Im_Z_array, reference.imag)
+
+        wake_table = InputTable(np.linspace(0, 1e-8, 11), np.linspace(1, 0, 11))
+        time = np.linspace(0, 2e-8, 41)
+        wake_table.wake_calc(time)
+        wake_table.wake_calc(time)
+        self.assertEqual(self.cache.hits, 2)
+        np.testing.assert_array_equal(wake_table.new_time_array, time)
+        np.testing.assert_allclose(
+            wake_table.wake, np.interp(time, np.linspace(0, 1e-8, 11),
+                                       np.linspace(1, 0, 11), right=0))
+
+    def test_csr(self):
+        freq = np.linspace(1e8, 1e11, 50)
+        source = CoherentSynchrotronRadiation(1.5, chamber_height=0.03)
+        source.imped_calc(freq, high_frequency_transition=10)
+        reference = np.array(source.impedance)
+
+        other = CoherentSynchrotronRadiation(1.5, chamber_height=0.03)
+        other.imped_calc(freq, high_frequency_transition=10)
+        self.assertEqual(self.cache.hits, 1)
+        np.testing.assert_array_equal(other.impedance, reference)
+
+        other.imped_calc(freq, high_frequency_transition=5)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_induced_voltage(self):
+        profile = Profile(None, CutOptions=CutOptions(cut_left=0, cut_right=5e-9,
+                                                      n_slices=16))
+        sources = [ResistiveWall(0.05, 10, resistivity=1e-7),
+                   Resonators([4.5e6], [200.222e6], [200])]
+
+        use_impedance_cache(None)
+        reference = InducedVoltageFreq(None, profile, sources)
+        use_impedance_cache(self.directory.name)
+
+        InducedVoltageFreq(None, profile, sources)
+        cached = InducedVoltageFreq(None, profile, sources)
+        self.assertEqual((active_cache().hits, active_cache().misses), (1, 1))
+        np.testing.assert_allclose(cached.total_impedance,
+                                   reference.total_impedance, rtol=1e-12)
+
+        table = InputTable(np.linspace(0, 1e-8, 11), np.linspace(1, 0, 11))
+        reference = InducedVoltageTime(None, profile, [table])
+        cached = InducedVoltageTime(None, profile, [table])
+        self.assertEqual(active_cache().hits, 2)
+        np.testing.assert_array_equal(cached.total_wake,
+                                      reference.total_wake)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -113,6 +113,34 @@ class TestCoherentSynchrotronRadiation(unittest.TestCase):
         self.assertRaises(ValueError, csr_imped.imped_calc, np.arange(5),
                           high_frequency_transition=0.2)
 
+    def test_wrongMethod(self):
+        with self.assertRaises(RuntimeError):
+            CoherentSynchrotronRadiation(1, gamma=42, method='quad')
+
+    def test_fastFreeSpace(self):
+        # the fast method against the mpmath reference
+        Z_ref = CoherentSynchrotronRadiation(1.273, gamma=80, method='mpmath')
+        Z_fast = CoherentSynchrotronRadiation(1.273, gamma=80)
+
+        frequencies = np.geomspace(1e-5, 10, num=30) * Z_ref.f_crit
+        Z_ref.imped_calc(frequencies, epsilon=1e-14)
+        Z_fast.imped_calc(frequencies)
+
+        np.testing.assert_allclose(Z_fast.impedance, Z_ref.impedance, rtol=1e-6)
+        np.testing.assert_allclose(Z_fast.impedance.real, Z_ref.impedance.real,
+                                   rtol=1e-6)
+
+    def test_fastFreeSpaceTable(self):
+        # the interpolated table against the quadrature, and the quadrature outside the table
+        l_array = np.sort(np.random.default_rng(7).uniform(-6, 2, 500))
+        l_array = 10**np.concatenate((l_array, [-8, 2.5]))
+
+        universal = CoherentSynchrotronRadiation(1, gamma=42)._fs_universal(l_array)
+        reference = CoherentSynchrotronRadiation._fs_quadrature(l_array, n_nodes=32)
+
+        np.testing.assert_allclose(universal, reference, rtol=1e-9)
+        np.testing.assert_allclose(universal.real, reference.real, rtol=1e-9)
+
     def test_energyLoss(self):
         # based on Example 22: Coherent Radiation
 
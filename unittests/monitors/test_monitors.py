@@ -0,0 +1,78 @@
+# coding: utf8
+# Copyright 2014-2017 CERN. This software is distributed under the
+# terms of the GNU General Public Licence version 3 (GPL Version 3),
+# copied verbatim in the file LICENCE.md.
+# In applying this licence, CERN does not waive the privileges and immunities
+# granted to it by virtue of its status as an Intergovernmental Organization or
+# submit itself to any jurisdiction.
+# Project website: http://blond.web.cern.ch/
+
+"""
+Unittest for monitors.monitors
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import h5py as hp
+
+from blond.input_parameters.ring import Ring
+from blond.input_parameters.rf_parameters import RFStation
+from blond.beam.beam import Beam, Proton
+from blond.beam.profile import CutOptions, FitOptions, Profile
+from blond.monitors.monitors import MultiBunchMonitor
+
+
+class TestMultiBunchMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.ring = Ring(26658.883, 3.2e-4, 450e9, Proton(), 10)
+        self.rf = RFStation(self.ring, [35640], [6e6], [0])
+        self.t_rf = self.rf.t_rf[0, 0]
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_shifted_beam(self):
+        # Bunches in the buckets 0, 2 and 5 counted from the bucket starting
+        # at dt_offset, far from the reference time
+        bunch_buckets = np.array([0, 2, 5])
+        dt_offset = 1000.25 * self.t_rf
+        n_per_bunch = 1000
+        beam = Beam(self.ring, len(bunch_buckets) * n_per_bunch, 1e11)
+        np.random.seed(1)
+        for i, bucket in enumerate(bunch_buckets):
+            s = slice(i * n_per_bunch, (i + 1) * n_per_bunch)
+            beam.dt[s] = dt_offset + (bucket + 0.5) * self.t_rf + \
+                0.1 * self.t_rf * (np.random.rand(n_per_bunch) - 0.5)
+            beam.dE[s] = 1e6 * i + 1e5 * np.random.randn(n_per_bunch)
+        profile = Profile(beam, CutOptions(cut_left=dt_offset,
+                                           cut_right=dt_offset + 6 * self.t_rf,
+                                           n_slices=60),
+                          FitOptions(fit_option='fwhm'))
+
+        filename = os.path.join(self.directory.name, 'monitor')
+        monitor = MultiBunchMonitor(filename, 1, profile, self.rf,
+                                    len(bunch_buckets),
+                                    bunch_buckets=bunch_buckets,
+                                    dt_offset=dt_offset)
+        profile.track()
+        monitor.track(0)
+        monitor.close()
+
+        with hp.File(filename + '.h5', 'r') as h5file:
+            mean_dt = h5file['default/mean_dt'][0]
+            std_dE = h5file['default/std_dE'][0]
+        for i in range(len(bunch_buckets)):
+            s = slice(i * n_per_bunch, (i + 1) * n_per_bunch)
+            self.assertAlmostEqual(mean_dt[i], np.mean(beam.dt[s]),
+                                   delta=1e-20)
+            self.assertAlmostEqual(std_dE[i], np.std(beam.dE[s]),
+                                   delta=1e-6)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -16,6 +16,9 @@ Unittest for synchrotron_radiation.synchrotron_radiation.py
 import unittest
 import numpy as np
 import os
+import json
+import subprocess
+import sys
 
 from blond.input_parameters.ring import Ring
 from blond.beam.beam import Beam, Electron, Positron
@@ -26,6 +29,7 @@ from blond.trackers.tracker import RingAndRFTracker, FullRingAndRF
 from blond.synchrotron_radiation.synchrotron_radiation import SynchrotronRadiation
 from scipy.constants import c, e, m_e
 from blond.beam.profile import CutOptions
+from blond.utils import bmath as bm
 
 
 class TestSynchtrotronRadiation(unittest.TestCase):
@@ -771,6 +775,61 @@ class TestSynchRad(unittest.TestCase):
                                    err_msg="Pyhton and C++ std beam dE arrays not close")
 
 
+class TestQuantumExcitationRandomNumbers(unittest.TestCase):
+
+    # The quantum excitation kick of a particle depends on its id only
+    _script = """
+import sys
+import json
+import numpy as np
+from blond.utils import bmath as bm
+bm.set_random_seed(1234)
+dE = np.zeros(1001)
+bm.synchrotron_radiation_full(dE, 1e3, 2, 100., 1e-3, 1e9, turn=3, stream=1)
+json.dump(dE.tolist(), sys.stdout)
+"""
+
+    def kick(self, dE, id):
+        bm.set_random_seed(1234)
+        bm.synchrotron_radiation_full(dE, 1e3, 2, 100., 1e-3, 1e9, turn=3,
+                                      stream=1, id=id)
+        return dE
+
+    def test_threads(self):
+        results = []
+        for threads in ['1', '4']:
+            environment = dict(os.environ, OMP_NUM_THREADS=threads)
+            output = subprocess.check_output(
+                [sys.executable, '-c', self._script], env=environment,
+                cwd=os.path.join(os.path.dirname(__file__), '..', '..'))
+            results.append(np.array(json.loads(output)))
+
+        np.testing.assert_array_equal(results[0], results[1])
+        np.testing.assert_array_equal(
+            results[0], self.kick(np.zeros(1001), np.arange(1, 1002)))
+
+    def test_split(self):
+        id = np.arange(1, 1002)
+        reference = self.kick(np.zeros(1001), id)
+
+        # Bunch of particles not starting at a multiple of four
+        for split in [1, 3, 500, 998]:
+            first = self.kick(np.zeros(split), id[:split])
+            second = self.kick(np.zeros(1001 - split), id[split:])
+            np.testing.assert_array_equal(np.concatenate((first, second)),
+                                          reference)
+
+        order = np.random.RandomState(0).permutation(1001)
+        np.testing.assert_array_equal(self.kick(np.zeros(1001), id[order]),
+                                      reference[order])
+
+        # Other turns give other random numbers
+        other = np.zeros(1001)
+        bm.synchrotron_radiation_full(other, 1e3, 2, 100., 1e-3, 1e9, turn=4,
+                                      stream=1, id=id)
+        self.assertFalse(np.any(other == reference))
+
+
 if __name__ == '__main__':
 
     unittest.main()
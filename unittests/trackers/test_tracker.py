@@ -21,10 +21,11 @@ import matplotlib.pyplot as plt
 from blond.utils import bmath as bm
 from blond.input_parameters.ring import Ring
 from blond.input_parameters.rf_parameters import RFStation
-from blond.trackers.tracker import RingAndRFTracker
+from blond.trackers.tracker import RingAndRFTracker, FullRingAndRF
 from blond.beam.beam import Beam, Proton
 from blond.beam.distributions import bigaussian
-from blond.beam.profile import CutOptions, FitOptions, Profile
+from blond.beam.profile import CutOptions, FitOptions, Profile, \
+    OtherSlicesOptions
 from blond.llrf.rf_modulation import PhaseModulation as PMod
 import os
 
@@ -250,6 +251,646 @@ class TestRfVoltageCalcWCavityFB(unittest.TestCase):
                 """Phi modulation not added correctly in tracker""")
 
 
+class TestTrackTurns(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 10000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 450.5e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 200           # Number of turns to track
+
+    def make_tracker(self, solver='simple', phi_modulation=None,
+                     **kwargs):
+        ring = Ring(self.C, self.alpha, np.linspace(
+            self.p_i, self.p_f, self.N_t + 1), Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h, 4*self.h],
+                       [self.V * np.linspace(1, 1.1, self.N_t+1),
+                        0.1*self.V * np.ones(self.N_t+1)],
+                       [self.dphi, np.pi], n_rf=2,
+                       phi_modulation=phi_modulation)
+        np.random.seed(1)
+        beam.dt[:] = rf.t_rf[0, 0]/2 + np.random.normal(0, self.tau_0/4,
+                                                         self.N_p)
+        beam.dE[:] = np.random.normal(0, 1e8, self.N_p)
+        if kwargs.get('slice_in_drift', False):
+            kwargs['Profile'] = Profile(beam, CutOptions(
+                cut_left=0, cut_right=rf.t_rf[0, 0], n_slices=64))
+        return RingAndRFTracker(rf, beam, solver=solver, **kwargs)
+
+    def compare_to_track(self, **kwargs):
+        ref_tracker = self.make_tracker(**kwargs)
+        tracker = self.make_tracker(**kwargs)
+
+        for i in range(self.N_t//2):
+            ref_tracker.track()
+        tracker.track_turns(self.N_t//2)
+
+        np.testing.assert_allclose(tracker.beam.dt, ref_tracker.beam.dt,
+                                   rtol=1e-12, atol=0)
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=1e-12, atol=0)
+        np.testing.assert_allclose(tracker.phi_rf, ref_tracker.phi_rf,
+                                   rtol=1e-12, atol=0)
+        self.assertEqual(tracker.counter[0], ref_tracker.counter[0])
+        self.assertEqual(tracker.beam.energy, ref_tracker.beam.energy)
+
+    def test_simple_solver(self):
+        self.compare_to_track(solver='simple')
+
+    def test_exact_solver(self):
+        self.compare_to_track(solver='exact')
+
+    def test_legacy_solver(self):
+        self.compare_to_track(solver='legacy')
+
+    def test_phi_modulation(self):
+        phiMod = PMod(np.linspace(0, 0.2, 10000), 2E3, 0.1, 0, self.h)
+        self.compare_to_track(phi_modulation=phiMod)
+
+    def test_turns_out_of_range(self):
+        tracker = self.make_tracker()
+        with self.assertRaises(RuntimeError):
+            tracker.track_turns(self.N_t + 1)
+
+    def test_incompatible_options(self):
+        for kwargs in [{'kick_table_points': 1000},
+                       {'slice_in_drift': True}]:
+            tracker = self.make_tracker(**kwargs)
+            with self.assertRaises(RuntimeError):
+                tracker.track_turns(1)
+
+
+class InterpolatedTrackerTestCase(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 10000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 450.5e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 100           # Number of turns to track
+
+    def make_tracker(self, solver='exact', slices_options=None, **kwargs):
+        """Profile and interpolated RingAndRFTracker of a bunch in the first
+        RF bucket, the same for every call; kwargs go to the tracker."""
+        ring = Ring(self.C, self.alpha, np.linspace(
+            self.p_i, self.p_f, self.N_t + 1), Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h], self.V * np.linspace(1, 1.1, self.N_t+1),
+                       [self.dphi])
+        np.random.seed(1)
+        beam.dt[:] = rf.t_rf[0, 0]/2 + np.random.normal(0, self.tau_0/4,
+                                                         self.N_p)
+        beam.dE[:] = np.random.normal(0, 1e8, self.N_p)
+        profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                           cut_right=rf.t_rf[0, 0]),
+                          OtherSlicesOptions=slices_options or
+                          OtherSlicesOptions())
+        tracker = RingAndRFTracker(rf, beam, solver=solver,
+                                   interpolation=True, Profile=profile,
+                                   **kwargs)
+        return profile, tracker
+
+    def track(self, *profiles_and_trackers):
+        for i in range(self.N_t):
+            for profile, tracker in profiles_and_trackers:
+                profile.track()
+                tracker.track()
+
+
+class TestInterpKickDrift(InterpolatedTrackerTestCase):
+
+    def compare_to_separate(self, solver):
+        ref_profile, ref_tracker = self.make_tracker(solver)
+        profile, tracker = self.make_tracker(solver, interp_kick_drift=True)
+        self.track((ref_profile, ref_tracker), (profile, tracker))
+
+        np.testing.assert_allclose(tracker.beam.dt, ref_tracker.beam.dt,
+                                   rtol=1e-12, atol=0)
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=1e-12, atol=0)
+
+    def test_simple_solver(self):
+        self.compare_to_separate('simple')
+
+    def test_exact_solver(self):
+        self.compare_to_separate('exact')
+
+    def test_legacy_solver(self):
+        self.compare_to_separate('legacy')
+
+    def test_requires_interpolation(self):
+        profile, tracker = self.make_tracker()
+        with self.assertRaises(RuntimeError):
+            RingAndRFTracker(tracker.rf_params, tracker.beam,
+                             interp_kick_drift=True)
+
+    def test_requires_ngp_deposition(self):
+        for deposition in ['cic', 'tsc']:
+            with self.assertRaises(RuntimeError):
+                self.make_tracker(slices_options=OtherSlicesOptions(
+                    deposition=deposition), interp_kick_drift=True)
+
+
+class TestSliceInDrift(InterpolatedTrackerTestCase):
+
+    def test_slice_in_drift(self):
+        ref_profile, ref_tracker = self.make_tracker()
+        profile, tracker = self.make_tracker(slice_in_drift=True)
+        self.track((ref_profile, ref_tracker), (profile, tracker))
+        self.assertTrue(profile.sliced_in_drift)
+
+        ref_profile.track()
+        profile.track()
+        self.assertFalse(profile.sliced_in_drift)
+        np.testing.assert_array_equal(profile.n_macroparticles,
+                                      ref_profile.n_macroparticles)
+        np.testing.assert_array_equal(tracker.beam.dt, ref_tracker.beam.dt)
+        np.testing.assert_array_equal(tracker.beam.dE, ref_tracker.beam.dE)
+
+    def test_invalidated(self):
+        profile, tracker = self.make_tracker(slice_in_drift=True)
+        beam = tracker.beam
+        other_tracker = RingAndRFTracker(tracker.rf_params, beam,
+                                         interpolation=True, Profile=profile)
+
+        # Any other change of the arrival times after the slicing in the
+        # drift requires a new slicing
+        for change in [lambda: other_tracker.track(),
+                       lambda: beam.add_particles([[1e-9], [0.]]),
+                       lambda: beam.eliminate_lost_particles()]:
+            tracker.track()
+            self.assertTrue(profile.sliced_in_drift)
+            change()
+            self.assertFalse(profile.sliced_in_drift)
+
+        tracker.track()
+        beam.id[:10] = 0
+        beam.compact()
+        self.assertFalse(profile.sliced_in_drift)
+        reference = np.array(profile.n_macroparticles)
+        profile.track()
+        self.assertEqual(np.sum(profile.n_macroparticles),
+                         np.sum(reference) - 10)
+
+    def test_requires_standard_slicing(self):
+        with self.assertRaises(RuntimeError):
+            self.make_tracker(slices_options=OtherSlicesOptions(
+                deposition='cic'), slice_in_drift=True)
+        with self.assertRaises(RuntimeError):
+            self.make_tracker(slice_in_drift=True, interp_kick_drift=True)
+
+
+class TestBinCacheKick(InterpolatedTrackerTestCase):
+
+    def test_bin_cache(self):
+        ref_profile, ref_tracker = self.make_tracker()
+        profile, tracker = self.make_tracker(
+            slices_options=OtherSlicesOptions(bin_cache=True))
+
+        for i in range(self.N_t):
+            ref_profile.track()
+            ref_tracker.track()
+            profile.track()
+            self.assertTrue(profile.bin_cache_filled)
+            tracker.track()
+            self.assertFalse(profile.bin_cache_filled)
+
+        # The bin fractions are stored in single precision
+        np.testing.assert_allclose(tracker.beam.dt, ref_tracker.beam.dt,
+                                   rtol=0, atol=1e-15)
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=0, atol=1.)
+
+    def test_particles_replaced(self):
+        ref_profile, ref_tracker = self.make_tracker()
+        profile, tracker = self.make_tracker(
+            slices_options=OtherSlicesOptions(bin_cache=True))
+
+        for p, t in [(ref_profile, ref_tracker), (profile, tracker)]:
+            p.track()
+            # Lose particles and inject as many after the slicing: same
+            # number of particles, but not the ones of the stored bins
+            t.beam.id[:100] = 0
+            t.beam.compact()
+            t.beam.add_particles([t.beam.dt[:100] + 1e-10,
+                                  np.zeros(100)])
+            self.assertEqual(len(t.beam.dt), self.N_p)
+            t.track()
+
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=0, atol=0)
+
+
+class TestTSCKick(InterpolatedTrackerTestCase):
+
+    def test_tsc_kick(self):
+        ref_profile, ref_tracker = self.make_tracker()
+        profile, tracker = self.make_tracker(
+            slices_options=OtherSlicesOptions(deposition='tsc'))
+
+        ref_profile.track()
+        ref_tracker.track()
+        profile.track()
+        tracker.track()
+
+        # Both interpolations are close for the smooth RF voltage
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=0, atol=1e-3 * self.V)
+
+
+class TestTabulatedKick(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 10000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 450.5e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 100           # Number of turns to track
+
+    def make_tracker(self, kick_table_points=None, profile=False):
+        ring = Ring(self.C, self.alpha, np.linspace(
+            self.p_i, self.p_f, self.N_t + 1), Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h, 2*self.h, 4*self.h],
+                       [self.V * np.linspace(1, 1.1, self.N_t+1),
+                        0.2*self.V * np.ones(self.N_t+1),
+                        0.1*self.V * np.ones(self.N_t+1)],
+                       [self.dphi, np.pi, np.pi], n_rf=3)
+        np.random.seed(1)
+        beam.dt[:] = rf.t_rf[0, 0]/2 + np.random.normal(0, self.tau_0/4,
+                                                         self.N_p)
+        beam.dE[:] = np.random.normal(0, 1e8, self.N_p)
+        if profile:
+            profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                               cut_right=rf.t_rf[0, 0]))
+        else:
+            profile = None
+        return RingAndRFTracker(rf, beam, Profile=profile,
+                                kick_table_points=kick_table_points)
+
+    def test_kick_accuracy(self):
+        ref_tracker = self.make_tracker()
+        tracker = self.make_tracker(kick_table_points=10001)
+
+        ref_tracker.kick(ref_tracker.beam.dt, ref_tracker.beam.dE, 0)
+        tracker.tabulated_kick(tracker.beam.dt, tracker.beam.dE, 0)
+
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=0, atol=1e-6*self.V)
+
+    def test_outside_grid(self):
+        ref_tracker = self.make_tracker()
+        tracker = self.make_tracker(kick_table_points=1001)
+        # All the particles in the second RF bucket, outside of the table
+        ref_tracker.beam.dt += ref_tracker.rf_params.t_rf[0, 0]
+        tracker.beam.dt += tracker.rf_params.t_rf[0, 0]
+
+        ref_tracker.kick(ref_tracker.beam.dt, ref_tracker.beam.dE, 0)
+        tracker.tabulated_kick(tracker.beam.dt, tracker.beam.dE, 0)
+
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=1e-12, atol=0)
+
+    def test_tracking(self):
+        ref_tracker = self.make_tracker()
+        tracker = self.make_tracker(kick_table_points=10001, profile=True)
+
+        for i in range(self.N_t):
+            ref_tracker.track()
+            tracker.track()
+
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=0, atol=1e-4*self.V)
+        np.testing.assert_allclose(tracker.beam.dt, ref_tracker.beam.dt,
+                                   rtol=0, atol=1e-6*self.tau_0)
+
+    def test_incompatible_with_interpolation(self):
+        ring = Ring(self.C, self.alpha, self.p_i, Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        profile = Profile(beam, CutOptions(n_slices=100, cut_left=0,
+                                           cut_right=rf.t_rf[0, 0]))
+        with self.assertRaises(RuntimeError):
+            RingAndRFTracker(rf, beam, interpolation=True, Profile=profile,
+                             kick_table_points=1001)
+
+
+class TestPeriodicity(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 10000         # Macro-particles
+    # Machine and RF parameters
+    C = 6911.5623        # Machine circumference [m]
+    p_i = 25.92e9       # Synchronous momentum [eV/c]
+    p_f = 26e9          # Synchronous momentum, final
+    h = 4620             # Harmonic number
+    V = 0.9e6              # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 18.0       # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Tracking details
+    N_t = 100           # Number of turns to track
+
+    def make_tracker(self, solver, periodicity):
+        ring = Ring(self.C, self.alpha, np.linspace(
+            self.p_i, self.p_f, self.N_t + 1), Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h, 4*self.h],
+                       [self.V, 0.1*self.V], [self.dphi, np.pi], n_rf=2)
+        np.random.seed(1)
+        # Coasting beam, with particles initially on both sides of the frame
+        beam.dt[:] = np.random.uniform(-0.05, 1.05, self.N_p) * ring.t_rev[0]
+        beam.dE[:] = np.random.normal(0, 5e7, self.N_p)
+        return RingAndRFTracker(rf, beam, solver=solver,
+                                periodicity=periodicity)
+
+    def track_reference(self, tracker):
+        # Periodic tracking on copies of the particles outside of the frame
+        turn = tracker.counter[0]
+        dt = tracker.beam.dt
+        dE = tracker.beam.dE
+        t_rev = tracker.t_rev[turn+1]
+
+        right_outside = np.where(dt > t_rev)[0]
+        inside = np.where(dt <= t_rev)[0]
+        dt[right_outside] -= t_rev
+        inside_dt = np.ascontiguousarray(dt[inside])
+        inside_dE = np.ascontiguousarray(dE[inside])
+        tracker.kick(inside_dt, inside_dE, turn)
+        tracker.drift(inside_dt, inside_dE, turn+1)
+        dt[inside] = inside_dt
+        dE[inside] = inside_dE
+
+        left_outside = np.where(dt < 0)[0]
+        if len(left_outside) > 0:
+            left_dt = np.ascontiguousarray(dt[left_outside]) + t_rev
+            left_dE = np.ascontiguousarray(dE[left_outside])
+            tracker.kick(left_dt, left_dE, turn)
+            tracker.drift(left_dt, left_dE, turn+1)
+            dt[left_outside] = left_dt
+            dE[left_outside] = left_dE
+
+        tracker.counter[0] += 1
+
+    def compare_to_reference(self, solver):
+        ref_tracker = self.make_tracker(solver, False)
+        tracker = self.make_tracker(solver, True)
+
+        for i in range(self.N_t):
+            self.track_reference(ref_tracker)
+            tracker.track()
+
+        # The vectorised and scalar square roots of the exact solver can
+        # differ in the last bits, hence the tolerance
+        self.assertTrue(np.all(tracker.beam.dt >= 0))
+        np.testing.assert_allclose(tracker.beam.dt, ref_tracker.beam.dt,
+                                   rtol=1e-8, atol=1e-12*tracker.t_rev[0])
+        np.testing.assert_allclose(tracker.beam.dE, ref_tracker.beam.dE,
+                                   rtol=1e-8, atol=0)
+
+    def test_simple_solver(self):
+        self.compare_to_reference('simple')
+
+    def test_exact_solver(self):
+        self.compare_to_reference('exact')
+
+    def test_legacy_solver(self):
+        self.compare_to_reference('legacy')
+
+
+class TestFusedSections(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 10000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 450.5e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    n_sections = 3
+    # Tracking details
+    N_t = 100           # Number of turns to track
+
+    def make_full_ring(self, solver, fused_sections):
+        momentum = np.linspace(self.p_i, self.p_f, self.N_t + 1)
+        ring = Ring([self.C/2, self.C/4, self.C/4],
+                    np.tile(self.alpha, (self.n_sections, 1)),
+                    np.array([momentum + 0.1e9*i
+                              for i in range(self.n_sections)]),
+                    Proton(), self.N_t, n_sections=self.n_sections)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf_stations = [
+            RFStation(ring, [self.h], [self.V/2], [self.dphi],
+                      section_index=1),
+            RFStation(ring, [self.h, 4*self.h], [self.V/2, 0.1*self.V],
+                      [self.dphi, np.pi], n_rf=2, section_index=2),
+            RFStation(ring, [self.h], [0], [self.dphi], section_index=3)]
+        np.random.seed(1)
+        beam.dt[:] = rf_stations[0].t_rf[0, 0]/2 + \
+            np.random.normal(0, self.tau_0/4, self.N_p)
+        beam.dE[:] = np.random.normal(0, 1e8, self.N_p)
+        return FullRingAndRF([RingAndRFTracker(rf, beam, solver=solver)
+                              for rf in rf_stations],
+                             fused_sections=fused_sections)
+
+    def compare_to_sections(self, solver):
+        ref_full_ring = self.make_full_ring(solver, False)
+        full_ring = self.make_full_ring(solver, True)
+
+        for i in range(self.N_t):
+            ref_full_ring.track()
+            full_ring.track()
+
+        ref_beam = ref_full_ring.RingAndRFSection_list[0].beam
+        beam = full_ring.RingAndRFSection_list[0].beam
+        np.testing.assert_allclose(beam.dt, ref_beam.dt, rtol=1e-12, atol=0)
+        np.testing.assert_allclose(beam.dE, ref_beam.dE, rtol=1e-12, atol=0)
+        self.assertEqual(beam.energy, ref_beam.energy)
+        for section in full_ring.RingAndRFSection_list:
+            self.assertEqual(section.counter[0], self.N_t)
+
+    def test_simple_solver(self):
+        self.compare_to_sections('simple')
+
+    def test_exact_solver(self):
+        self.compare_to_sections('exact')
+
+    def test_legacy_solver(self):
+        self.compare_to_sections('legacy')
+
+    def test_different_solvers(self):
+        ring = Ring(self.C, self.alpha, self.p_i, Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        with self.assertRaises(RuntimeError):
+            FullRingAndRF([RingAndRFTracker(rf, beam, solver='simple'),
+                           RingAndRFTracker(rf, beam, solver='exact')],
+                          fused_sections=True)
+
+
+class TestCompensatedDt(unittest.TestCase):
+    # Simulation parameters -------------------------------------------------------
+    # Bunch parameters
+    N_b = 1e9           # Intensity
+    N_p = 10000         # Macro-particles
+    tau_0 = 0.4e-9          # Initial bunch length, 4 sigma [s]
+    # Machine and RF parameters
+    C = 26658.883        # Machine circumference [m]
+    p_i = 450e9         # Synchronous momentum [eV/c]
+    p_f = 450.5e9      # Synchronous momentum, final
+    h = 35640            # Harmonic number
+    V = 6e6                # RF voltage [V]
+    dphi = 0             # Phase modulation/offset
+    gamma_t = 55.759505  # Transition gamma
+    alpha = 1./gamma_t/gamma_t        # First order mom. comp. factor
+    # Bunch in the RF bucket number 1000, far from the reference time
+    bucket = 1000
+    # Tracking details
+    N_t = 500           # Number of turns to track
+
+    def tearDown(self):
+        bm.use_precision('double')
+
+    def track(self, precision, compensated_dt, buckets=(bucket,),
+              deposition=None):
+        # Bunches of N_p / len(buckets) particles in the given buckets,
+        # tracked with the interpolated kick of a profile covering them if
+        # a deposition is given
+        bm.use_precision(precision)
+        ring = Ring(self.C, self.alpha, np.linspace(
+            self.p_i, self.p_f, self.N_t + 1), Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b, compensated_dt=compensated_dt)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        np.random.seed(1)
+        n_bunch = self.N_p // len(buckets)
+        dt = np.concatenate([rf.t_rf[0, 0]*(bucket + 0.5) +
+                             np.random.normal(0, self.tau_0/4, n_bunch)
+                             for bucket in buckets])
+        beam.set_dt(dt, bunch_bounds=n_bunch * np.arange(len(buckets) + 1))
+        beam.dE[:] = np.random.normal(0, 1e8, self.N_p)
+        if deposition is None:
+            tracker = RingAndRFTracker(rf, beam)
+            profile = None
+        else:
+            profile = Profile(beam, CutOptions(
+                cut_left=rf.t_rf[0, 0]*buckets[0],
+                cut_right=rf.t_rf[0, 0]*(buckets[-1] + 1),
+                n_slices=100 * (buckets[-1] + 1 - buckets[0])),
+                OtherSlicesOptions=OtherSlicesOptions(deposition=deposition))
+            tracker = RingAndRFTracker(rf, beam, interpolation=True,
+                                       Profile=profile)
+
+        for i in range(self.N_t):
+            if profile is not None:
+                profile.track()
+            tracker.track()
+
+        dt = beam.absolute_dt().astype(np.float64)
+        bm.use_precision('double')
+        return dt
+
+    def test_compensated_dt(self):
+        ref_dt = self.track('double', False)
+        single_dt = self.track('single', False)
+        compensated_dt = self.track('single', True)
+
+        # Plain single precision loses the arrival times of the bunch
+        self.assertGreater(np.max(np.abs(single_dt - ref_dt)), 1e-11)
+        np.testing.assert_allclose(compensated_dt, ref_dt, rtol=0,
+                                   atol=1e-13)
+
+    def test_several_bunches(self):
+        buckets = (self.bucket, 3 * self.bucket)
+        ref_dt = self.track('double', False, buckets)
+        compensated_dt = self.track('single', True, buckets)
+
+        np.testing.assert_allclose(compensated_dt, ref_dt, rtol=0,
+                                   atol=1e-13)
+
+    def test_interpolation(self):
+        buckets = (self.bucket, self.bucket + 2)
+        for deposition in ['ngp', 'tsc']:
+            with self.subTest(deposition=deposition):
+                ref_dt = self.track('double', False, buckets, deposition)
+                single_dt = self.track('single', False, buckets, deposition)
+                compensated_dt = self.track('single', True, buckets,
+                                            deposition)
+
+                # Limited by the single precision bin centers
+                self.assertGreater(np.max(np.abs(single_dt - ref_dt)), 1e-11)
+                np.testing.assert_allclose(compensated_dt, ref_dt, rtol=0,
+                                           atol=5e-12)
+
+    def test_requires_single_precision(self):
+        ring = Ring(self.C, self.alpha, self.p_i, Proton(), self.N_t)
+        with self.assertRaises(RuntimeError):
+            Beam(ring, self.N_p, self.N_b, compensated_dt=True)
+
+    def test_incompatible_options(self):
+        bm.use_precision('single')
+        ring = Ring(self.C, self.alpha, self.p_i, Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b, compensated_dt=True)
+        rf = RFStation(ring, [self.h], [self.V], [self.dphi])
+        with self.assertRaises(RuntimeError):
+            RingAndRFTracker(rf, beam, kick_table_points=1000)
+        with self.assertRaises(RuntimeError):
+            RingAndRFTracker(rf, beam, periodicity=True)
+
+    def test_several_rf_systems(self):
+        bm.use_precision('single')
+        ring = Ring(self.C, self.alpha, self.p_i, Proton(), self.N_t)
+        beam = Beam(ring, self.N_p, self.N_b, compensated_dt=True)
+        rf = RFStation(ring, [self.h, 4 * self.h], [self.V, self.V / 4],
+                       [self.dphi, np.pi], n_rf=2)
+        dt = rf.t_rf[0, 0] * (self.bucket + np.linspace(0, 1, self.N_p))
+        beam.set_dt(dt)
+        beam.dE[:] = 0
+        tracker = RingAndRFTracker(rf, beam)
+        tracker.kick_compensated(0)
+
+        reference = self.V * np.sin(rf.omega_rf[0, 0] * dt) + \
+            self.V / 4 * np.sin(rf.omega_rf[1, 0] * dt + np.pi) + \
+            tracker.acceleration_kick[0]
+        # Kick in single precision on the offsets from the reference
+        np.testing.assert_allclose(beam.dE, reference, rtol=0,
+                                   atol=1e-5 * self.V)
+
 if __name__ == '__main__':
 
     unittest.main()
@@ -665,6 +665,92 @@ class TestSort(unittest.TestCase):
         np.testing.assert_equal(y, y2)
 
 
+class TestRandom(unittest.TestCase):
+
+    def test_normal_moments(self):
+        x = bm.random_normal(1000000, seed=10)
+        self.assertAlmostEqual(np.mean(x), 0, delta=5e-3)
+        self.assertAlmostEqual(np.std(x), 1, delta=5e-3)
+
+    def test_uniform_range(self):
+        x = bm.random_uniform(1000000, seed=10)
+        self.assertTrue(np.all(x > 0) and np.all(x < 1))
+        self.assertAlmostEqual(np.mean(x), 0.5, delta=5e-3)
+
+    def test_reproducible(self):
+        np.testing.assert_array_equal(bm.random_normal(1001, seed=3),
+                                      bm.random_normal(1001, seed=3))
+        self.assertFalse(np.array_equal(bm.random_normal(1001, seed=3),
+                                        bm.random_normal(1001, seed=4)))
+        self.assertFalse(np.array_equal(
+            bm.random_normal(1001, seed=3, stream=0),
+            bm.random_normal(1001, seed=3, stream=1)))
+        self.assertFalse(np.array_equal(
+            bm.random_normal(1001, seed=3, counter=0),
+            bm.random_normal(1001, seed=3, counter=1)))
+
+    def test_slices(self):
+        # Any slice of a sequence can be generated independently
+        x = bm.random_normal(1001, seed=3)
+        for offset, n in [(0, 10), (1, 7), (3, 500), (998, 3)]:
+            np.testing.assert_array_equal(
+                bm.random_normal(n, seed=3, offset=offset),
+                x[offset:offset+n])
+
+
+
+class TestSlice(unittest.TestCase):
+
+    def test_strategies(self):
+        dt = np.random.randn(100000)
+        reference = np.histogram(dt, bins=1000, range=(-3, 3))[0]
+        for strategy in ['auto', 'private', 'atomic', 'sort']:
+            profile = np.zeros(1000)
+            bm.slice(dt, profile, -3., 3., strategy=strategy)
+            np.testing.assert_array_equal(profile, reference,
+                                          err_msg=strategy)
+
+    def test_fine_histogram(self):
+        # More slices than particles
+        dt = np.random.rand(1000)
+        profile = np.zeros(1000000)
+        bm.slice(dt, profile, 0., 1.)
+        self.assertEqual(np.sum(profile), 1000)
+        np.testing.assert_array_equal(
+            np.flatnonzero(profile), np.unique((dt*1000000).astype(int)))
+
+    def test_cic_tsc(self):
+        n_slices = 100
+        dt = np.random.uniform(10, 90, 100000)
+        # Reference: weights of every particle on the bin centers 0.5, 1.5..
+        x = dt - 0.5
+        cic = np.zeros(n_slices)
+        bins = np.floor(x).astype(int)
+        np.add.at(cic, bins, 1 - (x - bins))
+        np.add.at(cic, bins + 1, x - bins)
+        tsc = np.zeros(n_slices)
+        bins = np.floor(x + 0.5).astype(int)
+        d = x - bins
+        np.add.at(tsc, bins - 1, 0.5 * (0.5 - d)**2)
+        np.add.at(tsc, bins, 0.75 - d**2)
+        np.add.at(tsc, bins + 1, 0.5 * (0.5 + d)**2)
+
+        for function, reference in [(bm.slice_cic, cic), (bm.slice_tsc, tsc)]:
+            profile = np.zeros(n_slices)
+            function(dt, profile, 0., 100.)
+            # The charge is conserved for particles inside the profile
+            self.assertAlmostEqual(np.sum(profile), len(dt), delta=1e-6)
+            np.testing.assert_allclose(profile, reference, atol=1e-8)
+
+    def test_tsc_interp_kick(self):
+        # The quadratic interpolation is exact for a linear voltage
+        bin_centers = np.linspace(0, 1, 50)
+        voltage = 2. * bin_centers + 1.
+        dt = np.random.uniform(0.05, 0.95, 1000)
+        dE = np.zeros(len(dt))
+        bm.tsc_interp_kick(dt, dE, voltage, bin_centers, 1., 0.5)
+        np.testing.assert_allclose(dE, 2. * dt + 1.5, rtol=1e-12)
+
 if __name__ == '__main__':
 
     unittest.main()